@@ -25,6 +25,10 @@ class BaseAgent(abc.ABC):
         self.index = index
         self.kwargs = kwargs
 
+        # The longest (in seconds) the game lets this agent take on a move without a penalty,
+        # or None if there is no limit (see `BaseAgent.setMoveTimeLimit`).
+        self.moveTimeLimit = None
+
     @abc.abstractmethod
     def getAction(self, state):
         """
@@ -41,6 +45,14 @@ class BaseAgent(abc.ABC):
 
         pass
 
+    def setMoveTimeLimit(self, seconds):
+        """
+        Told by the game (before `BaseAgent.registerInitialState`)
+        how long a single move can take before the agent is warned or forfeits.
+        """
+
+        self.moveTimeLimit = seconds
+
     def observationFunction(self, state):
         """
         Make an observation on the state of the game.
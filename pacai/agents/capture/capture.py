@@ -13,7 +13,7 @@ class CaptureAgent(BaseAgent):
     and implement `CaptureAgent.chooseAction`.
     """
 
-    def __init__(self, index, timeForComputing = 0.1, **kwargs):
+    def __init__(self, index, timeForComputing = 0.1, backgroundDistances = False, **kwargs):
         super().__init__(index, **kwargs)
 
         # Whether or not you're on the red team
@@ -29,7 +29,11 @@ class CaptureAgent(BaseAgent):
         self.observationHistory = []
 
         # Time to spend each turn on computing maze distances
-        self.timeForComputing = timeForComputing
+        self.timeForComputing = float(timeForComputing)
+
+        # Compute maze distances in the background instead of during setup.
+        # Until they are ready, the distancer falls back to manhattan distances.
+        self.backgroundDistances = util.parseBool(backgroundDistances)
 
     def registerInitialState(self, gameState):
         """
@@ -40,7 +44,11 @@ class CaptureAgent(BaseAgent):
         self.red = gameState.isOnRedTeam(self.index)
         self.distancer = distanceCalculator.Distancer(gameState.getInitialLayout())
 
-        self.distancer.getMazeDistances()
+        if (self.backgroundDistances):
+            self.distancer.getMazeDistances(background = True)
+            self.distancer.waitForMazeDistances(self.timeForComputing)
+        else:
+            self.distancer.getMazeDistances()
 
     def final(self, gameState):
         self.observationHistory = []
@@ -64,6 +72,10 @@ class CaptureAgent(BaseAgent):
 
         self.observationHistory.append(gameState)
 
+        # Give the distances a little more time if they are still being computed.
+        if (self.distancer is not None and not self.distancer.isReadyForMazeDistance()):
+            self.distancer.waitForMazeDistances(self.timeForComputing)
+
         myState = gameState.getAgentState(self.index)
         myPos = myState.getPosition()
 
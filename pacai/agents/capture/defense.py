@@ -29,8 +29,9 @@ class DefensiveReflexAgent(ReflexCaptureAgent):
         features['numInvaders'] = len(invaders)
 
         if (len(invaders) > 0):
-            dists = [self.getMazeDistance(myPos, a.getPosition()) for a in invaders]
-            features['invaderDistance'] = min(dists)
+            positions = [a.getPosition() for a in invaders]
+            nearestInvader, minDistance = self.distancer.nearest(myPos, positions)
+            features['invaderDistance'] = minDistance
 
         if (action == Directions.STOP):
             features['stop'] = 1
@@ -5,11 +5,14 @@ from typing import Callable, Union
 from pacai.agents.base import BaseAgent
 from pacai.core.directions import Directions
 from pacai.core.gamestate import AbstractGameState
+from pacai.core.search.heuristic import HeuristicCache
 from pacai.core.search.heuristic import null as nullHeuristic
+from pacai.core.search.instrument import SearchInstrumentation
 from pacai.core.search.position import PositionSearchProblem
 from pacai.core.search.problem import SearchProblem
 from pacai.student.search import depthFirstSearch
 from pacai.util import reflection
+from pacai.util import util
 
 class SearchAgent(BaseAgent):
     """
@@ -19,15 +22,32 @@ class SearchAgent(BaseAgent):
 
     As a default, this agent runs `pacai.student.search.depthFirstSearch` on a
     `pacai.core.search.position.PositionSearchProblem` to find location (1, 1).
+
+    If instrument is set (or an instrumentFile is given),
+    the search is run through a `pacai.core.search.instrument.SearchInstrumentation`
+    and its record is logged (or appended to instrumentFile) as JSON.
+    Measuring memory is the slowest part of that, set instrumentMemory to false to skip it.
     """
 
     def __init__(self, index,
             fn: Union[str, Callable[[SearchProblem], any]] = depthFirstSearch,
             prob: Union[str, Callable[[AbstractGameState], SearchProblem]] = PositionSearchProblem,
             heuristic: Union[str, Callable] = nullHeuristic,
+            instrument: Union[str, bool] = False,
+            instrumentFile: str = None,
+            instrumentMemory: Union[str, bool] = True,
             **kwargs):
         super().__init__(index, **kwargs)
 
+        instrument = util.parseBool(instrument)
+        instrumentMemory = util.parseBool(instrumentMemory)
+
+        self.instrumentation = None
+        self.instrumentFile = instrumentFile
+
+        if (instrument or instrumentFile is not None):
+            self.instrumentation = SearchInstrumentation(trackMemory = instrumentMemory)
+
         if isinstance(prob, str):
             # Get the search problem type from the name.
             self.searchType = reflection.qualifiedImport(prob)
@@ -36,6 +56,12 @@ class SearchAgent(BaseAgent):
             self.searchType = prob
         logging.info('[SearchAgent] using problem type %s.' % (self.searchType))
 
+        # The cache around the heuristic (if the search function takes one).
+        self.heuristicCache = None
+
+        # The name to give the search in instrumentation records.
+        self._searchName = getattr(fn, '__name__', str(fn))
+
         if isinstance(fn, str):
             # Get the search function from the name and heuristic.
             self.searchFunction = self._fetchSearchFunction(fn, heuristic)
@@ -65,7 +91,12 @@ class SearchAgent(BaseAgent):
         starttime = time.time()
         problem = self.searchType(state)  # Makes a new search problem.
 
-        self._actions = self.searchFunction(problem)  # Find a path.
+        # Find a path.
+        if (self.instrumentation is None):
+            self._actions = problem.expandActions(self.searchFunction(problem))
+        else:
+            self._actions = problem.expandActions(
+                    self.instrumentation.run(self.searchFunction, problem, self._searchName))
         self._actionIndex = 0
 
         totalCost = problem.actionsCost(self._actions)
@@ -77,6 +108,13 @@ class SearchAgent(BaseAgent):
 
         logging.info('Search nodes expanded: %d' % problem.getExpandedCount())
 
+        if (self.heuristicCache is not None):
+            logging.info('Heuristic cache hits: %d, misses: %d' %
+                    (self.heuristicCache.hits, self.heuristicCache.misses))
+
+        if (self.instrumentation is not None):
+            self.instrumentation.writeRecord(self.instrumentFile)
+
     def getAction(self, state):
         """
         Returns the next action in the path chosen earlier (in registerInitialState).
@@ -95,7 +133,8 @@ class SearchAgent(BaseAgent):
         """
         Get the specified search function by name.
         If that function also takes a heurisitc (i.e. has a parameter called "heuristic"),
-        then return a lambda that binds the heuristic to the function.
+        then return a lambda that binds the heuristic (wrapped in a
+        `pacai.core.search.heuristic.HeuristicCache`) to the function.
         """
 
         # Locate the function.
@@ -112,5 +151,12 @@ class SearchAgent(BaseAgent):
         logging.info('[SearchAgent] using function %s and heuristic %s.' %
                 (functionName, heuristic))
 
+        heuristic = HeuristicCache(heuristic)
+        self.heuristicCache = heuristic
+
+        # Time the heuristic (including its cache).
+        if (self.instrumentation is not None):
+            heuristic = self.instrumentation.wrapHeuristic(heuristic)
+
         # Bind the heuristic.
         return lambda x: function(x, heuristic = heuristic)
@@ -1,5 +1,4 @@
 from pacai.agents.search.base import SearchAgent
-from pacai.core.search import search
 from pacai.student import searchAgents
 
 class AStarCornersAgent(SearchAgent):
@@ -10,6 +9,7 @@ class AStarCornersAgent(SearchAgent):
 
     def __init__(self, index, **kwargs):
         super().__init__(index,
-                         fn = lambda prob: search.astar(prob, searchAgents.cornersHeuristic),
+                         fn = 'pacai.core.search.search.astar',
+                         heuristic = searchAgents.cornersHeuristic,
                          prob = searchAgents.CornersProblem,
                          **kwargs)
@@ -1,5 +1,4 @@
 from pacai.agents.search.base import SearchAgent
-from pacai.core.search import search
 from pacai.core.search.food import FoodSearchProblem
 from pacai.student import searchAgents
 
@@ -11,6 +10,7 @@ class AStarFoodSearchAgent(SearchAgent):
 
     def __init__(self, index, **kwargs):
         super().__init__(index,
-                         fn = lambda prob: search.astar(prob, searchAgents.foodHeuristic),
+                         fn = 'pacai.core.search.search.astar',
+                         heuristic = searchAgents.foodHeuristic,
                          prob = FoodSearchProblem,
                          **kwargs)
@@ -0,0 +1,413 @@
+"""
+Monte Carlo tree search (UCT) for pacman.
+
+Instead of searching every move to a fixed depth,
+MCTS grows a tree one path at a time towards the moves that have looked best so far
+(balanced against moves that have not been tried much),
+and judges each new position by playing the game out a few rounds with a cheap rollout policy.
+So it keeps getting better with more time, instead of with more depth.
+
+The tree only has nodes where it is pacman's turn.
+Each of pacman's actions leads to an edge, and the ghosts' moves (sampled from a ghost model)
+lead from the edge to one of the positions that can follow it.
+"""
+
+import logging
+import math
+import random
+import time
+
+from pacai.agents.ghost.directional import DirectionalGhost
+from pacai.agents.search import multiagent
+from pacai.agents.search.multiagent import MultiAgentSearchAgent
+from pacai.core.directions import Directions
+from pacai.util import util
+
+# Everyone moves uniformly at random (pacman does not stop if it can move).
+ROLLOUT_RANDOM = 'random'
+
+# Ghosts move like `pacai.agents.ghost.directional.DirectionalGhost`, pacman moves at random.
+ROLLOUT_DIRECTIONAL = 'directional'
+
+# Ghosts move like `ROLLOUT_DIRECTIONAL`,
+# pacman takes the move with the best evaluation (and sometimes a random one).
+ROLLOUT_GREEDY = 'greedy'
+
+ROLLOUT_POLICIES = (ROLLOUT_RANDOM, ROLLOUT_DIRECTIONAL, ROLLOUT_GREEDY)
+
+DEFAULT_MOVE_TIME = 0.5
+
+# The most rounds (pacman and every ghost moving once) a rollout plays.
+DEFAULT_ROLLOUT_DEPTH = 20
+
+DEFAULT_EXPLORATION = math.sqrt(2)
+
+# How often the greedy rollout policy moves pacman at random instead.
+GREEDY_EPSILON = 0.1
+
+class MCTSNode(object):
+    """
+    A position in the tree where it is pacman's turn (or the game is over).
+    """
+
+    __slots__ = ('state', 'visits', 'edges', 'untried')
+
+    def __init__(self, state, agentIndex):
+        self.state = state
+        self.visits = 0
+
+        # Pacman's actions that have been tried to their `MCTSEdge`.
+        self.edges = {}
+
+        # Pacman's actions that have not been tried yet.
+        self.untried = list(state.getLegalActions(agentIndex))
+
+class MCTSEdge(object):
+    """
+    One of pacman's actions from a `MCTSNode`.
+    """
+
+    __slots__ = ('visits', 'totalValue', 'minValue', 'maxValue', 'outcomes')
+
+    def __init__(self):
+        self.visits = 0
+        self.totalValue = 0.0
+
+        # The range of the values backed up through this edge.
+        self.minValue = float('inf')
+        self.maxValue = float('-inf')
+
+        # The positions seen after the ghosts answer this action (keyed by their hash).
+        self.outcomes = {}
+
+    def getMeanValue(self):
+        if (self.visits == 0):
+            return 0.0
+
+        return self.totalValue / self.visits
+
+class MCTSAgent(MultiAgentSearchAgent):
+    """
+    A pacman agent that picks moves with Monte Carlo tree search (UCT).
+
+    Each move searches until moveTime seconds pass
+    (capped by the game's move time limit, see `MultiAgentSearchAgent.getMoveBudget`)
+    or iterations iterations are done (either can be turned off with 0, but not both).
+    The move that was searched the most is taken.
+
+    Options (as agent args):
+     - rollout: The rollout policy (one of `ROLLOUT_POLICIES`).
+       Ghosts in the tree are modeled the same way they are in the rollouts.
+     - rolloutDepth: The most rounds a rollout plays before the evaluation function is applied.
+     - exploration: The UCB exploration constant (values are normalized to [0, 1] first).
+     - reuse: Keep the part of the tree under the position the game actually reached
+       between moves.
+     - processes: Run this many rollouts at once from each new position in a pool of processes.
+     - seed: Seed the search's own random numbers (by default they are drawn from `random`).
+    """
+
+    def __init__(self, index, rollout = ROLLOUT_GREEDY, rolloutDepth = DEFAULT_ROLLOUT_DEPTH,
+            exploration = DEFAULT_EXPLORATION, iterations = 0, moveTime = DEFAULT_MOVE_TIME,
+            reuse = True, seed = None, tableSize = 0, **kwargs):
+        if (moveTime is not None and float(moveTime) <= 0):
+            moveTime = None
+
+        super().__init__(index, tableSize = tableSize, moveTime = moveTime, **kwargs)
+
+        if (rollout not in ROLLOUT_POLICIES):
+            raise ValueError('Unknown rollout policy: \'%s\'.' % (rollout))
+
+        self.rolloutPolicy = rollout
+        self._rolloutDepth = int(rolloutDepth)
+        self._exploration = float(exploration)
+
+        self._iterations = int(iterations)
+        if (self._iterations <= 0 and not self.isAnytime()):
+            raise ValueError('MCTS needs a number of iterations or a move time.')
+
+        self._reuse = util.parseBool(reuse)
+
+        if (seed is None):
+            seed = random.getrandbits(64)
+
+        self._rng = random.Random(int(seed))
+
+        # Ghost index to the `pacai.agents.ghost.directional.DirectionalGhost` that models it.
+        self._ghostModels = {}
+
+        self._root = None
+        self._lastAction = None
+
+        # The range of values seen in the current tree (UCB works on values normalized to it).
+        self._minValue = float('inf')
+        self._maxValue = float('-inf')
+
+        # The iterations done for the current move, and the rollouts done in all moves.
+        self.iterationCount = 0
+        self.rolloutCount = 0
+
+        # The visits already at the root (from the last move's tree) when this move started.
+        self.reusedVisits = 0
+
+    def final(self, state):
+        if (self.numSearches > 0):
+            logging.info('MCTS rollouts: %d (%.1f per move)' %
+                    (self.rolloutCount, self.rolloutCount / self.numSearches))
+
+        super().final(state)
+
+    def getAction(self, state):
+        self.startSearch()
+
+        root = self._getRoot(state)
+        self.reusedVisits = root.visits
+
+        # Scores drift over a game, so only the values in this tree set the range.
+        self._minValue = min((edge.minValue for edge in root.edges.values()),
+                default = float('inf'))
+        self._maxValue = max((edge.maxValue for edge in root.edges.values()),
+                default = float('-inf'))
+
+        deadline = None
+        if (self.isAnytime()):
+            deadline = time.perf_counter() + self.getMoveBudget()
+
+        # Always do at least one iteration, so there is a move to pick.
+        self.iterationCount = 0
+        while (self.iterationCount == 0
+                or ((self._iterations <= 0 or self.iterationCount < self._iterations)
+                    and (deadline is None or time.perf_counter() < deadline))):
+            self._iterate(root)
+            self.iterationCount += 1
+
+        action = max(root.edges,
+                key = lambda action: (root.edges[action].visits,
+                    root.edges[action].getMeanValue()))
+
+        logging.debug('MCTS: %d iterations, %d reused visits, %s visited %d times.' %
+                (self.iterationCount, self.reusedVisits, action, root.edges[action].visits))
+
+        self._root = root
+        self._lastAction = action
+
+        return action
+
+    def registerInitialState(self, state):
+        self._root = None
+        self._lastAction = None
+
+        self._minValue = float('inf')
+        self._maxValue = float('-inf')
+
+        super().registerInitialState(state)
+
+    def rollout(self, state):
+        """
+        Play the game out from a state with the rollout policy
+        (for up to rolloutDepth rounds, or until it is over), and evaluate where it ends up.
+        Moves are made in place on the state and undone afterwards.
+        """
+
+        tokens = []
+
+        try:
+            for i in range(self._rolloutDepth):
+                for agentIndex in range(state.getNumAgents()):
+                    if (state.isOver()):
+                        break
+
+                    if (agentIndex == self.index):
+                        action = self._getRolloutAction(state)
+                    else:
+                        action = self._getGhostAction(state, agentIndex)
+
+                    tokens.append(state.applyMove(agentIndex, action))
+
+                if (state.isOver()):
+                    break
+
+            return self._evaluationFunction(state)
+        finally:
+            for token in reversed(tokens):
+                state.undoMove(token)
+
+    def _getGhostAction(self, state, agentIndex):
+        if (self.rolloutPolicy == ROLLOUT_RANDOM):
+            actions = state.getLegalActions(agentIndex)
+            if (len(actions) == 0):
+                return Directions.STOP
+
+            return self._rng.choice(actions)
+
+        if (agentIndex not in self._ghostModels):
+            self._ghostModels[agentIndex] = DirectionalGhost(agentIndex)
+
+        distribution = self._ghostModels[agentIndex].getDistribution(state)
+        if (len(distribution) == 0):
+            return Directions.STOP
+
+        # Sample from the search's own random numbers (not the game's).
+        choice = self._rng.random()
+        total = 0.0
+        for action, probability in sorted(distribution.items()):
+            total += probability
+            if (choice < total):
+                return action
+
+        return action
+
+    def _getRolloutAction(self, state):
+        actions = state.getLegalActions(self.index)
+        if (len(actions) > 1 and Directions.STOP in actions):
+            actions = [action for action in actions if action != Directions.STOP]
+
+        if (self.rolloutPolicy != ROLLOUT_GREEDY or self._rng.random() < GREEDY_EPSILON):
+            return self._rng.choice(actions)
+
+        bestValue = None
+        bestActions = []
+
+        for action in actions:
+            token = state.applyMove(self.index, action)
+            value = self._evaluationFunction(state)
+            state.undoMove(token)
+
+            if (bestValue is None or value > bestValue):
+                bestValue = value
+                bestActions = [action]
+            elif (value == bestValue):
+                bestActions.append(action)
+
+        return self._rng.choice(bestActions)
+
+    def _getRoot(self, state):
+        """
+        Get the node for the state from the last move's tree, or a new node.
+        """
+
+        if (self._reuse and self._root is not None and self._lastAction in self._root.edges):
+            node = self._root.edges[self._lastAction].outcomes.get(hash(state))
+            if (node is not None and node.state == state):
+                return node
+
+        return MCTSNode(state, self.index)
+
+    def _iterate(self, root):
+        """
+        Walk down the tree (adding a node for the first new position reached),
+        get a value for where the walk ended, and back it up the path.
+        """
+
+        node = root
+        path = []
+
+        while (True):
+            if (node.state.isOver()):
+                values = [self._evaluationFunction(node.state)]
+                break
+
+            if (len(node.untried) > 0):
+                action = node.untried.pop(self._rng.randrange(len(node.untried)))
+                edge = MCTSEdge()
+                node.edges[action] = edge
+            else:
+                action, edge = self._select(node)
+
+            path.append((node, edge))
+
+            outcome = self._sampleOutcome(node.state, action)
+            key = hash(outcome)
+
+            child = edge.outcomes.get(key)
+            if (child is None):
+                child = MCTSNode(outcome, self.index)
+                edge.outcomes[key] = child
+                self.countNode()
+
+                node = child
+                values = self._rollouts(child.state)
+                break
+
+            node = child
+
+        minValue = min(values)
+        maxValue = max(values)
+
+        self._minValue = min(self._minValue, minValue)
+        self._maxValue = max(self._maxValue, maxValue)
+
+        total = sum(values)
+
+        node.visits += len(values)
+        for (pathNode, edge) in path:
+            pathNode.visits += len(values)
+            edge.visits += len(values)
+            edge.totalValue += total
+            edge.minValue = min(edge.minValue, minValue)
+            edge.maxValue = max(edge.maxValue, maxValue)
+
+    def _rollouts(self, state):
+        """
+        Get the values of rollouts from a state:
+        one here, or one in each process of the pool.
+        """
+
+        if (not self.isParallel()):
+            values = [self.rollout(state)]
+        else:
+            tasks = [(state, self._rng.getrandbits(64)) for i in range(self._processes)]
+            values = self.mapWorkers(_rollout, tasks)
+
+        self.rolloutCount += len(values)
+        return values
+
+    def _sampleOutcome(self, state, action):
+        """
+        Make pacman's move, then a move for each ghost (from the ghost model).
+        """
+
+        state = state.generateSuccessor(self.index, action)
+
+        for agentIndex in range(state.getNumAgents()):
+            if (agentIndex == self.index):
+                continue
+
+            if (state.isOver()):
+                break
+
+            state = state.generateSuccessor(agentIndex, self._getGhostAction(state, agentIndex))
+
+        return state
+
+    def _select(self, node):
+        """
+        Pick the edge with the best upper confidence bound (UCB1).
+        """
+
+        logVisits = math.log(node.visits)
+        valueRange = self._maxValue - self._minValue
+
+        bestScore = None
+        best = None
+
+        for action, edge in node.edges.items():
+            value = 0.5
+            if (valueRange > 0):
+                value = (edge.getMeanValue() - self._minValue) / valueRange
+
+            score = value + self._exploration * math.sqrt(logVisits / edge.visits)
+            if (bestScore is None or score > bestScore):
+                bestScore = score
+                best = (action, edge)
+
+        return best
+
+def _rollout(state, seed):
+    """
+    Run a single rollout (in a worker process).
+    """
+
+    agent = multiagent.getWorkerAgent()
+    agent._rng.seed(seed)
+
+    return agent.rollout(state)
@@ -1,19 +1,444 @@
+import logging
+import multiprocessing
+import time
+
 from pacai.agents.base import BaseAgent
+from pacai.core import moveOrdering
+from pacai.core import transposition
 from pacai.util import reflection
 
+# The deepest an anytime search will go.
+MAX_ANYTIME_DEPTH = 64
+
+# Anytime searches stop this far ahead of the game's move time limit
+# (as a fraction of the limit, but never less than the minimum in seconds).
+SAFETY_MARGIN_FRACTION = 0.1
+MIN_SAFETY_MARGIN = 0.05
+
+# How often (in seconds) to check that the worker processes are still alive
+# while waiting for their results.
+WORKER_POLL_SECONDS = 0.1
+
+class SearchTimeout(Exception):
+    """
+    Raised (by `MultiAgentSearchAgent.checkDeadline`) to abandon a search that ran out of time.
+    """
+
+    pass
+
+# The agent that searches in a root-split worker process (see `_initWorker`).
+_workerAgent = None
+
 class MultiAgentSearchAgent(BaseAgent):
     """
     A common class for all multi-agent searchers.
+
+    Searchers can remember positions they have already searched in the
+    `pacai.core.transposition.TranspositionTable` from
+    `MultiAgentSearchAgent.getTranspositionTable`.
+    Its size (in buckets) is set with tableSize, and a size of 0 turns it off.
+
+    Searchers that care about the order they search moves in (like alpha-beta)
+    can get them from `MultiAgentSearchAgent.getOrderedSuccessors`,
+    which uses a `pacai.core.moveOrdering.MoveOrdering` with the components named by ordering
+    (see `pacai.core.moveOrdering.parseComponents`).
+
+    If moveTime is set, searchers are expected to run in anytime mode
+    (see `MultiAgentSearchAgent.iterativeDeepening`):
+    deepening one level at a time (up to maxDepth) until moveTime seconds have passed
+    or the game's move time limit (less a safety margin) is close.
+
+    If processes is more than 0, searchers that implement `MultiAgentSearchAgent.searchChild`
+    can split the search at the root (see `MultiAgentSearchAgent.parallelSearch`),
+    searching each of pacman's moves in a pool of that many worker processes.
     """
 
-    def __init__(self, index, evalFn = 'pacai.core.eval.score', depth = 2, **kwargs):
+    def __init__(self, index, evalFn = 'pacai.core.eval.score', depth = 2,
+            tableSize = transposition.DEFAULT_SIZE, moveTime = None,
+            maxDepth = MAX_ANYTIME_DEPTH, ordering = 'none', processes = 0, **kwargs):
         super().__init__(index, **kwargs)
 
         self._evaluationFunction = reflection.qualifiedImport(evalFn)
         self._treeDepth = int(depth)
 
+        self._transpositionTable = None
+        if (int(tableSize) > 0):
+            self._transpositionTable = transposition.TranspositionTable(int(tableSize))
+
+        self._moveTime = None
+        if (moveTime is not None):
+            self._moveTime = float(moveTime)
+
+        self._maxDepth = int(maxDepth)
+
+        if (isinstance(ordering, str)):
+            ordering = moveOrdering.MoveOrdering(moveOrdering.parseComponents(ordering),
+                    self._evaluationFunction)
+
+        self._moveOrdering = ordering
+
+        self._processes = int(processes)
+        if (self._processes < 0):
+            raise ValueError('The number of search processes cannot be negative: %d.'
+                    % (self._processes))
+
+        # Created the first time it is needed, and closed when the game is over.
+        self._pool = None
+
+        # The process ids of the pool's workers (see `MultiAgentSearchAgent.mapWorkers`).
+        self._poolPids = set()
+
+        # The nodes searched for the current move, and for all moves so far.
+        self.nodeCount = 0
+        self.totalNodeCount = 0
+        self.numSearches = 0
+
+        # When the current search has to stop (None if it does not).
+        self._deadline = None
+
+        # The state being searched from, and the action to try first from it.
+        self._rootState = None
+        self._rootAction = None
+
+        # The depth of the last completed anytime search.
+        self.completedDepth = 0
+
+    def checkDeadline(self):
+        """
+        Raise a `SearchTimeout` if the current search is out of time.
+        Searches that support anytime mode should call this at every node.
+        """
+
+        if (self._deadline is not None and time.perf_counter() > self._deadline):
+            raise SearchTimeout()
+
+    def closePool(self):
+        """
+        Stop the root-split worker processes (if they were started).
+        """
+
+        if (self._pool is None):
+            return
+
+        self._pool.terminate()
+        self._pool.join()
+        self._pool = None
+        self._poolPids = set()
+
+    def countNode(self):
+        """
+        Count a node for the search statistics.
+        Searches should call this at every node they visit.
+        """
+
+        self.nodeCount += 1
+        self.totalNodeCount += 1
+
+    def final(self, state):
+        self.closePool()
+
+        if (self.numSearches > 0):
+            logging.info('Nodes searched: %d (%.1f per move)' %
+                    (self.totalNodeCount, self.totalNodeCount / self.numSearches))
+
+        table = self._transpositionTable
+        if (table is not None and table.probes > 0):
+            logging.info('Transposition table hits: %d / %d (%.1f%%), overwrites: %d' %
+                    (table.hits, table.probes, 100.0 * table.getHitRate(), table.overwrites))
+
     def getEvaluationFunction(self):
         return self._evaluationFunction
 
+    def getMoveBudget(self):
+        """
+        Get the number of seconds an anytime search may spend on a move.
+        """
+
+        budget = self._moveTime
+
+        if (self.moveTimeLimit is not None):
+            margin = max(MIN_SAFETY_MARGIN, SAFETY_MARGIN_FRACTION * self.moveTimeLimit)
+            budget = min(budget, self.moveTimeLimit - margin)
+
+        return max(0.0, budget)
+
+    def getMoveOrdering(self):
+        return self._moveOrdering
+
+    def getOrderedActions(self, state, agentIndex):
+        """
+        Get the legal actions for an agent in the order they should be searched.
+        From the root of an anytime search,
+        the best action of the previous (shallower) iteration comes first.
+        """
+
+        actions = state.getLegalActions(agentIndex)
+
+        if (state is self._rootState and self._rootAction in actions):
+            actions = [self._rootAction] + [action for action in actions
+                    if action != self._rootAction]
+
+        return actions
+
+    def getOrderedSuccessors(self, state, agentIndex, ply, depth, maximize = True):
+        """
+        Get the (action, successor) pairs for an agent in the order they should be searched
+        (see `pacai.core.moveOrdering.MoveOrdering.order`),
+        successors are only generated as they are reached.
+        With no move ordering components, this is the order of
+        `MultiAgentSearchAgent.getOrderedActions`.
+
+        The root (ply 0) is always in the order of `MultiAgentSearchAgent.getOrderedActions`,
+        so which of several equal-valued moves is picked does not depend on
+        what the move ordering has learned
+        (which differs when the root is split across processes).
+        """
+
+        if (ply > 0 and len(self._moveOrdering.components) > 0):
+            return self._moveOrdering.order(state, agentIndex, ply, depth, maximize)
+
+        return ((action, state.generateSuccessor(agentIndex, action))
+                for action in self.getOrderedActions(state, agentIndex))
+
+    def getPool(self):
+        """
+        Get the pool of root-split worker processes, starting it if needed.
+        Each worker gets its own copy of this agent to search with.
+        """
+
+        if (self._pool is None):
+            children = set([child.pid for child in multiprocessing.active_children()])
+
+            self._pool = multiprocessing.Pool(processes = self._processes,
+                    initializer = _initWorker, initargs = (self,))
+
+            self._poolPids = set([child.pid for child in multiprocessing.active_children()])
+            self._poolPids -= children
+
+        return self._pool
+
+    def getTranspositionTable(self):
+        """
+        Get the transposition table, or None if it is turned off.
+        """
+
+        return self._transpositionTable
+
     def getTreeDepth(self):
         return self._treeDepth
+
+    def isAnytime(self):
+        return self._moveTime is not None
+
+    def isParallel(self):
+        return self._processes > 0
+
+    def iterativeDeepening(self, state, search):
+        """
+        Search deeper and deeper until the move budget (see `MultiAgentSearchAgent.getMoveBudget`)
+        runs out.
+        Search is called with a depth and returns a (value, action) pair,
+        it should call `MultiAgentSearchAgent.checkDeadline` as it goes
+        and search the actions from `MultiAgentSearchAgent.getOrderedActions`.
+
+        Returns the action from the deepest search that completed.
+        A new depth is not started if the last one took longer than the time that is left,
+        since the next is sure to take longer still.
+        """
+
+        startTime = time.perf_counter()
+        self._deadline = startTime + self.getMoveBudget()
+        self._rootState = state
+        self._rootAction = None
+        self.completedDepth = 0
+
+        lastSeconds = 0.0
+
+        try:
+            for depth in range(1, self._maxDepth + 1):
+                iterationStart = time.perf_counter()
+                if (depth > 1 and self._deadline - iterationStart < lastSeconds):
+                    break
+
+                try:
+                    value, action = search(depth)
+                except SearchTimeout:
+                    break
+
+                self._rootAction = action
+                self.completedDepth = depth
+                lastSeconds = time.perf_counter() - iterationStart
+        finally:
+            action = self._rootAction
+
+            self._deadline = None
+            self._rootState = None
+            self._rootAction = None
+
+        logging.debug('Searched to depth %d in %.3f seconds.' %
+                (self.completedDepth, time.perf_counter() - startTime))
+
+        if (action is None):
+            logging.warning('No search completed in time, taking the first legal action.')
+            action = state.getLegalActions(self.index)[0]
+
+        return action
+
+    def mapWorkers(self, function, tasks, timeout = None):
+        """
+        Call function with each task's arguments in the worker pool
+        (see `MultiAgentSearchAgent.getPool`), and return the results in order.
+
+        A `multiprocessing.TimeoutError` is raised if the results take more than timeout seconds.
+        Workers are checked while waiting: a pool quietly replaces a worker that dies
+        (e.g. to the OOM killer or a signal), but the task it was running is lost.
+        So if one dies, the pool is closed and a RuntimeError is raised.
+        """
+
+        pending = self.getPool().starmap_async(function, tasks)
+
+        deadline = None
+        if (timeout is not None):
+            deadline = time.perf_counter() + timeout
+
+        while (True):
+            wait = WORKER_POLL_SECONDS
+            if (deadline is not None):
+                wait = min(wait, max(0.0, deadline - time.perf_counter()))
+
+            try:
+                return pending.get(wait)
+            except multiprocessing.TimeoutError:
+                if (deadline is not None and time.perf_counter() >= deadline):
+                    raise
+
+            alive = set([child.pid for child in multiprocessing.active_children()])
+            lost = self._poolPids - alive
+            if (len(lost) > 0):
+                self.closePool()
+                raise RuntimeError('Search worker process(es) %s died, their results are lost.'
+                        % (sorted(lost)))
+
+    def parallelSearch(self, state, depth):
+        """
+        Search from pacman's turn by splitting at the root:
+        each child is searched (with `MultiAgentSearchAgent.searchChild`) in a worker process,
+        and the results are combined just like a sequential search would
+        (the first child with the highest value wins).
+        So the value and action are the same as a sequential search in the same child order
+        (for alpha-beta, children are searched with a full window, so their values are exact).
+
+        Returns a (value, action) pair.
+        In anytime mode, a `SearchTimeout` is raised if any child runs out of time.
+        """
+
+        self.countNode()
+
+        if (depth <= 0 or state.isOver()):
+            return self._evaluationFunction(state), None
+
+        self.checkDeadline()
+
+        children = list(self.getOrderedSuccessors(state, self.index, 0, depth))
+
+        # Deadlines are sent as wall time, since it is the clock all the processes share.
+        deadline = None
+        timeout = None
+        if (self._deadline is not None):
+            timeout = max(0.0, self._deadline - time.perf_counter())
+            deadline = time.time() + timeout
+
+        tasks = [(successor, depth - 1, deadline, self.numSearches)
+                for (action, successor) in children]
+
+        try:
+            results = self.mapWorkers(_searchChild, tasks, timeout)
+        except multiprocessing.TimeoutError:
+            raise SearchTimeout()
+
+        maxValue = float('-inf')
+        maxAction = None
+
+        for ((action, successor), (value, nodeCount)) in zip(children, results):
+            if (value is None):
+                raise SearchTimeout()
+
+            self.nodeCount += nodeCount
+            self.totalNodeCount += nodeCount
+
+            if (value > maxValue):
+                maxValue = value
+                maxAction = action
+
+        self._moveOrdering.recordBest(state, self.index, maxAction)
+
+        return maxValue, maxAction
+
+    def registerInitialState(self, state):
+        # Start the workers now, so the first move does not pay for it.
+        if (self.isParallel()):
+            self.getPool()
+
+    def searchChild(self, state, depth):
+        """
+        Get the value of a state right after pacman has moved
+        (so it is the first ghost's turn) with depth left to search.
+        Searchers implement this to support `MultiAgentSearchAgent.parallelSearch`.
+        """
+
+        raise NotImplementedError('%s does not support root-split search.'
+                % (type(self).__name__))
+
+    def startSearch(self):
+        """
+        Get ready to search for a new move.
+        Searches should call this once per move, before any iterations of an anytime search.
+        """
+
+        if (self._transpositionTable is not None):
+            self._transpositionTable.newSearch()
+
+        self._moveOrdering.newSearch()
+
+        self.nodeCount = 0
+        self.numSearches += 1
+
+def getWorkerAgent():
+    """
+    Get this worker process's copy of the agent (see `MultiAgentSearchAgent.getPool`),
+    or None outside of a worker.
+    """
+
+    return _workerAgent
+
+def _initWorker(agent):
+    global _workerAgent
+
+    _workerAgent = agent
+    _workerAgent._pool = None
+    _workerAgent._processes = 0
+
+def _searchChild(state, depth, deadline, searchId):
+    """
+    Search a single root child (in a worker process).
+    Returns (value, nodes searched), with a value of None if the search ran out of time.
+    """
+
+    agent = _workerAgent
+
+    # Keep the worker's tables in step with the searches in the main process.
+    if (agent.numSearches != searchId):
+        agent.startSearch()
+        agent.numSearches = searchId
+
+    agent.nodeCount = 0
+
+    if (deadline is not None):
+        agent._deadline = time.perf_counter() + (deadline - time.time())
+
+    try:
+        return agent.searchChild(state, depth), agent.nodeCount
+    except SearchTimeout:
+        return None, agent.nodeCount
+    finally:
+        agent._deadline = None
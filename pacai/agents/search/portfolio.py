@@ -0,0 +1,58 @@
+import logging
+
+from pacai.agents.search.base import SearchAgent
+from pacai.core.search import portfolio
+
+# The configurations to run if none are given (suited to the default position search).
+DEFAULT_CONFIGURATIONS = 'astar:manhattan;ucs;bfs:suboptimal;dfs:suboptimal'
+
+class PortfolioSearchAgent(SearchAgent):
+    """
+    A search agent that runs several search configurations at once
+    (see `pacai.core.search.portfolio.runPortfolio`) and follows the plan of the winner.
+
+    Configurations are given as a string for `pacai.core.search.portfolio.parseConfigurations`,
+    e.g. `--agent-args "configs=astar:manhattan;ucs,mode=first"`.
+    The problem is chosen with `prob` just like `pacai.agents.search.base.SearchAgent`.
+    """
+
+    def __init__(self, index, configs = DEFAULT_CONFIGURATIONS, mode = portfolio.MODE_OPTIMAL,
+            processes = None, **kwargs):
+        super().__init__(index, **kwargs)
+
+        if (isinstance(configs, str)):
+            configs = portfolio.parseConfigurations(configs)
+
+        if (mode not in portfolio.MODES):
+            raise ValueError('Unknown portfolio mode: \'%s\'.' % (mode))
+
+        if (processes is not None):
+            processes = int(processes)
+
+        self.configurations = configs
+        self.mode = mode
+        self.processes = processes
+
+        # The result of the last portfolio run.
+        self.result = None
+
+    def registerInitialState(self, state):
+        result = portfolio.runPortfolio(state, self.searchType, self.configurations,
+                mode = self.mode, processes = self.processes)
+        self.result = result
+
+        if (result.actions is None):
+            raise Exception('No configuration in the portfolio found a plan.')
+
+        self._actions = result.actions
+        self._actionIndex = 0
+
+        state.setHighlightLocations(result.visitHistory)
+
+        logging.info('Portfolio winner: %s (%d of %d configurations finished)' %
+                (result.configuration, result.finished, len(self.configurations)))
+
+        logging.info('Path found with total cost of %d in %.1f seconds' %
+                (result.cost, result.seconds))
+
+        logging.info('Search nodes expanded: %d' % result.expanded)
@@ -14,6 +14,7 @@ import sys
 from pacai.agents import keyboard
 from pacai.agents.capture.dummy import DummyAgent
 from pacai.bin.arguments import getParser
+from pacai.core import distanceCalculator
 from pacai.core.actions import Actions
 from pacai.core.distance import manhattan
 from pacai.core.game import Game
@@ -78,18 +79,15 @@ class CaptureGameState(AbstractGameState):
             else:
                 self._blueCapsules.append(capsule)
 
-        self._redFood = Grid(self._food.getWidth(), self._food.getHeight(), initialValue = False)
-        self._blueFood = Grid(self._food.getWidth(), self._food.getHeight(), initialValue = False)
+        # Grid cells are packed column-major, so the red side (the left columns)
+        # is just the low bits of the food grid.
+        width = self._food.getWidth()
+        height = self._food.getHeight()
+        redMask = (1 << (int(self._layout.width / 2) * height)) - 1
+        foodBits = self._food.getBits()
 
-        for x in range(self._food.getWidth()):
-            for y in range(self._food.getHeight()):
-                if (not self._food[x][y]):
-                    continue
-
-                if (self.isOnRedSide((x, y))):
-                    self._redFood[x][y] = True
-                else:
-                    self._blueFood[x][y] = True
+        self._redFood = Grid.fromBits(width, height, foodBits & redMask)
+        self._blueFood = Grid.fromBits(width, height, foodBits & ~redMask)
 
     # Override
     def generateSuccessor(self, agentIndex, action):
@@ -99,9 +97,17 @@ class CaptureGameState(AbstractGameState):
 
         successor = self._initSuccessor()
         successor._applySuccessorAction(agentIndex, action)
+        successor._updateAgentHashes(self._agentStates)
 
         return successor
 
+    # Override
+    def applyMove(self, agentIndex, action):
+        captureState = (self._timeleft, self._redFood, self._blueFood,
+                self._redCapsules, self._blueCapsules)
+
+        return (super().applyMove(agentIndex, action), captureState)
+
     # Override
     def getLegalActions(self, agentIndex = 0):
         if (self.isOver()):
@@ -109,6 +115,15 @@ class CaptureGameState(AbstractGameState):
 
         return AgentRules.getLegalActions(self, agentIndex)
 
+    # Override
+    def undoMove(self, token):
+        baseToken, captureState = token
+
+        super().undoMove(baseToken)
+
+        (self._timeleft, self._redFood, self._blueFood,
+                self._redCapsules, self._blueCapsules) = captureState
+
     # Override
     def eatCapsule(self, x, y):
         if (not self._capsulesCopied):
@@ -238,8 +253,6 @@ class CaptureGameState(AbstractGameState):
         self._lastAgentMoved = agentIndex
         self._timeleft -= 1
 
-        self._hash = None
-
 class CaptureRules:
     """
     These game rules manage the control flow of a game, deciding when
@@ -519,6 +532,11 @@ def readCommand(argv):
             help = 'comma separated arguments to be passed to blue team (e.g. \'opt1=val1,opt2\') '
                 + '(default: %(default)s)')
 
+    parser.add_argument('--distance-cache', dest = 'distanceCache',
+            action = 'store', type = str, default = None,
+            help = 'save maze distance tables to (and load them from) this directory, '
+                + 'so they are only computed once across runs (default: %(default)s)')
+
     parser.add_argument('--keys0', dest = 'keys0',
             action = 'store_true', default = False,
             help = 'make agent 0 (first red player) a keyboard agent (default: %(default)s)')
@@ -559,6 +577,9 @@ def readCommand(argv):
     elif options.debug:
         updateLoggingLevel(logging.DEBUG)
 
+    if (options.distanceCache is not None):
+        distanceCalculator.setCacheDir(options.distanceCache)
+
     viewOptions = {
         'gifFPS': options.gifFPS,
         'gifPath': options.gif,
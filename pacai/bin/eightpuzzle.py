@@ -1,8 +1,48 @@
+import argparse
+import collections
+import logging
+import math
+import os
 import random
+import struct
+import sys
+import tempfile
+import textwrap
+import time
 
+from pacai.core.search import heuristic as heuristics
 from pacai.core.search import search
 from pacai.core.search.problem import SearchProblem
 from pacai.util.logs import initLogging
+from pacai.util.logs import updateLoggingLevel
+
+# The number of cells (and of tiles, counting the blank) in the puzzle.
+NUM_CELLS = 9
+
+# The factorials of 0 through NUM_CELLS, used to rank permutations.
+FACTORIALS = [math.factorial(i) for i in range(NUM_CELLS + 1)]
+
+# The rank of the goal puzzle (see `rankPermutation`).
+GOAL_RANK = 0
+
+# The tiles in each of the default (disjoint) pattern databases.
+DEFAULT_PATTERNS = ((1, 2, 3, 4), (5, 6, 7, 8))
+
+# Pattern databases are kept on disk between runs if this names a directory.
+PATTERN_DATABASE_DIR_ENV_VAR = 'PACAI_PATTERN_DATABASE_DIR'
+PATTERN_DATABASE_FILE_EXTENSION = '.pdb'
+
+_PATTERN_DATABASE_MAGIC = b'PACPDB01'
+_PATTERN_DATABASE_HEADER = struct.Struct('<8sB')
+
+# Marks the placements that a database has no cost for (ones that are impossible).
+_UNKNOWN_COST = 255
+
+# Pattern databases that have been built or loaded, keyed by their tiles.
+_patternDatabases = {}
+
+# Where to keep pattern databases between runs (None to only keep them in memory).
+_patternDatabaseDir = os.environ.get(PATTERN_DATABASE_DIR_ENV_VAR) or None
 
 class EightPuzzleState:
     """
@@ -34,6 +74,9 @@ class EightPuzzleState:
         The state of the puzzle is stored in a 2-dimensional list (a list of lists) 'cells'.
         """
 
+        # The rank of this puzzle, computed the first time it is asked for.
+        self._rank = None
+
         self.cells = []
         numbers = numbers[:]  # Make a copy so as not to cause side-effects.
         numbers.reverse()
@@ -71,6 +114,27 @@ class EightPuzzleState:
                 current += 1
         return True
 
+    def getNumbers(self):
+        """
+        Get the tiles in this puzzle as a flat list (in the same form the constructor takes).
+        """
+
+        return [number for row in self.cells for number in row]
+
+    def getRank(self):
+        """
+        Get the permutation rank of this puzzle (see `rankPermutation`).
+        Two puzzles have the same rank if and only if they are equal.
+
+        >>> EightPuzzleState([0, 1, 2, 3, 4, 5, 6, 7, 8]).getRank()
+        0
+        """
+
+        if (self._rank is None):
+            self._rank = rankPermutation(self.getNumbers())
+
+        return self._rank
+
     def legalMoves(self):
         """
             Returns a list of legal moves from the current state.
@@ -147,14 +211,17 @@ class EightPuzzleState:
         True
         """
 
-        for row in range(3):
-            if self.cells[row] != other.cells[row]:
-                return False
-
-        return True
+        return self.getRank() == other.getRank()
 
     def __hash__(self):
-        return hash(str(self.cells))
+        return self.getRank()
+
+    def __lt__(self, other):
+        """
+        Order puzzles by rank, so searches can break ties between them.
+        """
+
+        return self.getRank() < other.getRank()
 
     def __getAsciiString(self):
         """
@@ -208,11 +275,20 @@ class EightPuzzleSearchProblem(SearchProblem):
         from the original state and the cost is 1.0 for each
         """
 
+        self._numExpanded += 1
+
         succ = []
         for a in state.legalMoves():
             succ.append((state.result(a), a, 1))
         return succ
 
+    def getNumbers(self, state):
+        """
+        Get the tiles of a state as a flat list (see `EightPuzzleState.getNumbers`).
+        """
+
+        return state.getNumbers()
+
     def actionsCost(self, actions):
         """
         actions: A list of actions to take
@@ -223,6 +299,368 @@ class EightPuzzleSearchProblem(SearchProblem):
 
         return len(actions)
 
+def _getBlankMoves():
+    """
+    For each cell the blank could be in,
+    get the legal moves (in `EightPuzzleState.legalMoves` order) and the cell the blank moves to.
+    """
+
+    blankMoves = []
+
+    for blank in range(NUM_CELLS):
+        row, col = divmod(blank, 3)
+        moves = []
+
+        if (row != 0):
+            moves.append(('up', blank - 3))
+
+        if (row != 2):
+            moves.append(('down', blank + 3))
+
+        if (col != 0):
+            moves.append(('left', blank - 1))
+
+        if (col != 2):
+            moves.append(('right', blank + 1))
+
+        blankMoves.append(tuple(moves))
+
+    return blankMoves
+
+BLANK_MOVES = _getBlankMoves()
+
+class CompactEightPuzzleSearchProblem(EightPuzzleSearchProblem):
+    """
+    The same search as `EightPuzzleSearchProblem`,
+    but each state is just the permutation rank of the puzzle (see `rankPermutation`),
+    an int in [0, 9!).
+    Ints are much cheaper to hash, compare, and keep around than `EightPuzzleState`s,
+    which makes this the problem to use for anything that explores a lot of puzzles.
+    """
+
+    def __init__(self, puzzle):
+        super().__init__(puzzle)
+
+        self._startingRank = puzzle.getRank()
+
+    def startingState(self):
+        return self._startingRank
+
+    def isGoal(self, state):
+        return state == GOAL_RANK
+
+    def successorStates(self, state):
+        self._numExpanded += 1
+
+        numbers = unrankPermutation(state)
+        blank = numbers.index(0)
+
+        succ = []
+        for move, cell in BLANK_MOVES[blank]:
+            numbers[blank] = numbers[cell]
+            numbers[cell] = 0
+
+            succ.append((rankPermutation(numbers), move, 1))
+
+            numbers[cell] = numbers[blank]
+            numbers[blank] = 0
+
+        return succ
+
+    def getNumbers(self, state):
+        return unrankPermutation(state)
+
+    def getPuzzle(self, state):
+        """
+        Get the `EightPuzzleState` for a state (e.g. for display).
+        """
+
+        return EightPuzzleState(unrankPermutation(state))
+
+def rankPermutation(numbers):
+    """
+    Get the lexicographic rank of a permutation of [0, len(numbers)),
+    i.e. its position in the sorted list of all the permutations of those numbers.
+    Every eight puzzle gets a distinct int in [0, 9!),
+    and the goal puzzle (which is sorted) is rank 0.
+
+    >>> rankPermutation([0, 1, 2, 3, 4, 5, 6, 7, 8])
+    0
+
+    >>> rankPermutation([8, 7, 6, 5, 4, 3, 2, 1, 0])
+    362879
+    """
+
+    size = len(numbers)
+    rank = 0
+
+    for i in range(size - 1):
+        number = numbers[i]
+
+        # The number of later (so unused so far) numbers that are smaller than this one.
+        smaller = 0
+        for j in range(i + 1, size):
+            if (numbers[j] < number):
+                smaller += 1
+
+        rank += smaller * FACTORIALS[size - 1 - i]
+
+    return rank
+
+def unrankPermutation(rank, size = NUM_CELLS):
+    """
+    Get the permutation of [0, size) with the given rank (the inverse of `rankPermutation`).
+
+    >>> unrankPermutation(1)
+    [0, 1, 2, 3, 4, 5, 6, 8, 7]
+    """
+
+    if (rank < 0 or rank >= FACTORIALS[size]):
+        raise ValueError('Rank out of range for a permutation of size %d: %d.' % (size, rank))
+
+    unused = list(range(size))
+    numbers = []
+
+    for i in range(size - 1, -1, -1):
+        index, rank = divmod(rank, FACTORIALS[i])
+        numbers.append(unused.pop(index))
+
+    return numbers
+
+class PatternDatabase(object):
+    """
+    The exact number of moves needed to bring a subset of the tiles (the pattern) home,
+    for every placement of those tiles and the blank.
+    Only moves of the pattern's own tiles are counted,
+    so the costs from databases with no tiles in common can be added together
+    and still never overestimate the true solution length
+    (see `patternDatabaseHeuristic`).
+
+    The blank is part of the placement (instead of taking the best cost over every blank cell)
+    so that the sum stays consistent:
+    a single move never changes it by more than one,
+    which the searches that never reopen a state rely on to find the shortest solution.
+    """
+
+    def __init__(self, tiles, costs = None):
+        """
+        Costs are the raw table (as built by a previous database for the same tiles).
+        If not given, the table is built (with a breadth first search out of the goal).
+        """
+
+        tiles = tuple(tiles)
+
+        if (len(tiles) == 0 or len(set(tiles)) != len(tiles)
+                or any(tile <= 0 or tile >= NUM_CELLS for tile in tiles)):
+            raise ValueError('A pattern must be distinct, non-blank tiles: %s.' % (str(tiles)))
+
+        self.tiles = tiles
+
+        # Each tile's cell (and then the blank's cell) is a base NUM_CELLS digit
+        # of the placement's index.
+        self._weights = [NUM_CELLS ** i for i in range(len(tiles) + 1)]
+
+        if (costs is None):
+            costs = self._build()
+
+        if (len(costs) != getPatternDatabaseSize(len(tiles))):
+            raise ValueError('Pattern database has the wrong size for %d tiles: %d.' %
+                    (len(tiles), len(costs)))
+
+        self._costs = costs
+
+    def getCost(self, numbers):
+        """
+        Get the number of moves of this pattern's tiles needed to solve a puzzle
+        (given as a flat list of tiles, see `EightPuzzleState.getNumbers`).
+        """
+
+        tiles = self.tiles
+        weights = self._weights
+
+        index = numbers.index(0) * weights[-1]
+        for i in range(len(tiles)):
+            index += numbers.index(tiles[i]) * weights[i]
+
+        return self._costs[index]
+
+    def toBytes(self):
+        header = _PATTERN_DATABASE_HEADER.pack(_PATTERN_DATABASE_MAGIC, len(self.tiles))
+        return header + bytes(self.tiles) + bytes(self._costs)
+
+    def _build(self):
+        # Sliding in a tile that is not in the pattern is free,
+        # so a 0-1 BFS visits placements in order of cost.
+        numTiles = len(self.tiles)
+        weights = self._weights
+
+        costs = bytearray([_UNKNOWN_COST]) * getPatternDatabaseSize(numTiles)
+
+        # Each entry is (cost, tile cells, blank cell).
+        start = (0, [tile for tile in self.tiles], 0)
+        queue = collections.deque([start])
+
+        while (len(queue) > 0):
+            cost, cells, blank = queue.popleft()
+
+            index = blank * weights[-1]
+            for i in range(numTiles):
+                index += cells[i] * weights[i]
+
+            if (costs[index] != _UNKNOWN_COST):
+                continue
+            costs[index] = cost
+
+            for move, cell in BLANK_MOVES[blank]:
+                if (cell not in cells):
+                    queue.appendleft((cost, cells, cell))
+                    continue
+
+                nextCells = cells[:]
+                nextCells[cells.index(cell)] = blank
+                queue.append((cost + 1, nextCells, cell))
+
+        return costs
+
+def getPatternDatabaseSize(numTiles):
+    """
+    Get the number of entries in a pattern database for this many tiles
+    (one for every way to place the tiles and the blank, plus some impossible placements).
+    """
+
+    return NUM_CELLS ** (numTiles + 1)
+
+def getPatternDatabases(patterns = DEFAULT_PATTERNS):
+    """
+    Get a `PatternDatabase` for each pattern (a list of tiles).
+    Databases are only built the first time they are asked for,
+    after that they come from memory or (if there is a pattern database directory) from disk.
+    """
+
+    databases = []
+
+    for tiles in patterns:
+        tiles = tuple(tiles)
+
+        database = _patternDatabases.get(tiles)
+        if (database is None):
+            path = None
+            if (_patternDatabaseDir is not None):
+                path = _getPatternDatabasePath(tiles)
+                database = loadPatternDatabase(tiles, path)
+
+            if (database is None):
+                database = PatternDatabase(tiles)
+                if (path is not None):
+                    savePatternDatabase(database, path)
+
+            _patternDatabases[tiles] = database
+
+        databases.append(database)
+
+    return databases
+
+def getPatternDatabaseDir():
+    return _patternDatabaseDir
+
+def setPatternDatabaseDir(path):
+    """
+    Set the directory that pattern databases are persisted to.
+    Pass None to stop using the disk.
+    The default comes from the PACAI_PATTERN_DATABASE_DIR environment variable.
+    """
+
+    global _patternDatabaseDir
+    _patternDatabaseDir = path
+
+def clearPatternDatabases():
+    """
+    Forget all the pattern databases built so far (in memory, files on disk are left alone).
+    """
+
+    _patternDatabases.clear()
+
+def loadPatternDatabase(tiles, path):
+    """
+    Read a pattern database written by `savePatternDatabase`.
+    Returns None if the file does not exist or is not a database for these tiles.
+    """
+
+    if (not os.path.isfile(path)):
+        return None
+
+    try:
+        with open(path, 'rb') as file:
+            data = file.read()
+    except OSError as ex:
+        logging.warning("Unable to read pattern database '%s': %s." % (path, str(ex)))
+        return None
+
+    tiles = tuple(tiles)
+    headerSize = _PATTERN_DATABASE_HEADER.size
+    costsStart = headerSize + len(tiles)
+
+    if (len(data) != costsStart + getPatternDatabaseSize(len(tiles))):
+        logging.warning("Ignoring truncated pattern database: '%s'." % (path))
+        return None
+
+    magic, numTiles = _PATTERN_DATABASE_HEADER.unpack(data[:headerSize])
+    if (magic != _PATTERN_DATABASE_MAGIC or tuple(data[headerSize:costsStart]) != tiles):
+        logging.warning("Ignoring incompatible pattern database: '%s'." % (path))
+        return None
+
+    return PatternDatabase(tiles, bytearray(data[costsStart:]))
+
+def savePatternDatabase(database, path):
+    """
+    Write a pattern database to disk for `loadPatternDatabase`.
+    The file is written to the side and then moved into place,
+    so concurrent readers never see a partial database.
+    """
+
+    directory = os.path.dirname(os.path.abspath(path))
+
+    try:
+        os.makedirs(directory, exist_ok = True)
+
+        handle, tempPath = tempfile.mkstemp(dir = directory, suffix = '.tmp')
+        with os.fdopen(handle, 'wb') as file:
+            file.write(database.toBytes())
+
+        os.replace(tempPath, path)
+    except OSError as ex:
+        logging.warning("Unable to save pattern database '%s': %s." % (path, str(ex)))
+
+def _getPatternDatabasePath(tiles):
+    name = 'eightpuzzle-' + '-'.join([str(tile) for tile in tiles])
+    return os.path.join(_patternDatabaseDir, name + PATTERN_DATABASE_FILE_EXTENSION)
+
+def manhattanHeuristic(state, problem):
+    """
+    The sum of the manhattan distances of every tile from its goal cell.
+    Works with both `EightPuzzleSearchProblem` and `CompactEightPuzzleSearchProblem`.
+    """
+
+    numbers = problem.getNumbers(state)
+
+    distance = 0
+    for cell in range(NUM_CELLS):
+        tile = numbers[cell]
+        if (tile != 0):
+            distance += abs(cell // 3 - tile // 3) + abs(cell % 3 - tile % 3)
+
+    return distance
+
+def patternDatabaseHeuristic(state, problem):
+    """
+    The sum of the costs from the default (disjoint) pattern databases.
+    This is never less than `manhattanHeuristic`, and is usually much more.
+    Works with both `EightPuzzleSearchProblem` and `CompactEightPuzzleSearchProblem`.
+    """
+
+    numbers = problem.getNumbers(state)
+    return sum([database.getCost(numbers) for database in getPatternDatabases()])
+
 EIGHT_PUZZLE_DATA = [
     [1, 0, 2, 3, 4, 5, 6, 7, 8],
     [1, 7, 8, 2, 3, 4, 5, 6, 0],
@@ -267,19 +705,198 @@ def createRandomEightPuzzle(moves = 100):
         puzzle = puzzle.result(random.sample(puzzle.legalMoves(), 1)[0])
     return puzzle
 
-def main():
+HEURISTICS = {
+    'manhattan': manhattanHeuristic,
+    'null': heuristics.null,
+    'pdb': patternDatabaseHeuristic,
+}
+
+def solveBatch(puzzles, searchFunction, heuristic = None, compact = True):
+    """
+    Solve every puzzle with a search function (from `pacai.core.search.search`),
+    passing it the heuristic if one is given.
+    Puzzles are searched as `CompactEightPuzzleSearchProblem`s if compact is set,
+    and as `EightPuzzleSearchProblem`s otherwise.
+
+    Returns a dict of statistics about the whole batch:
+    the number of puzzles, the total and longest solution lengths,
+    the total number of nodes expanded, and the time taken (in seconds).
+    """
+
+    problemClass = EightPuzzleSearchProblem
+    if (compact):
+        problemClass = CompactEightPuzzleSearchProblem
+
+    stats = {
+        'puzzles': 0,
+        'totalMoves': 0,
+        'maxMoves': 0,
+        'expanded': 0,
+        'seconds': 0.0,
+    }
+
+    startTime = time.time()
+
+    for puzzle in puzzles:
+        problem = problemClass(puzzle)
+
+        if (heuristic is None):
+            path = searchFunction(problem)
+        else:
+            path = searchFunction(problem, heuristic)
+
+        if (path is None):
+            raise ValueError('No solution found for puzzle:\n' + str(puzzle))
+
+        stats['puzzles'] += 1
+        stats['totalMoves'] += len(path)
+        stats['maxMoves'] = max(stats['maxMoves'], len(path))
+        stats['expanded'] += problem.getExpandedCount()
+
+    stats['seconds'] = time.time() - startTime
+
+    return stats
+
+def parseOptions(argv):
+    """
+    Processes the command used to run the eight puzzle from the command line.
+    """
+
+    description = """
+    DESCRIPTION:
+        This program solves eight puzzles.
+        By default, it solves a single random puzzle and steps through the solution.
+        In batch mode, it solves many random puzzles and reports how fast the search was.
+
+    EXAMPLES:
+        (1) python -m pacai.bin.eightpuzzle
+            - Solves a random puzzle with breadth first search.
+        (2) python -m pacai.bin.eightpuzzle --batch 1000 --search astar --heuristic pdb
+            - Solves 1000 random puzzles with A* and the pattern database heuristic.
+    """
+
+    parser = argparse.ArgumentParser(description = textwrap.dedent(description),
+        prog = os.path.basename(__file__), formatter_class = argparse.RawTextHelpFormatter)
+
+    parser.add_argument('-b', '--batch', dest = 'batch',
+            action = 'store', type = int, default = 0,
+            help = 'solve this many random puzzles and report statistics (default: %(default)s)')
+
+    parser.add_argument('-d', '--debug', dest = 'debug',
+            action = 'store_true', default = False,
+            help = 'set logging level to debug (default: %(default)s)')
+
+    parser.add_argument('-m', '--moves', dest = 'moves',
+            action = 'store', type = int, default = 25,
+            help = 'number of random moves used to shuffle a puzzle (default: %(default)s)')
+
+    parser.add_argument('-q', '--quiet', dest = 'quiet',
+            action = 'store_true', default = False,
+            help = 'set logging level to warning (default: %(default)s)')
+
+    parser.add_argument('-s', '--seed', dest = 'seed',
+            action = 'store', type = int, default = None,
+            help = 'random seed used to shuffle the puzzles (default: random)')
+
+    parser.add_argument('--heuristic', dest = 'heuristic',
+            action = 'store', type = str, default = None,
+            help = 'heuristic for searches that take one: %s (default: pdb)' %
+                (', '.join(sorted(HEURISTICS))))
+
+    parser.add_argument('--object-states', dest = 'objectStates',
+            action = 'store_true', default = False,
+            help = 'search over puzzle objects instead of permutation ranks'
+                + ' (default: %(default)s)')
+
+    parser.add_argument('--pattern-database-dir', dest = 'patternDatabaseDir',
+            action = 'store', type = str, default = None,
+            help = 'keep pattern databases in this directory between runs'
+                + ' (default: $%s)' % (PATTERN_DATABASE_DIR_ENV_VAR))
+
+    parser.add_argument('--search', dest = 'search',
+            action = 'store', type = str, default = 'bfs',
+            help = 'search function from pacai.core.search.search (default: %(default)s)')
+
+    options, otherjunk = parser.parse_known_args(argv)
+
+    if len(otherjunk) != 0:
+        raise ValueError('Unrecognized options: \'%s\'.' % (str(otherjunk)))
+
+    # Set the logging level
+    if options.quiet and options.debug:
+        raise ValueError('Logging cannont be set to both debug and quiet.')
+
+    if options.quiet:
+        updateLoggingLevel(logging.WARNING)
+    elif options.debug:
+        updateLoggingLevel(logging.DEBUG)
+
+    if (options.batch < 0):
+        raise ValueError('The batch size cannot be negative: %d.' % (options.batch))
+
+    if (options.seed is not None):
+        random.seed(options.seed)
+
+    if (options.patternDatabaseDir is not None):
+        setPatternDatabaseDir(options.patternDatabaseDir)
+
+    options.searchFunction = getattr(search, options.search, None)
+    if (options.searchFunction is None):
+        raise ValueError('Unknown search function: \'%s\'.' % (options.search))
+
+    # Only pass a heuristic to searches that take one.
+    if ('heuristic' not in options.searchFunction.__code__.co_varnames):
+        if (options.heuristic is not None):
+            raise ValueError('Search function does not take a heuristic: \'%s\'.' %
+                    (options.search))
+    else:
+        if (options.heuristic is None):
+            options.heuristic = 'pdb'
+
+        if (options.heuristic not in HEURISTICS):
+            raise ValueError('Unknown heuristic: \'%s\'.' % (options.heuristic))
+
+    return options
+
+def main(argv):
     """
     Entry point for the eightpuzzle simulation.
+    The args are a blind pass of `sys.argv` with the executable stripped.
     """
 
     initLogging()
 
-    puzzle = createRandomEightPuzzle(25)
+    opts = parseOptions(argv)
+
+    heuristic = None
+    if (opts.heuristic is not None):
+        heuristic = HEURISTICS[opts.heuristic]
+
+    if (opts.batch > 0):
+        puzzles = [createRandomEightPuzzle(opts.moves) for i in range(opts.batch)]
+        stats = solveBatch(puzzles, opts.searchFunction, heuristic,
+                compact = not opts.objectStates)
+
+        seconds = max(stats['seconds'], 1e-9)
+        print('Solved %d puzzles in %.2f seconds (%.1f puzzles/second).' %
+                (stats['puzzles'], stats['seconds'], stats['puzzles'] / seconds))
+        print('Solution length: %.2f average, %d max.' %
+                (stats['totalMoves'] / stats['puzzles'], stats['maxMoves']))
+        print('Nodes expanded: %d total, %.1f per puzzle, %.0f per second.' %
+                (stats['expanded'], stats['expanded'] / stats['puzzles'],
+                stats['expanded'] / seconds))
+        return stats
+
+    puzzle = createRandomEightPuzzle(opts.moves)
     print('A random puzzle:\n' + str(puzzle))
 
     problem = EightPuzzleSearchProblem(puzzle)
-    path = search.bfs(problem)
-    print('BFS found a path of %d moves: %s' % (len(path), str(path)))
+    if (heuristic is None):
+        path = opts.searchFunction(problem)
+    else:
+        path = opts.searchFunction(problem, heuristic)
+
+    print('%s found a path of %d moves: %s' % (opts.search, len(path), str(path)))
     curr = puzzle
     i = 1
     for a in path:
@@ -290,4 +907,4 @@ def main():
         i += 1
 
 if __name__ == '__main__':
-    main()
+    main(sys.argv[1:])
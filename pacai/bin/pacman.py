@@ -61,6 +61,7 @@ class PacmanGameState(AbstractGameState):
 
         successor = self._initSuccessor()
         successor._applySuccessorAction(agentIndex, action)
+        successor._updateAgentHashes(self._agentStates)
 
         return successor
 
@@ -142,8 +143,6 @@ class PacmanGameState(AbstractGameState):
         # Book keeping.
         self._lastAgentMoved = agentIndex
 
-        self._hash = None
-
 class ClassicGameRules(object):
     """
     These game rules manage the control flow of a game, deciding when
@@ -1,4 +1,8 @@
 from pacai.core.directions import Directions
+from pacai.core.grid import GridCache
+
+# Legal action tables for the walls grids they were built from.
+_legalActionTables = GridCache(lambda walls: LegalActionTable(walls))
 
 class Actions:
     """
@@ -51,6 +55,14 @@ class Actions:
         dx, dy = Actions._directions[direction]
         return (dx * speed, dy * speed)
 
+    @staticmethod
+    def getLegalActionTable(walls):
+        """
+        Get the `LegalActionTable` for a walls grid (see `pacai.core.grid.GridCache`).
+        """
+
+        return _legalActionTables.get(walls)
+
     @staticmethod
     def getPossibleActions(position, direction, walls):
         x, y = position
@@ -60,6 +72,11 @@ class Actions:
         if (abs(x - x_int) + abs(y - y_int) > Actions.TOLERANCE):
             return [direction]
 
+        possible = Actions.getLegalActionTable(walls).getPossibleActions(x_int, y_int)
+        if (possible is not None):
+            return list(possible)
+
+        # Not an open cell on the board, check the walls directly.
         possible = []
         for dir, vec in Actions._directionsAsList:
             dx, dy = vec
@@ -76,6 +93,11 @@ class Actions:
         x, y = position
         x_int, y_int = int(x + 0.5), int(y + 0.5)
 
+        neighbors = Actions.getLegalActionTable(walls).getLegalNeighbors(x_int, y_int)
+        if (neighbors is not None):
+            return list(neighbors)
+
+        # Not an open cell on the board, check the walls directly.
         neighbors = []
         for dir, vec in Actions._directionsAsList:
             dx, dy = vec
@@ -97,3 +119,88 @@ class Actions:
         dx, dy = Actions.directionToVector(action)
         x, y = position
         return (x + dx, y + dy)
+
+class LegalActionTable(object):
+    """
+    The legal actions and neighbors of every open (non-wall) cell of a walls grid,
+    computed once up front.
+    Cells are indexed the same way as in `pacai.core.grid.Grid`.
+
+    Lookups return None for cells that are not open (walls and positions off the board),
+    callers should fall back to checking the walls directly.
+    """
+
+    def __init__(self, walls):
+        self._width = walls.getWidth()
+        self._height = walls.getHeight()
+
+        numCells = self._width * self._height
+
+        # Legal actions (including STOP), in the same order as `Actions.getPossibleActions`.
+        self._possibleActions = [None] * numCells
+
+        # Reachable cells (including the cell itself), as in `Actions.getLegalNeighbors`.
+        self._neighbors = [None] * numCells
+
+        # (action, next position) pairs for moving actions, in `Directions.CARDINAL` order.
+        self._moves = [None] * numCells
+
+        for (x, y) in walls.asList(False):
+            possible = []
+            neighbors = []
+
+            for direction, (dx, dy) in Actions._directionsAsList:
+                nextX = x + dx
+                nextY = y + dy
+
+                if (self._isOpen(walls, nextX, nextY)):
+                    possible.append(direction)
+                    neighbors.append((nextX, nextY))
+
+            moves = []
+            for direction in Directions.CARDINAL:
+                dx, dy = Actions._directions[direction]
+                nextX = x + dx
+                nextY = y + dy
+
+                if (self._isOpen(walls, nextX, nextY)):
+                    moves.append((direction, (nextX, nextY)))
+
+            index = x * self._height + y
+            self._possibleActions[index] = tuple(possible)
+            self._neighbors[index] = tuple(neighbors)
+            self._moves[index] = tuple(moves)
+
+    def getLegalNeighbors(self, x, y):
+        """
+        Get a tuple of the positions reachable from (x, y) in one step (including (x, y) itself).
+        """
+
+        return self._lookup(self._neighbors, x, y)
+
+    def getMoves(self, x, y):
+        """
+        Get a tuple of (action, (nextX, nextY)) for each action that moves out of (x, y),
+        in `pacai.core.directions.Directions.CARDINAL` order.
+        """
+
+        return self._lookup(self._moves, x, y)
+
+    def getPossibleActions(self, x, y):
+        """
+        Get a tuple of the legal actions (including STOP) from (x, y).
+        """
+
+        return self._lookup(self._possibleActions, x, y)
+
+    def _isOpen(self, walls, x, y):
+        if (x < 0 or x >= self._width or y < 0 or y >= self._height):
+            return False
+
+        return not walls[x][y]
+
+    def _lookup(self, values, x, y):
+        if (x < 0 or x >= self._width or y < 0 or y >= self._height):
+            return None
+
+        return values[x * self._height + y]
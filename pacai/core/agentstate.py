@@ -48,6 +48,15 @@ class AgentState:
     def getScaredTimer(self):
         return self._scaredTimer
 
+    def getSnapshot(self):
+        """
+        Get a compact, immutable copy of the fields that can change during a game
+        (and that are used for equality).
+        See `AgentState.restoreSnapshot`.
+        """
+
+        return (self._position, self._direction, self._isPacman, self._scaredTimer)
+
     def isBraveGhost(self):
         """
         A ghost that is not scared.
@@ -67,6 +76,13 @@ class AgentState:
     def isScaredGhost(self):
         return (self.isGhost() and self.isScared())
 
+    def restoreSnapshot(self, snapshot):
+        """
+        Put this agent back into a state captured by `AgentState.getSnapshot`.
+        """
+
+        (self._position, self._direction, self._isPacman, self._scaredTimer) = snapshot
+
     def setIsPacman(self, isPacman):
         self._isPacman = isPacman
 
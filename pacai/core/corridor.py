@@ -0,0 +1,122 @@
+"""
+Maze compression.
+
+Most mazes are long corridors joined by a few intersections.
+A `CorridorGraph` keeps only the cells where something can happen
+(intersections, dead ends, and any other positions that matter to a caller)
+and joins them with weighted edges that remember the corridor's cells and actions.
+"""
+
+from pacai.core.actions import Actions
+from pacai.core.grid import GridCache
+
+# Corridor graphs (with no extra key positions) for the walls grids they were built from.
+_corridorGraphs = GridCache(lambda walls: CorridorGraph(walls))
+
+class CorridorEdge(object):
+    """
+    A corridor from one vertex of a `CorridorGraph` to another.
+    """
+
+    __slots__ = ('source', 'target', 'actions', 'cells')
+
+    def __init__(self, source, target, actions, cells):
+        self.source = source
+        self.target = target
+
+        # The action for each step.
+        self.actions = actions
+
+        # The cell reached by each step (the last one is the target).
+        self.cells = cells
+
+    def getCost(self):
+        """
+        The number of steps along this corridor.
+        """
+
+        return len(self.actions)
+
+    def __repr__(self):
+        return 'CorridorEdge(%s -> %s, %d)' % (str(self.source), str(self.target),
+                len(self.actions))
+
+class CorridorGraph(object):
+    """
+    The open cells of a walls grid with every corridor collapsed into a single edge.
+
+    The vertices are all the open cells that do not have exactly two open neighbors
+    (intersections and dead ends), plus any key positions the caller asks for
+    (e.g. a search's start, goal, or food).
+    Every other cell is in the middle of a corridor and is only reachable along an edge.
+    (Loops of corridor cells with no vertex on them cannot be reached from any vertex
+    and are left out.)
+    """
+
+    def __init__(self, walls, keyPositions = ()):
+        table = Actions.getLegalActionTable(walls)
+
+        vertices = set()
+        for (x, y) in walls.asList(False):
+            if (len(table.getMoves(x, y)) != 2):
+                vertices.add((x, y))
+
+        for (x, y) in keyPositions:
+            if (table.getMoves(x, y) is not None):
+                vertices.add((x, y))
+
+        self._vertices = sorted(vertices)
+
+        # Vertex to the edges that leave it.
+        self._edges = {}
+        for vertex in self._vertices:
+            self._edges[vertex] = self._followCorridors(table, vertex, vertices)
+
+    def getEdges(self, vertex):
+        """
+        Get the edges leaving a vertex, or None if the position is not a vertex.
+        """
+
+        return self._edges.get(vertex)
+
+    def getNumEdges(self):
+        return sum(len(edges) for edges in self._edges.values())
+
+    def getVertices(self):
+        return self._vertices
+
+    def isVertex(self, position):
+        return position in self._edges
+
+    def _followCorridors(self, table, vertex, vertices):
+        edges = []
+
+        for action, position in table.getMoves(*vertex):
+            actions = [action]
+            cells = [position]
+            previous = vertex
+
+            while (position not in vertices):
+                # Corridor cells have exactly two ways out, take the one we did not come in from.
+                for nextAction, nextPosition in table.getMoves(*position):
+                    if (nextPosition != previous):
+                        break
+
+                previous = position
+                position = nextPosition
+
+                actions.append(nextAction)
+                cells.append(nextPosition)
+
+            if (position != vertex):
+                edges.append(CorridorEdge(vertex, position, tuple(actions), tuple(cells)))
+
+        return edges
+
+def getCorridorGraph(walls):
+    """
+    Get the `CorridorGraph` (with no extra key positions) for a walls grid
+    (see `pacai.core.grid.GridCache`).
+    """
+
+    return _corridorGraphs.get(walls)
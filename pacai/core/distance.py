@@ -1,5 +1,13 @@
-from pacai.core.search.position import PositionSearchProblem
-from pacai.student import search
+import collections
+
+from pacai.core.actions import Actions
+from pacai.core.grid import GridCache
+
+# The maximum number of BFS rows (one per source position) to keep for each walls grid.
+MAX_CACHED_ROWS = 128
+
+# Maze distance caches for the walls grids they were built from.
+_mazeCaches = GridCache(lambda walls: MazeDistanceCache(walls))
 
 def manhattan(position1, position2):
     """
@@ -17,10 +25,10 @@ def euclidean(position1, position2):
 
 def maze(position1, position2, gameState):
     """
-    Returns the maze distance between any two positions,
-    using the search functions you have already built.
+    Returns the maze distance between any two positions.
 
-    WARNING: `pacai.student.search.breadthFirstSearch` must already be implemted.
+    Distances come from a `MazeDistanceCache` shared by everything on the same walls,
+    so repeated queries from the same position are just lookups.
 
     Example usage: `distance.maze((2, 4), (5, 6), gameState)`.
     """
@@ -36,6 +44,84 @@ def maze(position1, position2, gameState):
     if (walls[x2][y2]):
         raise ValueError('Position2 is a wall: ' + str(position2))
 
-    prob = PositionSearchProblem(gameState, start = position1, goal = position2)
+    distance = getMazeDistanceCache(walls).getDistance(position1, position2)
+    if (distance is None):
+        raise ValueError('No path between positions: ' + str((position1, position2)))
+
+    return distance
+
+def getMazeDistanceCache(walls):
+    """
+    Get the `MazeDistanceCache` for a walls grid (see `pacai.core.grid.GridCache`).
+    """
+
+    return _mazeCaches.get(walls)
+
+class MazeDistanceCache(object):
+    """
+    Single-source BFS rows for a walls grid, kept in least recently used order.
+    A row is only expanded as far as it has needed to go to answer the queries made of it.
+    """
+
+    def __init__(self, walls, maxRows = MAX_CACHED_ROWS):
+        self._actionTable = Actions.getLegalActionTable(walls)
+        self._maxRows = maxRows
+
+        # Source position to _BFSRow, ordered from least to most recently used.
+        self._rows = collections.OrderedDict()
+
+    def getDistance(self, position1, position2):
+        """
+        Get the maze distance between two open (integer) positions,
+        or None if there is no path between them.
+        """
+
+        position1 = (int(position1[0]), int(position1[1]))
+        position2 = (int(position2[0]), int(position2[1]))
+
+        # Distances are symmetric, so reuse a row for the second position if there is one.
+        if (position1 not in self._rows and position2 in self._rows):
+            position1, position2 = position2, position1
+
+        return self._getRow(position1).getDistance(position2)
+
+    def _getRow(self, source):
+        row = self._rows.get(source)
+        if (row is not None):
+            self._rows.move_to_end(source)
+            return row
+
+        row = _BFSRow(self._actionTable, source)
+        self._rows[source] = row
+
+        while (len(self._rows) > self._maxRows):
+            self._rows.popitem(last = False)
+
+        return row
+
+class _BFSRow(object):
+    """
+    A BFS out of a single source that can be paused and resumed.
+    """
+
+    def __init__(self, actionTable, source):
+        self._actionTable = actionTable
+        self._distances = {source: 0}
+        self._queue = [source]
+        self._head = 0
+
+    def getDistance(self, target):
+        distances = self._distances
+        queue = self._queue
+
+        while (target not in distances and self._head < len(queue)):
+            position = queue[self._head]
+            self._head += 1
+
+            nextDistance = distances[position] + 1
+            for action, nextPosition in (self._actionTable.getMoves(*position) or ()):
+                if (nextPosition not in distances):
+                    distances[nextPosition] = nextDistance
+                    queue.append(nextPosition)
 
-    return len(search.breadthFirstSearch(prob))
+        return distances.get(target)
@@ -1,10 +1,30 @@
+import array
+import collections
+import hashlib
+import logging
+import mmap
+import os
+import struct
 import sys
+import tempfile
+import threading
 
 from pacai.core.distance import manhattan
-from pacai.util import priorityQueue
 
 DEFAULT_DISTANCE = 10000
 
+# The maximum number of layouts (distinct sets of walls) to keep distances for.
+MAX_CACHED_LAYOUTS = 8
+
+# If set, distance tables are also saved to (and memory mapped from) this directory,
+# so they can be reused across processes.
+CACHE_DIR_ENV_VAR = 'PACAI_DISTANCE_CACHE_DIR'
+CACHE_FILE_EXTENSION = '.dist'
+
+# magic, width, height, number of cells, typecode, byte order, (padding).
+_CACHE_FILE_MAGIC = b'PACDIST1'
+_CACHE_FILE_HEADER = struct.Struct('<8sIII1s1sxx')
+
 class Distancer(object):
     """
     A class for computing and caching the shortest path between any two points in a given maze.
@@ -20,8 +40,27 @@ class Distancer(object):
         self._distances = None
         self.dc = DistanceCalculator(layout, self)
 
-    def getMazeDistances(self):
-        self.dc.run()
+    def getMazeDistanceProgress(self):
+        """
+        Get the fraction (between 0 and 1) of the maze distances that are ready.
+        """
+
+        if (self._distances is None):
+            return 0.0
+
+        return self._distances.getProgress()
+
+    def getMazeDistances(self, background = False):
+        """
+        Compute (or fetch) the maze distances.
+
+        With background set, the distances are computed in a worker thread and this returns
+        immediately.
+        Until they are ready, queries use what has been computed so far
+        and fall back to manhattan distance for everything else.
+        """
+
+        self.dc.run(background)
 
     def getDistance(self, pos1, pos2):
         """
@@ -47,15 +86,111 @@ class Distancer(object):
 
         return bestDistance
 
+    def getDistancesFrom(self, pos, targets):
+        """
+        Get the maze distance from pos to each of the targets, in the same order as the targets.
+        This gives the same answers as calling `Distancer.getDistance` for each target,
+        but only reads a single row of the distance table.
+        If the distances are not ready yet, a single BFS out of pos is used instead.
+        """
+
+        targets = list(targets)
+        if (len(targets) == 0):
+            return []
+
+        # The common case: everything is on the grid and the table is ready.
+        if (self._distances is not None and isInt(pos)):
+            distances = self._distances.getDistancesFrom(pos, targets)
+            if (distances is not None and None not in distances):
+                return distances
+
+        sources = getGrids2D(pos)
+        targetGrids = [getGrids2D(target) for target in targets]
+        targetSnaps = [snap for grids in targetGrids for (snap, snapDistance) in grids]
+
+        # The distances to every target snap, from every source snap.
+        rows = []
+        for sourceSnap, sourceDistance in sources:
+            row = None
+            if (self._distances is not None):
+                row = self._distances.getDistancesFrom(sourceSnap, targetSnaps)
+
+            if (row is None):
+                row = _searchDistancesFrom(self.dc.layout, sourceSnap, targetSnaps)
+
+            rows.append((row, sourceDistance))
+
+        distances = []
+        index = 0
+        for target, grids in zip(targets, targetGrids):
+            bestDistance = None
+
+            for snap, snapDistance in grids:
+                for row, sourceDistance in rows:
+                    gridDistance = row[index]
+                    if (gridDistance is None):
+                        raise Exception("Position not in grid: " + str((pos, target)))
+
+                    distance = gridDistance + sourceDistance + snapDistance
+                    if (bestDistance is None or distance < bestDistance):
+                        bestDistance = distance
+
+                index += 1
+
+            distances.append(bestDistance)
+
+        return distances
+
+    def nearest(self, pos, targets):
+        """
+        Get the target closest to pos (by maze distance) as a (target, distance) tuple.
+        Ties go to the earliest target.
+        Returns None if there are no targets.
+
+        If the distances are not ready yet, a single BFS out of all the targets is used instead.
+        """
+
+        targets = list(targets)
+        if (len(targets) == 0):
+            return None
+
+        if (self.isReadyForMazeDistance()):
+            distances = self.getDistancesFrom(pos, targets)
+
+            bestIndex = min(range(len(distances)), key = distances.__getitem__)
+
+            return targets[bestIndex], distances[bestIndex]
+
+        result = _searchNearest(self.dc.layout, pos, targets)
+        if (result is None):
+            raise Exception("Position not in grid: " + str((pos, targets)))
+
+        return result
+
     def getDistanceOnGrid(self, pos1, pos2):
-        key = (pos1, pos2)
-        if key in self._distances:
-            return self._distances[key]
+        distance = self._distances.getDistance(pos1, pos2)
+        if (distance is not None):
+            return distance
+
+        # These distances are still being computed.
+        if (not self._distances.isComplete()):
+            return manhattan(pos1, pos2)
 
-        raise Exception("Position not in grid: " + str(key))
+        raise Exception("Position not in grid: " + str((pos1, pos2)))
 
     def isReadyForMazeDistance(self):
-        return (self._distances is not None)
+        return (self._distances is not None and self._distances.isComplete())
+
+    def waitForMazeDistances(self, timeout = None):
+        """
+        Block until the maze distances are ready, or the timeout (in seconds) runs out.
+        Returns True if the distances are ready.
+        """
+
+        if (self._distances is None):
+            return False
+
+        return self._distances.wait(timeout)
 
 def isInt(pos):
     x, y = pos
@@ -78,79 +213,598 @@ def getGrids1D(x):
 # MACHINERY FOR COMPUTING MAZE DISTANCES #
 ##########################################
 
-distanceMap = {}
+# Distances shared by every Distancer (and every game) in this process.
+# Keyed by the fingerprint of the walls, ordered from least to most recently used.
+_distanceCache = collections.OrderedDict()
+
+_cacheLock = threading.Lock()
+
+_cacheDir = os.environ.get(CACHE_DIR_ENV_VAR) or None
 
 class DistanceCalculator:
     def __init__(self, layout, distancer):
         self.layout = layout
         self.distancer = distancer
-        self.cache = {}
 
-    def run(self):
-        if self.layout.walls not in self.cache:
-            self.cache[self.layout.walls] = computeDistances(self.layout)
+    def run(self, background = False):
+        self.distancer._distances = getDistances(self.layout, background)
+
+def getWallsFingerprint(walls):
+    """
+    Get a stable identifier for a set of walls.
+    Layouts with the same walls have the same maze distances,
+    no matter where their food or agents are.
+    """
+
+    width = walls.getWidth()
+    height = walls.getHeight()
+    bits = walls.getBits()
 
-        self.distancer._distances = self.cache[self.layout.walls]
+    digest = hashlib.sha1()
+    digest.update(('%d,%d,' % (width, height)).encode())
+    digest.update(bits.to_bytes((width * height + 7) // 8, 'little'))
 
-def computeDistances(layout):
+    return digest.hexdigest()
+
+def getDistances(layout, background = False):
+    """
+    Get the all pairs maze distances for a layout,
+    computing them only if no layout with the same walls has been seen recently.
+
+    If background is set and the distances need computing,
+    they are computed in a worker thread and the returned `DistanceMatrix` fills in over time
+    (see `DistanceMatrix.isComplete`).
+    Otherwise, this only returns once the distances are complete.
+    """
+
+    key = getWallsFingerprint(layout.walls)
+    savePath = None
+    compute = False
+
+    with _cacheLock:
+        distances = _distanceCache.get(key)
+
+        if (distances is not None):
+            _distanceCache.move_to_end(key)
+        else:
+            if (_cacheDir is not None):
+                savePath = _getCachePath(key)
+                distances = loadDistances(layout, savePath)
+
+            if (distances is None):
+                # Publish the empty table right away,
+                # so anyone else asking for these walls waits on this computation.
+                distances = _createDistanceMatrix(layout.walls)
+                compute = True
+
+            _distanceCache[key] = distances
+            while (len(_distanceCache) > MAX_CACHED_LAYOUTS):
+                _distanceCache.popitem(last = False)
+
+    if (compute):
+        if (background):
+            thread = threading.Thread(target = _fillDistances,
+                    args = (distances, layout.walls, savePath, key),
+                    name = 'pacai-distances', daemon = True)
+            thread.start()
+        else:
+            _fillDistances(distances, layout.walls, savePath, key)
+
+    if (not background):
+        distances.wait()
+
+    return distances
+
+def clearCache():
+    """
+    Forget all the distances computed so far (in memory, files on disk are left alone).
+    """
+
+    with _cacheLock:
+        _distanceCache.clear()
+
+def getCacheDir():
+    return _cacheDir
+
+def setCacheDir(path):
+    """
+    Set the directory that distance tables are persisted to.
+    Pass None to stop using the disk.
+    The default comes from the PACAI_DISTANCE_CACHE_DIR environment variable.
+    """
+
+    global _cacheDir
+    _cacheDir = path
+
+def loadDistances(layout, path):
+    """
+    Memory map a distance table written by `saveDistances`.
+    The mapping is read-only, so all the processes that load the same file share its pages.
+    Returns None if the file does not exist or does not match the layout.
+    """
+
+    if (not os.path.isfile(path)):
+        return None
+
+    width, height, cellIds, positions = _indexCells(layout.walls)
+
+    try:
+        with open(path, 'rb') as file:
+            data = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+    except (OSError, ValueError) as ex:
+        logging.warning("Unable to map distance table '%s': %s." % (path, str(ex)))
+        return None
+
+    view = memoryview(data)
+    headerSize = _CACHE_FILE_HEADER.size
+
+    if (len(view) < headerSize):
+        logging.warning("Ignoring truncated distance table: '%s'." % (path))
+        return None
+
+    magic, fileWidth, fileHeight, numCells, typecode, byteorder = (
+            _CACHE_FILE_HEADER.unpack(view[:headerSize]))
+    typecode = typecode.decode()
+
+    if (magic != _CACHE_FILE_MAGIC
+            or (fileWidth, fileHeight, numCells) != (width, height, len(positions))
+            or byteorder.decode() != sys.byteorder[0]
+            or typecode not in ('H', 'I')):
+        logging.warning("Ignoring incompatible distance table: '%s'." % (path))
+        return None
+
+    itemSize = array.array(typecode).itemsize
+    if (len(view) != headerSize + numCells * numCells * itemSize):
+        logging.warning("Ignoring truncated distance table: '%s'." % (path))
+        return None
+
+    distances = view[headerSize:].cast(typecode)
+    unreachable = (1 << (8 * itemSize)) - 1
+
+    return DistanceMatrix(width, height, cellIds, positions, distances, unreachable)
+
+def saveDistances(distances, path):
+    """
+    Write a distance table to disk for `loadDistances`.
+    The file is written to the side and then moved into place,
+    so concurrent readers never see a partial table.
+    """
+
+    directory = os.path.dirname(os.path.abspath(path))
+
+    try:
+        os.makedirs(directory, exist_ok = True)
+
+        handle, tempPath = tempfile.mkstemp(dir = directory, suffix = '.tmp')
+        with os.fdopen(handle, 'wb') as file:
+            file.write(distances.toBytes())
+
+        os.replace(tempPath, path)
+    except OSError as ex:
+        logging.warning("Unable to save distance table '%s': %s." % (path, str(ex)))
+
+def _getCachePath(key):
+    return os.path.join(_cacheDir, key + CACHE_FILE_EXTENSION)
+
+def _indexCells(walls):
+    """
+    Give every open cell an id.
+    Returns the dimensions, the grid index to cell id lookup, and the cell positions by id.
     """
-    Runs UCS to all other positions from each position.
+
+    width = walls.getWidth()
+    height = walls.getHeight()
+
+    positions = walls.asList(False)
+
+    cellIds = array.array('i', [-1]) * (width * height)
+    for cellId in range(len(positions)):
+        x, y = positions[cellId]
+        cellIds[x * height + y] = cellId
+
+    return width, height, cellIds, positions
+
+class DistanceMatrix(object):
     """
+    All pairs maze distances between the open cells of a layout.
+
+    Every open cell gets a small integer id,
+    and the distances are stored in a single flat array indexed by
+    `sourceId * numCells + targetId`.
+
+    A matrix may be filled in one source row at a time (see `getDistances`).
+    Until it is complete, only pairs where one end has a finished row are known.
+    """
+
+    def __init__(self, width, height, cellIds, positions, distances, unreachable,
+            numCompleteRows = None):
+        self.width = width
+        self.height = height
+
+        # Grid index (x * height + y) to cell id (-1 for walls).
+        self._cellIds = cellIds
+
+        # Cell id to position.
+        self._positions = positions
+
+        self._numCells = len(positions)
+        self._distances = distances
+
+        # The value stored for pairs of cells that cannot reach each other.
+        self._unreachable = unreachable
 
-    distances = {}
-    allNodes = layout.walls.asList(False)
+        # Rows are filled in order, so every source id below this is done.
+        if (numCompleteRows is None):
+            numCompleteRows = self._numCells
 
-    for source in allNodes:
-        dist = {}
-        closed = {}
+        self._numCompleteRows = numCompleteRows
+        self._complete = threading.Event()
 
-        for node in allNodes:
-            dist[node] = sys.maxsize
+        # Set if filling in the rows went wrong (the matrix will never be complete).
+        self._failed = False
 
-        queue = priorityQueue.PriorityQueue()
-        queue.push(source, 0)
-        dist[source] = 0
+        if (numCompleteRows >= self._numCells):
+            self._complete.set()
 
-        while not queue.isEmpty():
-            node = queue.pop()
-            if node in closed:
+    def getCellId(self, position):
+        """
+        Get the id of the open cell at the given integer position, or None.
+        """
+
+        x = int(position[0])
+        y = int(position[1])
+
+        if (x < 0 or x >= self.width or y < 0 or y >= self.height):
+            return None
+
+        cellId = self._cellIds[x * self.height + y]
+        if (cellId < 0):
+            return None
+
+        return cellId
+
+    def getDistance(self, pos1, pos2):
+        """
+        Get the maze distance between two integer positions,
+        or None if either of them is not an open cell.
+        Positions that cannot reach each other are sys.maxsize apart.
+        """
+
+        id1 = self.getCellId(pos1)
+        id2 = self.getCellId(pos2)
+
+        if (id1 is None or id2 is None):
+            return None
+
+        # Distances are symmetric, so either end's row will do.
+        if (id1 < self._numCompleteRows):
+            distance = self._distances[id1 * self._numCells + id2]
+        elif (id2 < self._numCompleteRows):
+            distance = self._distances[id2 * self._numCells + id1]
+        else:
+            return None
+
+        if (distance == self._unreachable):
+            return sys.maxsize
+
+        return distance
+
+    def getDistancesFrom(self, position, targets):
+        """
+        Get the maze distance from an integer position to many integer positions
+        while only reading a single row of the matrix.
+        Targets that are not open cells (or are between cells) get None.
+        Returns None if position is not an open cell or its row is not complete.
+        """
+
+        source = self.getCellId(position)
+        if (source is None or source >= self._numCompleteRows):
+            return None
+
+        width = self.width
+        height = self.height
+        cellIds = self._cellIds
+        unreachable = self._unreachable
+
+        offset = source * self._numCells
+        row = self._distances[offset:offset + self._numCells]
+
+        distances = []
+        for (x, y) in targets:
+            cellX = int(x)
+            cellY = int(y)
+
+            cellId = -1
+            if (cellX == x and cellY == y and 0 <= cellX < width and 0 <= cellY < height):
+                cellId = cellIds[cellX * height + cellY]
+
+            if (cellId < 0):
+                distances.append(None)
                 continue
 
-            closed[node] = True
-            nodeDist = dist[node]
-            adjacent = []
-            x, y = node
+            distance = row[cellId]
+            if (distance == unreachable):
+                distance = sys.maxsize
 
-            if not layout.isWall((x, y + 1)):
-                adjacent.append((x, y + 1))
+            distances.append(distance)
 
-            if not layout.isWall((x, y - 1)):
-                adjacent.append((x, y - 1))
+        return distances
 
-            if not layout.isWall((x + 1, y)):
-                adjacent.append((x + 1, y))
+    def getNumCells(self):
+        return self._numCells
 
-            if not layout.isWall((x - 1, y)):
-                adjacent.append((x - 1, y))
+    def getProgress(self):
+        """
+        Get the fraction (between 0 and 1) of source rows that are complete.
+        """
 
-            for other in adjacent:
-                if other not in dist:
-                    continue
+        if (self._numCells == 0):
+            return 1.0
+
+        return min(1.0, self._numCompleteRows / self._numCells)
+
+    def getPosition(self, cellId):
+        return self._positions[cellId]
+
+    def getPositions(self):
+        return self._positions
+
+    def isComplete(self):
+        return (self._complete.is_set() and not self._failed)
+
+    def isFailed(self):
+        return self._failed
+
+    def wait(self, timeout = None):
+        """
+        Block until this matrix is complete (or failed), or the timeout (in seconds) runs out.
+        Returns True if the matrix is complete.
+        """
+
+        self._complete.wait(timeout)
+        return self.isComplete()
+
+    def toBytes(self):
+        """
+        Serialize this matrix for `loadDistances`.
+        The cell ids are not saved, they are rebuilt from the walls.
+        """
 
-                oldDist = dist[other]
-                newDist = nodeDist + 1
-                if newDist < oldDist:
-                    dist[other] = newDist
-                    queue.push(other, newDist)
+        if (not self.isComplete()):
+            raise RuntimeError('Cannot serialize an incomplete distance matrix.')
 
-        for target in allNodes:
-            distances[(target, source)] = dist[target]
+        distances = memoryview(self._distances)
+
+        header = _CACHE_FILE_HEADER.pack(_CACHE_FILE_MAGIC, self.width, self.height,
+                self._numCells, distances.format.encode(), sys.byteorder[0].encode())
+
+        return header + distances.tobytes()
+
+    def __contains__(self, key):
+        pos1, pos2 = key
+        return self.getCellId(pos1) is not None and self.getCellId(pos2) is not None
+
+    def __getitem__(self, key):
+        distance = self.getDistance(*key)
+        if (distance is None):
+            raise KeyError(key)
+
+        return distance
+
+def computeDistances(layout):
+    """
+    Runs a BFS to all other positions from each position.
+    All moves cost the same, so a BFS finds the same distances as UCS for much less work.
+    """
+
+    distances = _createDistanceMatrix(layout.walls)
+    _fillDistances(distances, layout.walls)
 
     return distances
 
+def _createDistanceMatrix(walls):
+    """
+    Make a matrix for the walls with every distance unknown and no rows complete.
+    """
+
+    width, height, cellIds, positions = _indexCells(walls)
+    numCells = len(positions)
+
+    # Fall back to a wider type on boards too big for 16 bit distances.
+    typecode = 'H'
+    unreachable = 0xFFFF
+    if (numCells >= unreachable):
+        typecode = 'I'
+        unreachable = 0xFFFFFFFF
+
+    distances = array.array(typecode, [unreachable]) * (numCells * numCells)
+
+    return DistanceMatrix(width, height, cellIds, positions, distances, unreachable,
+            numCompleteRows = 0)
+
+def _fillDistances(matrix, walls, savePath = None, key = None):
+    """
+    Fill a matrix from `_createDistanceMatrix` in place, one source row at a time.
+    Once complete, the matrix is saved to savePath (if given).
+
+    Waiters are always released, even if this fails.
+    On failure, the matrix is marked as failed and dropped from the cache under key (if given),
+    so its users stay on manhattan distance and the next request for these walls tries again.
+    """
+
+    try:
+        width = matrix.width
+        height = matrix.height
+        cellIds = matrix._cellIds
+        numCells = matrix._numCells
+        unreachable = matrix._unreachable
+        distances = matrix._distances
+
+        # Adjacency lists by cell id.
+        neighbors = []
+        for (x, y) in matrix._positions:
+            adjacent = []
+            for (nextX, nextY) in ((x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)):
+                if (nextX < 0 or nextX >= width or nextY < 0 or nextY >= height):
+                    continue
+
+                otherId = cellIds[nextX * height + nextY]
+                if (otherId >= 0):
+                    adjacent.append(otherId)
+
+            neighbors.append(adjacent)
+
+        unreachableRow = array.array(distances.typecode, [unreachable]) * numCells
+
+        for source in range(numCells):
+            row = array.array(distances.typecode, unreachableRow)
+            row[source] = 0
+
+            queue = [source]
+            for node in queue:
+                nextDistance = row[node] + 1
+                for other in neighbors[node]:
+                    if (row[other] == unreachable):
+                        row[other] = nextDistance
+                        queue.append(other)
+
+            offset = source * numCells
+            distances[offset:offset + numCells] = row
+            matrix._numCompleteRows = source + 1
+    except Exception:
+        logging.exception('Failed to compute maze distances.')
+
+        matrix._failed = True
+
+        if (key is not None):
+            with _cacheLock:
+                if (_distanceCache.get(key) is matrix):
+                    del _distanceCache[key]
+
+        return
+    finally:
+        matrix._complete.set()
+
+    if (savePath is not None):
+        saveDistances(matrix, savePath)
+
+def _isOpen(walls, position):
+    x = int(position[0])
+    y = int(position[1])
+
+    return (0 <= x < walls.getWidth() and 0 <= y < walls.getHeight() and not walls.isSet(x, y))
+
+def _searchDistancesFrom(layout, source, targets):
+    """
+    BFS out of an integer source until all the (integer) targets are found.
+    Returns the distances in the same form as `DistanceMatrix.getDistancesFrom`.
+    """
+
+    walls = layout.walls
+    if (not _isOpen(walls, source)):
+        return [None] * len(targets)
+
+    source = (int(source[0]), int(source[1]))
+    targets = [(int(x), int(y)) for (x, y) in targets]
+
+    remaining = set(target for target in targets if _isOpen(walls, target))
+    remaining.discard(source)
+
+    table = layout.getLegalActionTable()
+    distances = {source: 0}
+
+    queue = [source]
+    for position in queue:
+        if (len(remaining) == 0):
+            break
+
+        nextDistance = distances[position] + 1
+        for action, nextPosition in table.getMoves(*position):
+            if (nextPosition not in distances):
+                distances[nextPosition] = nextDistance
+                remaining.discard(nextPosition)
+                queue.append(nextPosition)
+
+    results = []
+    for target in targets:
+        if (not _isOpen(walls, target)):
+            results.append(None)
+        else:
+            results.append(distances.get(target, sys.maxsize))
+
+    return results
+
+def _searchNearest(layout, pos, targets):
+    """
+    A multi-source BFS out of all the targets at once that stops as soon as pos is reached.
+    Every cell remembers which target reached it first.
+    Returns a (target, distance) tuple like `Distancer.nearest`,
+    or None if any of the positions is not an open cell.
+    """
+
+    walls = layout.walls
+    table = layout.getLegalActionTable()
+
+    # Targets between cells start part of the way out.
+    # Starting with the smallest offsets keeps every BFS layer sorted by offset,
+    # so the first target to reach a cell is also the closest.
+    seeds = []
+    for index in range(len(targets)):
+        for snap, snapDistance in getGrids2D(targets[index]):
+            if (not _isOpen(walls, snap)):
+                return None
+
+            seeds.append((snapDistance, index, (int(snap[0]), int(snap[1]))))
+
+    seeds.sort(key = lambda seed: seed[0])
+
+    sources = []
+    for snap, snapDistance in getGrids2D(pos):
+        if (not _isOpen(walls, snap)):
+            return None
+
+        sources.append(((int(snap[0]), int(snap[1])), snapDistance))
+
+    # Position to (distance, target offset, target index).
+    reached = {}
+    queue = []
+    for snapDistance, index, snap in seeds:
+        if (snap not in reached):
+            reached[snap] = (0, snapDistance, index)
+            queue.append(snap)
+
+    remaining = set(snap for snap, snapDistance in sources if snap not in reached)
+
+    for position in queue:
+        if (len(remaining) == 0):
+            break
+
+        distance, offset, index = reached[position]
+        for action, nextPosition in table.getMoves(*position):
+            if (nextPosition not in reached):
+                reached[nextPosition] = (distance + 1, offset, index)
+                remaining.discard(nextPosition)
+                queue.append(nextPosition)
+
+    best = None
+    for snap, snapDistance in sources:
+        if (snap not in reached):
+            continue
+
+        distance, offset, index = reached[snap]
+        distance += offset + snapDistance
+
+        if (best is None or distance < best[1] or (distance == best[1] and index < best[0])):
+            best = (index, distance)
+
+    if (best is None):
+        return targets[0], sys.maxsize
+
+    return targets[best[0]], best[1]
+
 def getDistanceOnGrid(distances, pos1, pos2):
-    key = (pos1, pos2)
-    if key in distances:
-        return distances[key]
+    distance = distances.getDistance(pos1, pos2)
+    if (distance is not None):
+        return distance
 
     return DEFAULT_DISTANCE
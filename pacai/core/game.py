@@ -165,6 +165,11 @@ class Game:
                 return False
 
             maxStartupTime = int(self.rules.getMaxStartupTime(agentIndex))
+
+            # Let agents that plan their own time know how long a move can take.
+            agent.setMoveTimeLimit(min(self.rules.getMoveWarningTime(agentIndex),
+                    self.rules.getMoveTimeout(agentIndex)))
+
             startTime = time.time()
 
             try:
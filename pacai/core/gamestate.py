@@ -2,8 +2,8 @@ import abc
 import copy
 
 from pacai.core.agentstate import AgentState
+from pacai.core import zobrist
 from pacai.core.directions import Directions
-from pacai.util import util
 
 class AbstractGameState(abc.ABC):
     """
@@ -22,8 +22,10 @@ class AbstractGameState(abc.ABC):
 
         self._layout = layout
 
-        # Keep a copy of the hash, since it is expensive to compute.
-        # Any children should be sure to clear the hash when modifications are made.
+        # The Zobrist hash of this state (see `pacai.core.zobrist`).
+        # It is computed lazily, and once known it is kept up to date incrementally.
+        # Any children should update the hash (see `AbstractGameState._updateHash`)
+        # or clear it when modifications are made.
         self._hash = None
 
         # For food and capsules, we will only copy on write (if we eat one of them).
@@ -65,8 +67,50 @@ class AbstractGameState(abc.ABC):
         pass
 
     def addScore(self, score):
-        self._hash = None
-        self._score += score
+        self.setScore(self._score + score)
+
+    def applyMove(self, agentIndex, action):
+        """
+        Apply an action to this state IN PLACE (instead of making a successor)
+        and return a token that can be passed to `AbstractGameState.undoMove`
+        to restore this state exactly.
+
+        This lets deep tree searches walk a single mutable state:
+        ```
+        token = state.applyMove(agentIndex, action)
+        value = search(state)
+        state.undoMove(token)
+        ```
+
+        Moves must be undone in the reverse order that they were applied.
+        """
+
+        if (self.isOver()):
+            raise RuntimeError("Can't apply moves to a terminal state.")
+
+        agentSnapshots = [agentState.getSnapshot() for agentState in self._agentStates]
+
+        token = (agentSnapshots, self._score, self._gameover, self._win, self._hash,
+                self._lastAgentMoved,
+                self._food, self._foodCopied, self._lastFoodEaten,
+                self._capsules, self._capsulesCopied, self._lastCapsuleEaten)
+
+        # Force food and capsules to be copied on write,
+        # so the token's references stay untouched.
+        self._foodCopied = False
+        self._capsulesCopied = False
+
+        self._applySuccessorAction(agentIndex, action)
+
+        if (self._hash is not None):
+            table = self._getZobristTable()
+            for index in range(len(self._agentStates)):
+                snapshot = self._agentStates[index].getSnapshot()
+                if (snapshot != agentSnapshots[index]):
+                    self._hash ^= (table.agent(index, agentSnapshots[index])
+                            ^ table.agent(index, snapshot))
+
+        return token
 
     def eatCapsule(self, x, y):
         """
@@ -83,7 +127,7 @@ class AbstractGameState(abc.ABC):
         self._capsules.remove((x, y))
         self._lastCapsuleEaten = (x, y)
 
-        self._hash = None
+        self._updateHash(self._getZobristTable().capsule(x, y))
         return True
 
     def eatFood(self, x, y):
@@ -101,15 +145,17 @@ class AbstractGameState(abc.ABC):
         self._food[x][y] = False
         self._lastFoodEaten = (x, y)
 
-        self._hash = None
+        self._updateHash(self._getZobristTable().food(x, y))
         return True
 
     def endGame(self, win):
+        if (self._hash is not None):
+            table = self._getZobristTable()
+            self._hash ^= table.flags(self._gameover, self._win) ^ table.flags(True, win)
+
         self._gameover = True
         self._win = win
 
-        self._hash = None
-
     def getAgentPosition(self, index):
         """
         Returns a location tuple of the agent with the given index.
@@ -239,18 +285,49 @@ class AbstractGameState(abc.ABC):
         self._highlightLocations = list(locations)
 
     def setScore(self, score):
+        if (self._hash is not None):
+            table = self._getZobristTable()
+            self._hash ^= table.score(self._score) ^ table.score(score)
+
         self._score = score
-        self._hash = None
+
+    def undoMove(self, token):
+        """
+        Revert a move made with `AbstractGameState.applyMove`.
+        """
+
+        (agentSnapshots, self._score, self._gameover, self._win, self._hash,
+                self._lastAgentMoved,
+                self._food, self._foodCopied, self._lastFoodEaten,
+                self._capsules, self._capsulesCopied, self._lastCapsuleEaten) = token
+
+        for index in range(len(self._agentStates)):
+            self._agentStates[index].restoreSnapshot(agentSnapshots[index])
+
+    @abc.abstractmethod
+    def _applySuccessorAction(self, agentIndex, action):
+        """
+        Apply the action to the context state (self).
+        Used by `AbstractGameState.applyMove` and by the children's `generateSuccessor`.
+        """
+
+        pass
+
+    def _getZobristTable(self):
+        return zobrist.getTable(self._layout)
 
     def _initSuccessor(self):
         """
         Get a state that will eventually serve as a successor.
         Initialize the successor to look like this state.
+
+        The successor keeps this state's hash,
+        children should call `AbstractGameState._updateAgentHashes` once the successor
+        has been fully modified.
         """
 
-        # Start with a shallow copy.
+        # Start with a shallow copy (this also carries over the hash).
         successor = copy.copy(self)
-        successor._hash = None
 
         # Leave food and capsules as a shallow copy, but mark them to be copied on write.
         successor._foodCopied = False
@@ -261,6 +338,34 @@ class AbstractGameState(abc.ABC):
 
         return successor
 
+    def _updateAgentHashes(self, previousAgentStates):
+        """
+        Bring the hash up to date after agents have changed.
+        Only the agents that differ from their previous state are rehashed.
+        """
+
+        if (self._hash is None):
+            return
+
+        table = self._getZobristTable()
+        for agentIndex in range(len(self._agentStates)):
+            agentState = self._agentStates[agentIndex]
+            previousAgentState = previousAgentStates[agentIndex]
+
+            if (agentState is previousAgentState or agentState == previousAgentState):
+                continue
+
+            self._hash ^= (table.agent(agentIndex, previousAgentState.getSnapshot())
+                    ^ table.agent(agentIndex, agentState.getSnapshot()))
+
+    def _updateHash(self, key):
+        """
+        Toggle a single Zobrist key in the hash (if the hash is known).
+        """
+
+        if (self._hash is not None):
+            self._hash ^= key
+
     def __eq__(self, other):
         if (other is None):
             return False
@@ -289,7 +394,32 @@ class AbstractGameState(abc.ABC):
 
     def __hash__(self):
         if (self._hash is None):
-            self._hash = util.buildHash(self._score, self._gameover, self._win, *self._capsules,
-                self._food, *self._agentStates, self._layout)
+            table = self._getZobristTable()
+
+            value = table.score(self._score) ^ table.flags(self._gameover, self._win)
+            value ^= table.foodGrid(self._food)
+
+            for (x, y) in self._capsules:
+                value ^= table.capsule(x, y)
+
+            for agentIndex in range(len(self._agentStates)):
+                value ^= table.agent(agentIndex, self._agentStates[agentIndex].getSnapshot())
+
+            self._hash = value
 
         return self._hash
+
+    def __copy__(self):
+        # Shallow copies (like successors) keep the hash, only pickling drops it.
+        copied = self.__class__.__new__(self.__class__)
+        copied.__dict__.update(self.__dict__)
+
+        return copied
+
+    def __getstate__(self):
+        # Zobrist keys are drawn lazily, so they differ between processes (and layout copies).
+        # Drop the hash, so it is recomputed with the keys of wherever this state is loaded.
+        state = self.__dict__.copy()
+        state['_hash'] = None
+
+        return state
@@ -1,8 +1,13 @@
+import weakref
+
 class Grid:
     """
-    A 2-dimensional array of objects backed by a list of lists.
+    A 2-dimensional array of booleans backed by a packed integer (a bitboard).
     Data is accessed via grid[x][y] where (x, y) are positions on a Pacman map with x horizontal,
     y vertical and the origin (0, 0) in the bottom left corner.
+
+    The cell (x, y) is stored in bit (x * height + y).
+    Since Python integers are immutable, copies are O(1) and only writes allocate.
     """
 
     def __init__(self, width, height, initialValue = False):
@@ -11,74 +16,237 @@ class Grid:
 
         self._width = width
         self._height = height
-        self._data = [[initialValue for y in range(height)] for x in range(width)]
+        self._fullMask = (1 << (width * height)) - 1
+
+        self._bits = 0
+        if (initialValue):
+            self._bits = self._fullMask
+
+        # Cached values, cleared on any write.
+        self._hash = None
+        self._count = None
 
     def asList(self, key = True):
-        values = []
+        """
+        Get a list of all the positions (x, y) that have the given value,
+        ordered by x and then y.
+        """
+
+        bits = self._bits
+        if (not key):
+            bits = ~bits & self._fullMask
 
-        for x in range(self._width):
-            for y in range(self._height):
-                if self[x][y] == key:
-                    values.append((x, y))
+        values = []
+        while (bits):
+            lowBit = bits & -bits
+            values.append(self._cellIndexToPosition(lowBit.bit_length() - 1))
+            bits ^= lowBit
 
         return values
 
     def copy(self):
-        grid = Grid(self._width, self._height)
-        grid._data = [row.copy() for row in self._data]
+        grid = Grid.__new__(Grid)
+        grid._width = self._width
+        grid._height = self._height
+        grid._fullMask = self._fullMask
+        grid._bits = self._bits
+        grid._hash = self._hash
+        grid._count = self._count
+
         return grid
 
-    def count(self, item =True):
-        return sum([x.count(item) for x in self._data])
+    def count(self, item = True):
+        if (self._count is None):
+            self._count = bin(self._bits).count('1')
+
+        if (item is True):
+            return self._count
+        elif (item is False):
+            return self._width * self._height - self._count
+
+        return 0
 
     def deepCopy(self):
         return self.copy()
 
+    @staticmethod
+    def fromBits(width, height, bits):
+        """
+        Build a grid directly from a packed integer (see `Grid.getBits`).
+        """
+
+        grid = Grid(width, height)
+        grid._bits = bits & grid._fullMask
+
+        return grid
+
+    def getBits(self):
+        """
+        Get the packed integer backing this grid.
+        Cell (x, y) is bit (x * height + y).
+        """
+
+        return self._bits
+
     def getHeight(self):
         return self._height
 
     def getWidth(self):
         return self._width
 
+    def isSet(self, x, y):
+        """
+        Check a single cell without going through a column.
+        """
+
+        return bool((self._bits >> self._positionToCellIndex(x, y)) & 1)
+
+    def set(self, x, y, value):
+        """
+        Set a single cell without going through a column.
+        """
+
+        mask = 1 << self._positionToCellIndex(x, y)
+
+        if (value):
+            bits = self._bits | mask
+        else:
+            bits = self._bits & ~mask
+
+        if (bits != self._bits):
+            self._bits = bits
+            self._hash = None
+            self._count = None
+
     def shallowCopy(self):
-        grid = Grid(self._width, self._height)
-        grid._data = self._data
-        return grid
+        """
+        The backing integer is immutable, so a full copy is already as cheap as a shallow one.
+        """
+
+        return self.copy()
 
     def _cellIndexToPosition(self, index):
-        x = index / self._height
+        x = index // self._height
         y = index % self._height
 
         return x, y
 
+    def _positionToCellIndex(self, x, y):
+        if (x < 0):
+            x += self._width
+
+        if (y < 0):
+            y += self._height
+
+        if (x < 0 or x >= self._width or y < 0 or y >= self._height):
+            raise IndexError('Grid position out of range: (%s, %s).' % (str(x), str(y)))
+
+        return x * self._height + y
+
     def __eq__(self, other):
-        if (other is None):
+        if (other is None or not isinstance(other, Grid)):
             return False
 
-        return self._data == other._data
+        return (self._bits == other._bits
+                and self._width == other._width
+                and self._height == other._height)
 
     def __getitem__(self, i):
-        return self._data[i]
+        if (i < 0):
+            i += self._width
 
-    def __hash__(self):
-        hashcode = 0
-        base = 1
+        if (i < 0 or i >= self._width):
+            raise IndexError('Grid column out of range: %s.' % (str(i)))
+
+        return _GridColumn(self, i)
 
-        for row in self._data:
-            for value in row:
-                if (value):
-                    hashcode += base
-                base *= 2
+    def __hash__(self):
+        if (self._hash is None):
+            self._hash = hash(self._bits)
 
-        return hash(hashcode)
+        return self._hash
 
     def __lt__(self, other):
         return self.__hash__() < other.__hash__()
 
     def __setitem__(self, key, item):
-        self._data[key] = item
+        for y in range(self._height):
+            self.set(key, y, item[y])
 
     def __str__(self):
-        out = [[str(self._data[x][y])[0] for x in range(self._width)] for y in range(self._height)]
+        out = [[str(self.isSet(x, y))[0] for x in range(self._width)] for y in range(self._height)]
         out.reverse()
         return '\n'.join([''.join(x) for x in out])
+
+class GridCache(object):
+    """
+    Things built from a grid (e.g. the legal actions on a layout's walls),
+    keyed by the identity of the grid they were built from.
+    An entry is dropped when its grid is garbage collected.
+
+    Entries are shared by everyone using the same grid (e.g. everything on the same layout),
+    so a grid must not be modified once something has been built from it.
+    """
+
+    def __init__(self, build):
+        # Makes the thing to cache from a grid.
+        self._build = build
+
+        self._values = {}
+
+    def get(self, grid):
+        """
+        Get the cached thing for a grid, building it the first time it is asked for.
+        """
+
+        key = id(grid)
+
+        value = self._values.get(key)
+        if (value is None):
+            value = self._build(grid)
+            self._values[key] = value
+            weakref.finalize(grid, self._values.pop, key, None)
+
+        return value
+
+    def __len__(self):
+        return len(self._values)
+
+class _GridColumn:
+    """
+    A light view over a single column (x) of a `Grid`.
+    This allows the grid[x][y] read/write syntax to keep working on the packed grid.
+    """
+
+    __slots__ = ('_grid', '_x')
+
+    def __init__(self, grid, x):
+        self._grid = grid
+        self._x = x
+
+    def count(self, item = True):
+        return sum(1 for y in range(self._grid._height) if self[y] == item)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __getitem__(self, y):
+        grid = self._grid
+
+        if (y < 0):
+            y += grid._height
+
+        if (y < 0 or y >= grid._height):
+            raise IndexError('Grid row out of range: %s.' % (str(y)))
+
+        return bool((grid._bits >> (self._x * grid._height + y)) & 1)
+
+    def __iter__(self):
+        for y in range(self._grid._height):
+            yield self[y]
+
+    def __len__(self):
+        return self._grid._height
+
+    def __setitem__(self, y, value):
+        self._grid.set(self._x, y, value)
@@ -1,6 +1,8 @@
 import os
 import random
 
+from pacai.core import corridor
+from pacai.core.actions import Actions
 from pacai.core.distance import manhattan
 from pacai.core.grid import Grid
 
@@ -26,6 +28,22 @@ class Layout(object):
 
         self.processLayoutText(layoutText, maxGhosts)
 
+    def getLegalActionTable(self):
+        """
+        Get the precomputed legal actions for every open cell of this layout.
+        See `pacai.core.actions.LegalActionTable`.
+        """
+
+        return Actions.getLegalActionTable(self.walls)
+
+    def getCorridorGraph(self):
+        """
+        Get this layout's maze with the corridors collapsed into weighted edges.
+        See `pacai.core.corridor.CorridorGraph`.
+        """
+
+        return corridor.getCorridorGraph(self.walls)
+
     def getNumGhosts(self):
         return self.numGhosts
 
@@ -0,0 +1,179 @@
+"""
+Move ordering for the adversarial searches.
+
+Alpha-beta prunes the most when the best move at each node is searched first.
+A `MoveOrdering` guesses which moves are best from a few cheap signals
+(each can be turned on or off):
+
+ - `PV`: The best move found from the same position by an earlier search
+   (e.g. the previous, shallower, iteration of an anytime search).
+ - `KILLER`: Moves that recently caused a cutoff at the same ply (in a different position).
+ - `HISTORY`: How often (weighted by depth) each (agent, position, action) has caused a cutoff.
+ - `STATIC`: The evaluation function's score for each child.
+"""
+
+PV = 'pv'
+KILLER = 'killer'
+HISTORY = 'history'
+STATIC = 'static'
+
+COMPONENTS = (PV, KILLER, HISTORY, STATIC)
+
+# The number of killer moves kept for each ply (and agent).
+NUM_KILLERS = 2
+
+# The most best moves (for `PV`) to keep before forgetting them all.
+MAX_BEST_MOVES = 2 ** 16
+
+class MoveOrdering(object):
+    """
+    Orders the children of a node by the enabled components,
+    in priority order: `PV`, then `KILLER`, then `HISTORY`, then `STATIC`.
+    Moves that tie on all of them keep the order of `getLegalActions`.
+
+    Searches tell the ordering what they learn with
+    `MoveOrdering.recordBest` and `MoveOrdering.recordCutoff`.
+    """
+
+    def __init__(self, components = COMPONENTS, evaluationFunction = None):
+        for component in components:
+            if (component not in COMPONENTS):
+                raise ValueError('Unknown move ordering component: \'%s\'.' % (component))
+
+        if (STATIC in components and evaluationFunction is None):
+            raise ValueError('Static move ordering needs an evaluation function.')
+
+        self.components = tuple(components)
+        self._evaluationFunction = evaluationFunction
+
+        # (state hash, agent index) to the best action found from it.
+        self._bestMoves = {}
+
+        # (ply, agent index) to the most recent cutoff actions (newest first).
+        self._killers = {}
+
+        # (agent index, agent position, action) to a cutoff score.
+        self._history = {}
+
+    def newSearch(self):
+        """
+        Note that a new search (for a new move) is starting.
+        Killers are forgotten (the plies have moved), and history is aged.
+        Best moves are kept, since the same positions often come up again.
+        """
+
+        self._killers.clear()
+
+        for key in list(self._history):
+            self._history[key] //= 2
+            if (self._history[key] == 0):
+                del self._history[key]
+
+    def order(self, state, agentIndex, ply, depth, maximize = True):
+        """
+        Get the (action, successor) pairs of a state in the order they should be searched.
+        The ply is the distance from the root of the search,
+        and depth the depth that remains to search from this state.
+        Maximize says whether the agent to move wants high or low evaluations.
+
+        Successors are only generated as they are needed
+        (unless the `STATIC` component needs them all to sort by),
+        so the ones after a cutoff are never made.
+        """
+
+        actions = state.getLegalActions(agentIndex)
+
+        # Children are leaves at depth one and get evaluated anyway, no need to do it twice.
+        useStatic = (STATIC in self.components and depth > 1 and len(actions) > 1)
+
+        successors = {}
+        if (useStatic):
+            for action in actions:
+                successors[action] = state.generateSuccessor(agentIndex, action)
+
+        if (len(actions) > 1 and len(self.components) > 0):
+            actions = self._sortActions(state, agentIndex, ply, actions, successors, maximize)
+
+        for action in actions:
+            successor = successors.get(action)
+            if (successor is None):
+                successor = state.generateSuccessor(agentIndex, action)
+
+            yield (action, successor)
+
+    def recordBest(self, state, agentIndex, action):
+        """
+        Remember the best action found from a state.
+        """
+
+        if (PV not in self.components or action is None):
+            return
+
+        if (len(self._bestMoves) >= MAX_BEST_MOVES):
+            self._bestMoves.clear()
+
+        self._bestMoves[(hash(state), agentIndex)] = action
+
+    def recordCutoff(self, state, agentIndex, ply, depth, action):
+        """
+        Remember that an action caused a cutoff.
+        """
+
+        if (KILLER in self.components):
+            key = (ply, agentIndex)
+            killers = [action] + [killer for killer in self._killers.get(key, ())
+                    if killer != action]
+            self._killers[key] = tuple(killers[:NUM_KILLERS])
+
+        if (HISTORY in self.components):
+            key = (agentIndex, state.getAgentPosition(agentIndex), action)
+            self._history[key] = self._history.get(key, 0) + depth * depth
+
+    def _sortActions(self, state, agentIndex, ply, actions, successors, maximize):
+        bestMove = None
+        if (PV in self.components):
+            bestMove = self._bestMoves.get((hash(state), agentIndex))
+
+        killers = ()
+        if (KILLER in self.components):
+            killers = self._killers.get((ply, agentIndex), ())
+
+        position = None
+        if (HISTORY in self.components):
+            position = state.getAgentPosition(agentIndex)
+
+        sign = 1 if maximize else -1
+
+        keys = {}
+        for action in actions:
+            killerRank = 0
+            if (action in killers):
+                killerRank = NUM_KILLERS - killers.index(action)
+
+            history = 0
+            if (position is not None):
+                history = self._history.get((agentIndex, position, action), 0)
+
+            static = 0
+            if (action in successors):
+                static = sign * self._evaluationFunction(successors[action])
+
+            keys[action] = (action == bestMove, killerRank, history, static)
+
+        # Sorting is stable, so ties keep their original order.
+        return sorted(actions, key = lambda action: keys[action], reverse = True)
+
+def parseComponents(text):
+    """
+    Parse components joined by '+' (e.g. 'pv+killer'), 'all' for all of them, or 'none'.
+    """
+
+    text = text.strip().lower()
+
+    if (text == 'all'):
+        return COMPONENTS
+
+    if (text in ('', 'none')):
+        return ()
+
+    return tuple([component.strip() for component in text.split('+')])
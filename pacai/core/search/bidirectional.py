@@ -0,0 +1,214 @@
+"""
+Searches that grow from both ends of a
+`pacai.core.search.problem.InvertibleSearchProblem` at once and stop when they meet.
+On open layouts, two balls of half the radius hold far fewer states than one full ball.
+"""
+
+from pacai.core.search.problem import InvertibleSearchProblem
+from pacai.util.priorityQueue import IndexedPriorityQueue
+
+def bidirectionalBreadthFirstSearch(problem):
+    """
+    Breadth first search from the start and the goal at the same time,
+    always growing the side with the smaller frontier by a whole layer.
+    Finds the path with the fewest actions.
+    """
+
+    start, goal = _getEndpoints(problem)
+    if (start == goal):
+        return []
+
+    # State to (previous state, action into the state) on the start's side,
+    # and state to (next state, action out of the state) on the goal's side.
+    forwardLinks = {start: None}
+    backwardLinks = {goal: None}
+
+    forwardFrontier = [start]
+    backwardFrontier = [goal]
+
+    while (len(forwardFrontier) > 0 and len(backwardFrontier) > 0):
+        if (len(forwardFrontier) <= len(backwardFrontier)):
+            forwardFrontier, meeting = _expandLayer(problem.successorStates, forwardFrontier,
+                    forwardLinks, backwardLinks)
+        else:
+            backwardFrontier, meeting = _expandLayer(problem.predecessorStates, backwardFrontier,
+                    backwardLinks, forwardLinks)
+
+        if (meeting is not None):
+            return _buildPath(meeting, forwardLinks, backwardLinks)
+
+    return None
+
+def bidirectionalUniformCostSearch(problem):
+    """
+    Uniform cost search from the start and the goal at the same time,
+    always expanding the side with the cheaper next node.
+    Stops once the cheapest nodes on both sides together cost at least as much as
+    the best path found where the sides meet, so the path is the cheapest one.
+    """
+
+    start, goal = _getEndpoints(problem)
+    if (start == goal):
+        return []
+
+    forward = _CostSide(start, problem.successorStates)
+    backward = _CostSide(goal, problem.predecessorStates)
+
+    bestCost = None
+    meeting = None
+
+    while (not forward.frontier.isEmpty() and not backward.frontier.isEmpty()):
+        # The cheapest costs left in each frontier.
+        forwardTop = forward.frontier.heap[0][0]
+        backwardTop = backward.frontier.heap[0][0]
+
+        if (bestCost is not None and forwardTop + backwardTop >= bestCost):
+            break
+
+        side, other = forward, backward
+        if (backwardTop < forwardTop):
+            side, other = backward, forward
+
+        for state, cost in side.expandNext():
+            if (state in other.costs):
+                total = cost + other.costs[state]
+                if (bestCost is None or total < bestCost):
+                    bestCost = total
+                    meeting = state
+
+    if (meeting is None):
+        return None
+
+    return _buildPath(meeting, forward.links, backward.links)
+
+class _CostSide(object):
+    """
+    One side of a bidirectional uniform cost search.
+    """
+
+    def __init__(self, root, expand):
+        self.expand = expand
+
+        # State to (the state it was reached from, the action between them).
+        self.links = {root: None}
+
+        # Best known cost from the root.
+        self.costs = {root: 0}
+
+        self.explored = set()
+
+        self.frontier = IndexedPriorityQueue()
+        self.frontier.push(root, 0)
+
+    def expandNext(self):
+        """
+        Expand the cheapest state in the frontier.
+        Returns (state, cost) for every state whose cost went down.
+        """
+
+        state = self.frontier.pop()
+        self.explored.add(state)
+
+        improved = []
+        for neighbor, action, stepCost in self.expand(state):
+            if (neighbor in self.explored):
+                continue
+
+            cost = self.costs[state] + stepCost
+            if (self.frontier.pushOrDecrease(neighbor, cost)):
+                self.costs[neighbor] = cost
+                self.links[neighbor] = (state, action)
+                improved.append((neighbor, cost))
+
+        return improved
+
+def _buildPath(meeting, forwardLinks, backwardLinks):
+    """
+    Join the path from the start to the meeting state with the path from there to the goal.
+    """
+
+    path = []
+
+    state = meeting
+    while (forwardLinks[state] is not None):
+        state, action = forwardLinks[state]
+        path.append(action)
+
+    path.reverse()
+
+    state = meeting
+    while (backwardLinks[state] is not None):
+        state, action = backwardLinks[state]
+        path.append(action)
+
+    return path
+
+def _expandLayer(expand, frontier, links, otherLinks):
+    """
+    Expand every state in one side's frontier.
+    Returns the next frontier, and a state both sides have reached (or None).
+    Every meeting in the layer is the same number of actions from the other side's frontier,
+    but not necessarily from the other end, so the whole layer is checked for the shortest.
+    """
+
+    nextFrontier = []
+
+    # (distance through the meeting state from the other end, meeting state).
+    meeting = None
+    otherDepths = None
+
+    for state in frontier:
+        for neighbor, action, stepCost in expand(state):
+            if (neighbor in links):
+                continue
+
+            links[neighbor] = (state, action)
+
+            nextFrontier.append(neighbor)
+
+            if (neighbor in otherLinks):
+                if (otherDepths is None):
+                    otherDepths = {}
+
+                depth = _getDepth(neighbor, otherLinks, otherDepths)
+                if (meeting is None or depth < meeting[0]):
+                    meeting = (depth, neighbor)
+
+    if (meeting is None):
+        return nextFrontier, None
+
+    return nextFrontier, meeting[1]
+
+def _getDepth(state, links, depths):
+    """
+    Count the links from a state back to its side's end (memoized in depths).
+    """
+
+    chain = []
+    while (state not in depths and links[state] is not None):
+        chain.append(state)
+        state = links[state][0]
+
+    depth = depths.get(state, 0)
+    for state in reversed(chain):
+        depth += 1
+        depths[state] = depth
+
+    return depth
+
+def _getEndpoints(problem):
+    if (not isinstance(problem, InvertibleSearchProblem)):
+        raise ValueError('Bidirectional search needs an InvertibleSearchProblem, got: '
+                + str(type(problem)))
+
+    goal = problem.goalState()
+    if (goal is None):
+        raise ValueError('Bidirectional search needs a problem with a single goal.')
+
+    start = problem.startingState()
+
+    # Let the problem record the goal (e.g. for the GUI highlight).
+    if (not problem.isGoal(goal)):
+        raise ValueError('Goal state is not a goal: ' + str(goal))
+
+    return start, goal
@@ -0,0 +1,168 @@
+"""
+Searches that work within a fixed amount of memory.
+
+Plain A* keeps every state it has seen, which runs out of memory long before it runs out of time
+on big problems (like the food search on `bigSearch`).
+"""
+
+import heapq
+import itertools
+import logging
+
+from pacai.core.search.node import SearchNode
+
+# The default number of states `memoryBoundedAStarSearch` may hold at once.
+MAX_NODES = 1000000
+
+# The default number of times `memoryBoundedAStarSearch` may prune its frontier before giving up.
+# Once the explored set is forgotten, states can be expanded again and again,
+# so without a limit an unsolvable problem would be searched forever.
+MAX_PRUNES = 1000
+
+def iterativeDeepeningAStarSearch(problem, heuristic):
+    """
+    IDA*: a series of depth-first searches that each give up on paths
+    whose f = g + h goes past a threshold.
+    Each round raises the threshold to the smallest f that went past it.
+
+    Only the current path is stored, so memory is linear in the solution length.
+    In exchange, states may be expanded many times.
+    With an admissible heuristic, the solution is optimal.
+    """
+
+    root = SearchNode(problem.startingState())
+    threshold = heuristic(root.state, problem)
+
+    while (True):
+        goal, nextThreshold = _costBoundedSearch(problem, heuristic, root, threshold)
+
+        if (goal is not None):
+            return goal.getPath()
+
+        if (nextThreshold is None):
+            return None
+
+        logging.debug('IDA* raising its threshold from %s to %s.' % (threshold, nextThreshold))
+        threshold = nextThreshold
+
+def memoryBoundedAStarSearch(problem, heuristic, maxNodes = MAX_NODES, maxPrunes = MAX_PRUNES):
+    """
+    A* that holds at most (about) maxNodes states at once
+    (in both the frontier and the explored set).
+
+    When that many states have been seen, the frontier is cut down to its best (maxNodes / 4) nodes
+    (so the search continues like a beam search) and the explored set is forgotten.
+    Until that happens, this is exactly A*.
+    Afterwards, the solution may not be optimal.
+
+    Returns None if there is no solution,
+    or if the frontier had to be pruned more than maxPrunes times.
+    """
+
+    root = SearchNode(problem.startingState())
+
+    # (f, state, insertion order, node).
+    # Like the other searches, ties are broken by comparing states.
+    frontier = [(heuristic(root.state, problem), root.state, 0, root)]
+    counter = itertools.count(1)
+
+    # The cheapest path cost seen for each state in the frontier or explored.
+    bestCosts = {root.state: 0}
+    explored = set()
+    prunes = 0
+
+    while (len(frontier) > 0):
+        priority, state, order, node = heapq.heappop(frontier)
+
+        # Skip stale entries that were replaced by a cheaper path.
+        if (state in explored or bestCosts.get(state, node.cost) < node.cost):
+            continue
+
+        if (problem.isGoal(state)):
+            return node.getPath()
+
+        explored.add(state)
+
+        for child, action, stepCost in problem.successorStates(state):
+            cost = node.cost + stepCost
+            if (child in explored or bestCosts.get(child, cost + 1) <= cost):
+                continue
+
+            bestCosts[child] = cost
+            childNode = SearchNode(child, node, action, stepCost)
+            priority = cost + heuristic(child, problem)
+            heapq.heappush(frontier, (priority, child, next(counter), childNode))
+
+        if (len(bestCosts) + len(frontier) > maxNodes):
+            prunes += 1
+            if (prunes > maxPrunes):
+                logging.warning('Memory-bounded A* gave up after pruning its frontier %d times.'
+                        % (maxPrunes))
+                return None
+
+            frontier = _pruneFrontier(frontier, max(1, maxNodes // 4))
+            bestCosts = {entry[3].state: entry[3].cost for entry in frontier}
+            explored = set()
+
+    return None
+
+def _costBoundedSearch(problem, heuristic, root, threshold):
+    """
+    A depth-first search from root that does not go past the f threshold.
+    The path is kept on an explicit stack (to avoid Python's recursion limit),
+    and states already on the path are skipped to avoid cycles.
+
+    Returns (goal node, None) if a goal was found,
+    or (None, smallest f above the threshold) if not (None if nothing was above the threshold).
+    """
+
+    nextThreshold = None
+
+    onPath = {root.state}
+
+    # [node, iterator over its successors (None until the node is checked)].
+    stack = [[root, None]]
+
+    while (len(stack) > 0):
+        entry = stack[-1]
+        node = entry[0]
+
+        if (entry[1] is None):
+            priority = node.cost + heuristic(node.state, problem)
+
+            if (priority > threshold):
+                if (nextThreshold is None or priority < nextThreshold):
+                    nextThreshold = priority
+
+                stack.pop()
+                onPath.discard(node.state)
+                continue
+
+            if (problem.isGoal(node.state)):
+                return node, None
+
+            entry[1] = iter(problem.successorStates(node.state))
+
+        for child, action, stepCost in entry[1]:
+            if (child not in onPath):
+                onPath.add(child)
+                stack.append([SearchNode(child, node, action, stepCost), None])
+                break
+        else:
+            stack.pop()
+            onPath.discard(node.state)
+
+    return None, nextThreshold
+
+def _pruneFrontier(frontier, size):
+    """
+    Keep only the best (lowest f) entries of the frontier.
+    """
+
+    logging.debug('Memory-bounded A* pruning its frontier from %d to %d nodes.'
+            % (len(frontier), size))
+
+    frontier = heapq.nsmallest(size, frontier)
+    heapq.heapify(frontier)
+
+    return frontier
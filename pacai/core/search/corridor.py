@@ -0,0 +1,112 @@
+"""
+Search problems that move along whole corridors instead of single cells.
+
+A `CorridorSearchProblem` wraps another search problem and searches it over a
+`pacai.core.corridor.CorridorGraph`, so a corridor of any length is a single expansion.
+The actions of the search are `pacai.core.corridor.CorridorEdge`s,
+`CorridorSearchProblem.expandActions` turns them back into per-step directions.
+"""
+
+from pacai.core.corridor import CorridorGraph
+from pacai.core.search.food import CompactFoodSearchProblem
+from pacai.core.search.position import PositionSearchProblem
+from pacai.core.search.problem import SearchProblem
+
+# The methods a problem needs to be searched over its corridors (see `CorridorSearchProblem`).
+CORRIDOR_HOOKS = ('followCorridor', 'getCorridorKeyPositions', 'getCorridorPosition')
+
+class CorridorSearchProblem(SearchProblem):
+    """
+    Search a problem over its corridors.
+
+    The wrapped problem must provide:
+    ```
+    getCorridorKeyPositions(): The positions where more than just the position can change
+                               (e.g. the start, goals, and food).
+    getCorridorPosition(state): The position of a state.
+    followCorridor(state, edge): The state at the end of an edge leaving a state, and the cost.
+    ```
+
+    Everything else (the goal test, `actionsCost`, and any other attributes a heuristic may ask for)
+    comes from the wrapped problem,
+    so heuristics for the wrapped problem work on this one too.
+    """
+
+    def __init__(self, problem):
+        super().__init__()
+
+        for hook in CORRIDOR_HOOKS:
+            if (not callable(getattr(problem, hook, None))):
+                raise ValueError('%s cannot be searched over corridors, it has no %s().'
+                        % (type(problem).__name__, hook))
+
+        self.problem = problem
+        self.graph = CorridorGraph(problem.walls, problem.getCorridorKeyPositions())
+
+    def actionsCost(self, actions):
+        """
+        Get the cost of a sequence of per-step actions (see `CorridorSearchProblem.expandActions`).
+        """
+
+        return self.problem.actionsCost(actions)
+
+    def expandActions(self, actions):
+        if (actions is None):
+            return None
+
+        return [action for edge in actions for action in edge.actions]
+
+    def hasSmallIntegerCosts(self):
+        # A corridor costs the sum of its steps.
+        return self.problem.hasSmallIntegerCosts()
+
+    def isGoal(self, state):
+        return self.problem.isGoal(state)
+
+    def startingState(self):
+        return self.problem.startingState()
+
+    def successorStates(self, state):
+        """
+        Returns the state at the far end of every corridor leaving this state,
+        the `pacai.core.corridor.CorridorEdge` that gets there, and its cost.
+        """
+
+        position = self.problem.getCorridorPosition(state)
+
+        successors = []
+        for edge in self.graph.getEdges(position):
+            nextState, cost = self.problem.followCorridor(state, edge)
+            successors.append((nextState, edge, cost))
+
+        # Bookkeeping for display purposes (the highlight in the GUI).
+        self._numExpanded += 1
+        if (position not in self._visitedLocations):
+            self._visitedLocations.add(position)
+            self._visitHistory.append(position)
+
+        return successors
+
+    def __getattr__(self, name):
+        # Only called for attributes this class does not have.
+        # Guard against recursion before the wrapped problem is set.
+        if (name == 'problem'):
+            raise AttributeError(name)
+
+        return getattr(self.problem, name)
+
+class CorridorFoodSearchProblem(CorridorSearchProblem):
+    """
+    `pacai.core.search.food.CompactFoodSearchProblem` over corridors.
+    """
+
+    def __init__(self, startingGameState):
+        super().__init__(CompactFoodSearchProblem(startingGameState))
+
+class CorridorPositionSearchProblem(CorridorSearchProblem):
+    """
+    `pacai.core.search.position.PositionSearchProblem` over corridors.
+    """
+
+    def __init__(self, gameState, **kwargs):
+        super().__init__(PositionSearchProblem(gameState, **kwargs))
@@ -1,5 +1,5 @@
 from pacai.core.actions import Actions
-from pacai.core.directions import Directions
+from pacai.core.grid import Grid
 from pacai.core.search.problem import SearchProblem
 
 class FoodSearchProblem(SearchProblem):
@@ -11,6 +11,10 @@ class FoodSearchProblem(SearchProblem):
     Wwhere pacmanPosition is a tuple (x, y) of integers specifying Pacman's position,
     and foodGrid is a `pacai.core.grid.Grid` of either `True` or `False`,
     specifying remaining food.
+
+    Heuristics that use `FoodSearchProblem.getPacmanPosition` and
+    `FoodSearchProblem.getFoodPositions` (instead of unpacking the state)
+    also work with the states of `CompactFoodSearchProblem`.
     """
 
     def __init__(self, startingGameState):
@@ -18,9 +22,57 @@ class FoodSearchProblem(SearchProblem):
 
         self.start = (startingGameState.getPacmanPosition(), startingGameState.getFood())
         self.walls = startingGameState.getWalls()
+        self.actionTable = Actions.getLegalActionTable(self.walls)
         self.startingGameState = startingGameState
         self.heuristicInfo = {}  # A dictionary for the heuristic to store information
 
+    def followCorridor(self, state, edge):
+        """
+        Get the state at the end of a `pacai.core.corridor.CorridorEdge` leaving this state,
+        and the cost of getting there.
+        Only the end of an edge can have food (see `FoodSearchProblem.getCorridorKeyPositions`).
+        See `pacai.core.search.corridor.CorridorSearchProblem`.
+        """
+
+        x, y = edge.target
+
+        food = state[1]
+        if (food[x][y]):
+            food = food.copy()
+            food[x][y] = False
+
+        return (edge.target, food), edge.getCost()
+
+    def getCorridorKeyPositions(self):
+        """
+        Get the positions that need to be vertices when searching over corridors.
+        """
+
+        return [self.getPacmanPosition(self.start)] + self.startingGameState.getFood().asList()
+
+    def getCorridorPosition(self, state):
+        return self.getPacmanPosition(state)
+
+    def getFoodCount(self, state):
+        return state[1].count()
+
+    def getFoodGrid(self, state):
+        """
+        Get the remaining food in a state as a `pacai.core.grid.Grid`.
+        """
+
+        return state[1]
+
+    def getFoodPositions(self, state):
+        """
+        Get a list of the positions of the remaining food in a state.
+        """
+
+        return state[1].asList()
+
+    def getPacmanPosition(self, state):
+        return state[0]
+
     def startingState(self):
         return self.start
 
@@ -34,14 +86,12 @@ class FoodSearchProblem(SearchProblem):
 
         successors = []
         self._numExpanded += 1
-        for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x, y = state[0]
-            dx, dy = Actions.directionToVector(direction)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextFood = state[1].copy()
-                nextFood[nextx][nexty] = False
-                successors.append((((nextx, nexty), nextFood), direction, 1))
+
+        x, y = state[0]
+        for direction, (nextx, nexty) in (self.actionTable.getMoves(x, y) or ()):
+            nextFood = state[1].copy()
+            nextFood[nextx][nexty] = False
+            successors.append((((nextx, nexty), nextFood), direction, 1))
 
         return successors
 
@@ -51,7 +101,7 @@ class FoodSearchProblem(SearchProblem):
         If those actions include an illegal move, return 999999.
         """
 
-        x, y = self.startingState()[0]
+        x, y = self.getPacmanPosition(self.startingState())
         cost = 0
         for action in actions:
             # figure out the next state and see whether it's legal
@@ -62,3 +112,106 @@ class FoodSearchProblem(SearchProblem):
             cost += 1
 
         return cost
+
+class CompactFoodSearchProblem(FoodSearchProblem):
+    """
+    A `FoodSearchProblem` with small integer states.
+
+    A search state in this problem is a tuple (cellId, foodBitmask).
+    Where cellId identifies Pacman's position (see `CompactFoodSearchProblem.getPosition`),
+    and bit i of foodBitmask is set if the i'th piece of the starting food
+    (see `CompactFoodSearchProblem.foodPositions`) is still there.
+    Successors and goal checks are just integer operations,
+    and states are cheap to hash and store.
+
+    Use `FoodSearchProblem.getPacmanPosition`, `FoodSearchProblem.getFoodPositions`,
+    and `FoodSearchProblem.getFoodGrid` to decode a state.
+    """
+
+    def __init__(self, startingGameState):
+        super().__init__(startingGameState)
+
+        walls = self.walls
+        height = walls.getHeight()
+
+        # Cell id to position.
+        self.positions = walls.asList(False)
+
+        # Bit i of a food mask is the food at foodPositions[i].
+        self.foodPositions = startingGameState.getFood().asList()
+
+        # Position to cell id.
+        cellIds = {}
+        for cellId in range(len(self.positions)):
+            cellIds[self.positions[cellId]] = cellId
+
+        # Position to its bit in a food mask.
+        foodBits = {}
+        for i in range(len(self.foodPositions)):
+            foodBits[self.foodPositions[i]] = 1 << i
+
+        self._cellIds = cellIds
+        self._foodBits = foodBits
+
+        # Cell id to a tuple of (action, next cell id, food bit of the next cell).
+        self._moves = []
+        for (x, y) in self.positions:
+            moves = []
+            for direction, nextPosition in (self.actionTable.getMoves(x, y) or ()):
+                moves.append((direction, cellIds[nextPosition], foodBits.get(nextPosition, 0)))
+
+            self._moves.append(tuple(moves))
+
+        position = self.start[0]
+        self._fullFoodMask = (1 << len(self.foodPositions)) - 1
+        self._foodGridMasks = [1 << (x * height + y) for (x, y) in self.foodPositions]
+
+        self.start = (cellIds[position], self._fullFoodMask)
+
+    def followCorridor(self, state, edge):
+        nextState = (self._cellIds[edge.target], state[1] & ~self._foodBits.get(edge.target, 0))
+        return nextState, edge.getCost()
+
+    def getFoodCount(self, state):
+        return bin(state[1]).count('1')
+
+    def getFoodGrid(self, state):
+        bits = 0
+        mask = state[1]
+        while (mask):
+            lowBit = mask & -mask
+            bits |= self._foodGridMasks[lowBit.bit_length() - 1]
+            mask ^= lowBit
+
+        return Grid.fromBits(self.walls.getWidth(), self.walls.getHeight(), bits)
+
+    def getFoodPositions(self, state):
+        positions = []
+
+        mask = state[1]
+        while (mask):
+            lowBit = mask & -mask
+            positions.append(self.foodPositions[lowBit.bit_length() - 1])
+            mask ^= lowBit
+
+        return positions
+
+    def getPacmanPosition(self, state):
+        return self.positions[state[0]]
+
+    def getPosition(self, cellId):
+        return self.positions[cellId]
+
+    def isGoal(self, state):
+        return state[1] == 0
+
+    def successorStates(self, state):
+        """
+        Returns successor states, the actions they require, and a cost of 1.
+        """
+
+        self._numExpanded += 1
+
+        cellId, food = state
+        return [((nextCellId, food & ~foodBit), direction, 1)
+                for (direction, nextCellId, foodBit) in self._moves[cellId]]
@@ -3,8 +3,13 @@ A heuristic function estimates the cost from the current state to the nearest
 goal in the provided `pacai.core.search.problem.SearchProblem`.
 """
 
+import collections
+
 from pacai.core import distance
 
+# The maximum number of heuristic values a `HeuristicCache` keeps.
+MAX_CACHED_HEURISTICS = 100000
+
 def null(state, problem = None):
     """
     This heuristic is trivial.
@@ -35,6 +40,57 @@ def euclidean(position, problem):
 def numFood(state, problem):
     """
     This heuristic is the amount of food left to on the board.
+    The problem decodes its own states (see `pacai.core.search.food.FoodSearchProblem`).
+    """
+
+    return problem.getFoodCount(state)
+
+class HeuristicCache(object):
     """
+    Wraps a heuristic and remembers its values (by search state), evicting the least recently used.
+    The wrapper is called just like the heuristic it wraps.
+
+    Heuristic values can depend on the problem (e.g. its goal),
+    so the cache (and its statistics) starts over whenever it sees a new problem.
+    """
+
+    def __init__(self, heuristic, maxSize = MAX_CACHED_HEURISTICS):
+        self.heuristic = heuristic
+        self.maxSize = maxSize
+
+        self.hits = 0
+        self.misses = 0
+
+        self._problem = None
+        self._values = collections.OrderedDict()
+
+    def clear(self):
+        self.hits = 0
+        self.misses = 0
+
+        self._problem = None
+        self._values.clear()
+
+    def __call__(self, state, problem = None):
+        if (problem is not self._problem):
+            self.clear()
+            self._problem = problem
+
+        value = self._values.get(state)
+        if (value is not None):
+            self.hits += 1
+            self._values.move_to_end(state)
+            return value
+
+        self.misses += 1
+
+        value = self.heuristic(state, problem)
+        self._values[state] = value
+
+        if (len(self._values) > self.maxSize):
+            self._values.popitem(last = False)
+
+        return value
 
-    return state[1].count()
+    def __str__(self):
+        return 'HeuristicCache(%s)' % (str(self.heuristic))
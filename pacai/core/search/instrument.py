@@ -0,0 +1,242 @@
+"""
+Measurements of where a search spends its time and memory.
+
+A `SearchInstrumentation` runs a search function on an `InstrumentedSearchProblem`
+(and, through `SearchInstrumentation.wrapHeuristic`, with a timed heuristic)
+and produces one flat record per search that can be written out as a line of JSON.
+Instrumentation is optional and adds overhead of its own
+(tracking memory with `tracemalloc` especially), so only turn it on while profiling.
+"""
+
+import json
+import logging
+import time
+import tracemalloc
+
+from pacai.core.search.problem import InvertibleSearchProblem
+from pacai.core.search.problem import SearchProblem
+
+class InstrumentedSearchProblem(SearchProblem):
+    """
+    A search problem that counts and times the successor calls of the problem it wraps.
+    Everything else (including the wrapped problem's own bookkeeping)
+    is left to the wrapped problem, so heuristics for the wrapped problem work on this one too.
+    """
+
+    def __init__(self, problem):
+        super().__init__()
+
+        self.problem = problem
+
+        # Successors produced, and the ones whose state had already been produced before.
+        self.generated = 0
+        self.duplicates = 0
+
+        # The most states that had been produced but not yet expanded.
+        # For the graph searches, this is the peak size of the frontier.
+        self.peakFrontier = 1
+
+        self.successorSeconds = 0.0
+
+        self._seen = {problem.startingState()}
+
+    def actionsCost(self, actions):
+        return self.problem.actionsCost(actions)
+
+    def expandActions(self, actions):
+        return self.problem.expandActions(actions)
+
+    def hasSmallIntegerCosts(self):
+        return self.problem.hasSmallIntegerCosts()
+
+    def isGoal(self, state):
+        return self.problem.isGoal(state)
+
+    def startingState(self):
+        return self.problem.startingState()
+
+    def successorStates(self, state):
+        return self._countSuccessors(self.problem.successorStates, state)
+
+    def _countSuccessors(self, successorFunction, state):
+        startTime = time.perf_counter()
+        successors = successorFunction(state)
+        self.successorSeconds += time.perf_counter() - startTime
+
+        self._numExpanded += 1
+        self.generated += len(successors)
+
+        for successor in successors:
+            if (successor[0] in self._seen):
+                self.duplicates += 1
+            else:
+                self._seen.add(successor[0])
+
+        self.peakFrontier = max(self.peakFrontier, len(self._seen) - self._numExpanded)
+
+        return successors
+
+    def __getattr__(self, name):
+        # Only called for attributes this class does not have.
+        # Guard against recursion before the wrapped problem is set.
+        if (name == 'problem'):
+            raise AttributeError(name)
+
+        return getattr(self.problem, name)
+
+class InstrumentedInvertibleSearchProblem(InstrumentedSearchProblem, InvertibleSearchProblem):
+    """
+    An `InstrumentedSearchProblem` for an invertible problem,
+    so it can still be searched backwards (e.g. by `pacai.core.search.bidirectional`).
+    Predecessor calls are counted and timed just like successor calls.
+    """
+
+    def __init__(self, problem):
+        super().__init__(problem)
+
+        goal = problem.goalState()
+        if (goal is not None):
+            self._seen.add(goal)
+
+    def goalState(self):
+        return self.problem.goalState()
+
+    def predecessorStates(self, state):
+        return self._countSuccessors(self.problem.predecessorStates, state)
+
+def instrumentProblem(problem):
+    """
+    Wrap a problem in the right kind of instrumented problem.
+    """
+
+    if (isinstance(problem, InvertibleSearchProblem)):
+        return InstrumentedInvertibleSearchProblem(problem)
+
+    return InstrumentedSearchProblem(problem)
+
+class SearchInstrumentation(object):
+    """
+    Runs searches and records how they went.
+
+    If trackMemory is set,
+    the peak memory allocated during each search is measured with `tracemalloc`
+    (which slows the search down considerably).
+    The peak includes the set of states the instrumentation keeps to count duplicates.
+    """
+
+    def __init__(self, trackMemory = True):
+        self.trackMemory = trackMemory
+
+        # The record of the last search run.
+        self.record = None
+
+        self._heuristicCalls = 0
+        self._heuristicSeconds = 0.0
+
+    def run(self, searchFunction, problem, name = None):
+        """
+        Run a search function on a problem (wrapped by `instrumentProblem`).
+        The search function takes just the problem,
+        a heuristic should already be bound to it
+        (wrapped in `SearchInstrumentation.wrapHeuristic`).
+
+        Returns the actions the search found
+        and leaves its record in `SearchInstrumentation.record`.
+        """
+
+        if (name is None):
+            name = getattr(searchFunction, '__name__', str(searchFunction))
+
+        self._heuristicCalls = 0
+        self._heuristicSeconds = 0.0
+
+        instrumented = instrumentProblem(problem)
+
+        startedTracing = False
+        if (self.trackMemory):
+            if (not tracemalloc.is_tracing()):
+                tracemalloc.start()
+                startedTracing = True
+            elif (hasattr(tracemalloc, 'reset_peak')):
+                tracemalloc.reset_peak()
+            else:
+                # Before Python 3.9, the peak can only be reset by restarting,
+                # which would throw away the traces of whoever is already tracing.
+                logging.info('Tracing was already on and its peak cannot be reset,'
+                        + ' so the peak memory of \'%s\' is not just from this search.' % (name))
+
+            startMemory = tracemalloc.get_traced_memory()[0]
+
+        startTime = time.perf_counter()
+
+        try:
+            actions = searchFunction(instrumented)
+        finally:
+            seconds = time.perf_counter() - startTime
+
+            peakMemory = None
+            if (self.trackMemory):
+                peakMemory = max(0, tracemalloc.get_traced_memory()[1] - startMemory)
+
+                if (startedTracing):
+                    tracemalloc.stop()
+
+        pathLength = None
+        pathCost = None
+        if (actions is not None):
+            expanded = problem.expandActions(actions)
+            pathLength = len(expanded)
+            pathCost = problem.actionsCost(expanded)
+
+        self.record = {
+            'search': name,
+            'problem': type(problem).__name__,
+            'found': (actions is not None),
+            'pathLength': pathLength,
+            'pathCost': pathCost,
+            'expanded': instrumented.getExpandedCount(),
+            'generated': instrumented.generated,
+            'duplicates': instrumented.duplicates,
+            'peakFrontier': instrumented.peakFrontier,
+            'seconds': seconds,
+            'expandedPerSecond': instrumented.getExpandedCount() / max(seconds, 1e-9),
+            'successorSeconds': instrumented.successorSeconds,
+            'heuristicCalls': self._heuristicCalls,
+            'heuristicSeconds': self._heuristicSeconds,
+            # Time spent in the search itself (e.g. managing the frontier).
+            'searchSeconds': max(0.0,
+                    seconds - instrumented.successorSeconds - self._heuristicSeconds),
+            'peakMemoryBytes': peakMemory,
+        }
+
+        return actions
+
+    def wrapHeuristic(self, heuristic):
+        """
+        Get a heuristic that times every call to the given one for this instrumentation's records.
+        """
+
+        def timedHeuristic(state, problem = None):
+            startTime = time.perf_counter()
+            value = heuristic(state, problem)
+            self._heuristicSeconds += time.perf_counter() - startTime
+            self._heuristicCalls += 1
+
+            return value
+
+        return timedHeuristic
+
+    def writeRecord(self, path = None):
+        """
+        Emit the last record as a line of JSON.
+        The line is appended to the file at path if one is given, and logged otherwise.
+        """
+
+        line = json.dumps(self.record, sort_keys = True)
+
+        if (path is None):
+            logging.info('Search record: %s' % (line))
+            return
+
+        with open(path, 'a') as file:
+            file.write(line + '\n')
@@ -0,0 +1,121 @@
+"""
+A compact representation for the nodes of a search tree.
+
+Instead of every frontier entry carrying the full list of actions that reached it
+(which copies the whole path on every push),
+a node is just an integer index into flat parallel lists that hold its state,
+its parent, the action that reached it, and its path cost.
+The path is only rebuilt (by following parents) once a goal is found.
+
+Searches that need to free nodes as they go use linked `SearchNode` objects instead.
+"""
+
+ROOT_PARENT = -1
+
+class SearchTree(object):
+    """
+    The nodes generated by a single search.
+    Nodes are ints handed out by `SearchTree.addRoot` and `SearchTree.addChild`.
+    """
+
+    def __init__(self):
+        self._states = []
+        self._parents = []
+        self._actions = []
+        self._costs = []
+
+    def addChild(self, parent, state, action, stepCost = 1):
+        """
+        Add a node for reaching state by taking action from the parent node.
+        Returns the new node.
+        """
+
+        node = len(self._states)
+
+        self._states.append(state)
+        self._parents.append(parent)
+        self._actions.append(action)
+        self._costs.append(self._costs[parent] + stepCost)
+
+        return node
+
+    def addRoot(self, state):
+        """
+        Add a node for a state that the search starts at (with no actions and no cost).
+        Returns the new node.
+        """
+
+        node = len(self._states)
+
+        self._states.append(state)
+        self._parents.append(ROOT_PARENT)
+        self._actions.append(None)
+        self._costs.append(0)
+
+        return node
+
+    def getAction(self, node):
+        return self._actions[node]
+
+    def getCost(self, node):
+        """
+        Get the total cost of the path to a node.
+        """
+
+        return self._costs[node]
+
+    def getParent(self, node):
+        return self._parents[node]
+
+    def getPath(self, node):
+        """
+        Get the list of actions that lead from the root to a node.
+        """
+
+        path = []
+
+        while (self._parents[node] != ROOT_PARENT):
+            path.append(self._actions[node])
+            node = self._parents[node]
+
+        path.reverse()
+        return path
+
+    def getState(self, node):
+        return self._states[node]
+
+    def __len__(self):
+        return len(self._states)
+
+class SearchNode(object):
+    """
+    A single search node that links to its parent.
+    Unlike the nodes in a `SearchTree`, these are freed as soon as nothing refers to them,
+    which lets searches that throw nodes away (like the memory-bounded ones) stay within a budget.
+    """
+
+    __slots__ = ('state', 'parent', 'action', 'cost')
+
+    def __init__(self, state, parent = None, action = None, stepCost = 0):
+        self.state = state
+        self.parent = parent
+        self.action = action
+
+        self.cost = stepCost
+        if (parent is not None):
+            self.cost += parent.cost
+
+    def getPath(self):
+        """
+        Get the list of actions that lead from the root to this node.
+        """
+
+        path = []
+
+        node = self
+        while (node.parent is not None):
+            path.append(node.action)
+            node = node.parent
+
+        path.reverse()
+        return path
@@ -0,0 +1,385 @@
+"""
+Run several search configurations on the same problem at once and keep the first good plan.
+
+On a new layout it is hard to know which search function and heuristic will finish first.
+`runPortfolio` starts every `PortfolioConfiguration` in its own worker process,
+takes the first plan that is acceptable, and stops the rest.
+The winning configuration is remembered (in memory, and on disk if a file is set)
+so later runs on the same layout and problem start it first.
+"""
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import tempfile
+import time
+
+from pacai.core.search.heuristic import HeuristicCache
+from pacai.util import reflection
+
+# Take the first plan from a configuration that is known to find the cheapest plan.
+MODE_OPTIMAL = 'optimal'
+
+# Take the first plan from any configuration.
+MODE_FIRST = 'first'
+
+MODES = (MODE_OPTIMAL, MODE_FIRST)
+
+# Where short search function and heuristic names are looked up.
+SEARCH_MODULE = 'pacai.core.search.search'
+HEURISTIC_MODULE = 'pacai.core.search.heuristic'
+
+# How often (in seconds) to check that the configurations' processes are still alive.
+POLL_SECONDS = 0.1
+
+# Winning configurations are kept on disk between runs if this names a file.
+WINNERS_FILE_ENV_VAR = 'PACAI_PORTFOLIO_FILE'
+
+# The configuration that won on each layout and problem (keyed by `getPortfolioKey`).
+_winners = None
+
+# Where to keep the winning configurations between runs (None to only keep them in memory).
+_winnersPath = os.environ.get(WINNERS_FILE_ENV_VAR) or None
+
+class PortfolioConfiguration(object):
+    """
+    A search function (and, optionally, a heuristic) to run as part of a portfolio.
+    Functions and heuristics are qualified names,
+    bare names are looked up in `pacai.core.search.search` and `pacai.core.search.heuristic`.
+    Optimal configurations are trusted to return the cheapest plan
+    (e.g. A* with an admissible heuristic).
+    """
+
+    def __init__(self, fn, heuristic = None, optimal = True):
+        if ('.' not in fn):
+            fn = SEARCH_MODULE + '.' + fn
+
+        if (heuristic is not None and '.' not in heuristic):
+            heuristic = HEURISTIC_MODULE + '.' + heuristic
+
+        self.fn = fn
+        self.heuristic = heuristic
+        self.optimal = optimal
+
+    def getKey(self):
+        """
+        A string that identifies this configuration (and can be parsed by `parseConfigurations`).
+        """
+
+        key = self.fn
+        if (self.heuristic is not None):
+            key += ':' + self.heuristic
+
+        if (not self.optimal):
+            key += ':suboptimal'
+
+        return key
+
+    def __eq__(self, other):
+        return isinstance(other, PortfolioConfiguration) and self.getKey() == other.getKey()
+
+    def __hash__(self):
+        return hash(self.getKey())
+
+    def __str__(self):
+        return self.getKey()
+
+class PortfolioResult(object):
+    """
+    The plan a portfolio settled on and how it got there.
+    """
+
+    def __init__(self, configuration, actions, cost, expanded, visitHistory, seconds, finished):
+        # The configuration that found the plan.
+        self.configuration = configuration
+
+        # The plan (None if no configuration found one).
+        self.actions = actions
+        self.cost = cost
+
+        # The nodes expanded and positions visited by the winning search.
+        self.expanded = expanded
+        self.visitHistory = visitHistory
+
+        # Wall time for the whole portfolio.
+        self.seconds = seconds
+
+        # The number of configurations that had finished (or failed) by the time one was chosen.
+        self.finished = finished
+
+def parseConfigurations(text):
+    """
+    Parse configurations written as `fn[:heuristic][:suboptimal]` and separated by semicolons,
+    e.g. 'astar:manhattan;ucs;dfs:suboptimal'.
+    """
+
+    configurations = []
+
+    for item in text.split(';'):
+        fields = [field.strip() for field in item.split(':')]
+        if (fields == ['']):
+            continue
+
+        optimal = True
+        if (fields[-1] in ('optimal', 'suboptimal')):
+            optimal = (fields.pop() == 'optimal')
+
+        if (len(fields) not in (1, 2) or '' in fields):
+            raise ValueError('Bad portfolio configuration: \'%s\'.' % (item))
+
+        configurations.append(PortfolioConfiguration(*fields, optimal = optimal))
+
+    return configurations
+
+def getPortfolioKey(gameState, problemType):
+    """
+    Get the key that winning configurations are remembered by:
+    the layout (walls, food, and agents) and the type of search problem.
+    """
+
+    digest = hashlib.sha1()
+    digest.update('\n'.join(gameState.getInitialLayout().layoutText).encode())
+    digest.update(b'\0')
+    digest.update(_getQualifiedName(problemType).encode())
+
+    return digest.hexdigest()
+
+def getWinner(key):
+    """
+    Get the key of the configuration (see `PortfolioConfiguration.getKey`)
+    that last won for a portfolio key (see `getPortfolioKey`), or None.
+    """
+
+    return _getWinners().get(key)
+
+def getWinnersPath():
+    return _winnersPath
+
+def setWinnersPath(path):
+    """
+    Set the file that winning configurations are persisted to.
+    Pass None to stop using the disk.
+    The default comes from the PACAI_PORTFOLIO_FILE environment variable.
+    """
+
+    global _winners, _winnersPath
+    _winnersPath = path
+    _winners = None
+
+def orderConfigurations(configurations, key):
+    """
+    Put the configuration that last won for this key (if any) first.
+    """
+
+    winner = getWinner(key)
+
+    first = [configuration for configuration in configurations
+            if configuration.getKey() == winner]
+    rest = [configuration for configuration in configurations
+            if configuration.getKey() != winner]
+
+    return first + rest
+
+def runPortfolio(gameState, problemType, configurations, mode = MODE_OPTIMAL, processes = None):
+    """
+    Search the problem made by problemType(gameState) with every configuration at once,
+    each in its own process (up to processes of them at a time, default one per configuration).
+    The problem type and game state must be picklable
+    (e.g. a class defined at the top level of a module, not a lambda).
+
+    In `MODE_FIRST`, the first plan found by any configuration is used.
+    In `MODE_OPTIMAL`, the first plan found by an optimal configuration is used,
+    and plans from other configurations only if every optimal configuration fails
+    (then the cheapest is used).
+    As soon as a plan is chosen, the searches that are still running are stopped.
+    A configuration whose process dies (e.g. to the OOM killer) counts as failed.
+
+    Returns a `PortfolioResult`.
+    """
+
+    if (mode not in MODES):
+        raise ValueError('Unknown portfolio mode: \'%s\'.' % (mode))
+
+    if (len(configurations) == 0):
+        raise ValueError('A portfolio needs at least one configuration.')
+
+    key = getPortfolioKey(gameState, problemType)
+    configurations = orderConfigurations(configurations, key)
+
+    if (processes is None):
+        processes = len(configurations)
+    processes = max(1, min(processes, len(configurations)))
+
+    startTime = time.time()
+    results = multiprocessing.Queue()
+
+    waiting = list(range(len(configurations)))
+    running = {}
+    started = []
+
+    chosen = None
+    fallback = None
+    finished = 0
+
+    try:
+        while (chosen is None and finished < len(configurations)):
+            while (len(waiting) > 0 and len(running) < processes):
+                index = waiting.pop(0)
+                configuration = configurations[index]
+
+                process = multiprocessing.Process(target = _runWorker,
+                        args = (results, index, gameState, problemType,
+                                configuration.fn, configuration.heuristic))
+                process.daemon = True
+                process.start()
+
+                running[index] = process
+                started.append(process)
+
+            messages = []
+
+            try:
+                messages.append(results.get(timeout = POLL_SECONDS))
+            except queue.Empty:
+                # A process that died (e.g. to the OOM killer) never sends its result.
+                # Ones that finished normally sent theirs before exiting, so collect those first.
+                dead = [index for (index, process) in running.items() if (not process.is_alive())]
+
+                while (True):
+                    try:
+                        messages.append(results.get_nowait())
+                    except queue.Empty:
+                        break
+
+                reported = [message[0] for message in messages]
+                for index in dead:
+                    if (index not in reported):
+                        messages.append((index, None,
+                                'Worker process died (exit code %s).' % (running[index].exitcode)))
+
+            for (index, outcome, error) in messages:
+                running.pop(index, None)
+                finished += 1
+
+                configuration = configurations[index]
+
+                if (error is not None):
+                    logging.warning('Portfolio configuration %s failed: %s' %
+                            (configuration, error))
+                    continue
+
+                if (outcome[0] is None):
+                    logging.debug('Portfolio configuration %s found no plan.' % (configuration))
+                    continue
+
+                if (mode == MODE_FIRST or configuration.optimal):
+                    chosen = (configuration, outcome)
+                    break
+
+                if (fallback is None or outcome[1] < fallback[1][1]):
+                    fallback = (configuration, outcome)
+    finally:
+        # Stop any searches that are still running.
+        for process in started:
+            if (process.is_alive()):
+                process.terminate()
+
+        for process in started:
+            process.join()
+
+    if (chosen is None):
+        chosen = fallback
+
+    seconds = time.time() - startTime
+
+    if (chosen is None):
+        return PortfolioResult(None, None, None, 0, [], seconds, finished)
+
+    configuration, (actions, cost, expanded, visitHistory) = chosen
+    _recordWinner(key, configuration)
+
+    return PortfolioResult(configuration, actions, cost, expanded, visitHistory, seconds, finished)
+
+def _runWorker(results, index, gameState, problemType, fn, heuristic):
+    """
+    Run a single configuration in its own process and send the result back.
+    """
+
+    results.put(_runConfiguration(index, gameState, problemType, fn, heuristic))
+
+def _runConfiguration(index, gameState, problemType, fn, heuristic):
+    """
+    Run a single configuration (in a worker process).
+    Returns (index, (actions, cost, expanded, visit history), error).
+    """
+
+    try:
+        problem = problemType(gameState)
+
+        function = reflection.qualifiedImport(fn)
+        if (heuristic is not None):
+            heuristicFunction = HeuristicCache(reflection.qualifiedImport(heuristic))
+            actions = function(problem, heuristic = heuristicFunction)
+        else:
+            actions = function(problem)
+
+        if (actions is None):
+            return (index, (None, None, problem.getExpandedCount(), []), None)
+
+        actions = problem.expandActions(actions)
+        cost = problem.actionsCost(actions)
+
+        return (index, (actions, cost, problem.getExpandedCount(), problem.getVisitHistory()), None)
+    except Exception as ex:
+        return (index, None, '%s: %s' % (type(ex).__name__, str(ex)))
+
+def _getQualifiedName(value):
+    if (isinstance(value, str)):
+        return value
+
+    return '%s.%s' % (getattr(value, '__module__', ''), getattr(value, '__qualname__', str(value)))
+
+def _getWinners():
+    global _winners
+
+    if (_winners is not None):
+        return _winners
+
+    _winners = {}
+
+    if (_winnersPath is not None and os.path.isfile(_winnersPath)):
+        try:
+            with open(_winnersPath, 'r') as file:
+                _winners = json.load(file)
+        except (OSError, ValueError) as ex:
+            logging.warning("Unable to read portfolio winners '%s': %s." % (_winnersPath, str(ex)))
+            _winners = {}
+
+    return _winners
+
+def _recordWinner(key, configuration):
+    winners = _getWinners()
+    if (winners.get(key) == configuration.getKey()):
+        return
+
+    winners[key] = configuration.getKey()
+
+    if (_winnersPath is None):
+        return
+
+    # Write to the side and then move into place, so concurrent readers never see a partial file.
+    directory = os.path.dirname(os.path.abspath(_winnersPath))
+
+    try:
+        os.makedirs(directory, exist_ok = True)
+
+        handle, tempPath = tempfile.mkstemp(dir = directory, suffix = '.tmp')
+        with os.fdopen(handle, 'w') as file:
+            json.dump(winners, file, indent = 4, sort_keys = True)
+
+        os.replace(tempPath, _winnersPath)
+    except OSError as ex:
+        logging.warning("Unable to save portfolio winners '%s': %s." % (_winnersPath, str(ex)))
@@ -1,14 +1,15 @@
 from pacai.core.actions import Actions
-from pacai.core.directions import Directions
-from pacai.core.search.problem import SearchProblem
+from pacai.core.search.problem import InvertibleSearchProblem
 
 DEFAULT_COST_FUNCTION = lambda x: 1
 DEFAULT_GOAL_POSITION = (1, 1)
 
-class PositionSearchProblem(SearchProblem):
+class PositionSearchProblem(InvertibleSearchProblem):
     """
     A `pacai.core.search.problem.SearchProblem` for finding a specific location on the board.
     The state space consists of (x, y) positions.
+    Since every move can be undone, this problem can also be searched backwards from the goal
+    (see `pacai.core.search.problem.InvertibleSearchProblem`).
 
     Note that this search problem is fully specified and should be used as an example.
     """
@@ -24,6 +25,7 @@ class PositionSearchProblem(SearchProblem):
         super().__init__()
 
         self.walls = gameState.getWalls()
+        self.actionTable = Actions.getLegalActionTable(self.walls)
         self.goal = goal
         self.costFn = costFn
 
@@ -34,9 +36,34 @@ class PositionSearchProblem(SearchProblem):
         if (self.startState is None):
             raise ValueError("Could not find starting location.")
 
+    def followCorridor(self, state, edge):
+        """
+        Get the state at the end of a `pacai.core.corridor.CorridorEdge` leaving this state,
+        and the cost of getting there.
+        See `pacai.core.search.corridor.CorridorSearchProblem`.
+        """
+
+        return edge.target, sum(self.costFn(cell) for cell in edge.cells)
+
+    def getCorridorKeyPositions(self):
+        """
+        Get the positions that need to be vertices when searching over corridors.
+        """
+
+        return [position for position in (self.startState, self.goal) if position is not None]
+
+    def getCorridorPosition(self, state):
+        return state
+
+    def goalState(self):
+        return self.goal
+
     def startingState(self):
         return self.startState
 
+    def hasSmallIntegerCosts(self):
+        return (self.costFn is DEFAULT_COST_FUNCTION)
+
     def isGoal(self, state):
         if (state != self.goal):
             return False
@@ -58,17 +85,33 @@ class PositionSearchProblem(SearchProblem):
 
         successors = []
 
-        for action in Directions.CARDINAL:
-            x, y = state
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
+        x, y = state
+        for action, nextState in (self.actionTable.getMoves(x, y) or ()):
+            cost = self.costFn(nextState)
+            successors.append((nextState, action, cost))
+
+        self._recordExpansion(state)
+
+        return successors
 
-            if (not self.walls[nextx][nexty]):
-                nextState = (nextx, nexty)
-                cost = self.costFn(nextState)
+    def predecessorStates(self, state):
+        """
+        Returns the states that can move into this state, the actions that do it,
+        and the cost of those actions.
+        """
 
-                successors.append((nextState, action, cost))
+        predecessors = []
 
+        x, y = state
+        cost = self.costFn(state)
+        for action, previousState in (self.actionTable.getMoves(x, y) or ()):
+            predecessors.append((previousState, Actions.reverseDirection(action), cost))
+
+        self._recordExpansion(state)
+
+        return predecessors
+
+    def _recordExpansion(self, state):
         # Bookkeeping for display purposes (the highlight in the GUI).
         self._numExpanded += 1
         if (state not in self._visitedLocations):
@@ -78,8 +121,6 @@ class PositionSearchProblem(SearchProblem):
             coordinates = state
             self._visitHistory.append(coordinates)
 
-        return successors
-
     def actionsCost(self, actions):
         """
         Returns the cost of a particular sequence of actions.
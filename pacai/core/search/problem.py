@@ -43,12 +43,33 @@ class SearchProblem(abc.ABC):
 
         pass
 
+    def expandActions(self, actions):
+        """
+        Turn the actions returned by a search on this problem into the actions an agent takes.
+        For most problems these are the same,
+        but problems whose actions are bigger steps (like `pacai.core.search.corridor`)
+        break them back down.
+        """
+
+        return actions
+
     def getExpandedCount(self):
         return self._numExpanded
 
     def getVisitHistory(self):
         return self._visitHistory
 
+    def hasSmallIntegerCosts(self):
+        """
+        Answers the question:
+        Is every step cost a small non-negative integer?
+
+        If so, the searches can keep their frontier in a
+        `pacai.util.priorityQueue.BucketPriorityQueue`.
+        """
+
+        return False
+
     @abc.abstractmethod
     def isGoal(self, state):
         """
@@ -82,3 +103,31 @@ class SearchProblem(abc.ABC):
         """
 
         pass
+
+class InvertibleSearchProblem(SearchProblem):
+    """
+    A `SearchProblem` with a single goal state that can also be searched backwards from the goal
+    (e.g. by `pacai.core.search.bidirectional`).
+    """
+
+    @abc.abstractmethod
+    def goalState(self):
+        """
+        Returns the only goal state for the search problem,
+        or None if this instance does not have a single goal (and cannot be searched backwards).
+        """
+
+        pass
+
+    @abc.abstractmethod
+    def predecessorStates(self, state):
+        """
+        The inverse of `SearchProblem.successorStates`:
+        What states can move into this state?
+
+        Returns a list of tuples with three values:
+        (predecessor state, action that moves from the predecessor to this state,
+        cost of taking that action).
+        """
+
+        pass
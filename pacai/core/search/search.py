@@ -1,4 +1,6 @@
 from pacai.core.directions import Directions
+from pacai.core.search import bidirectional
+from pacai.core.search import bounded
 from pacai.student import search
 
 def tinyMazeSearch(problem):
@@ -26,3 +28,15 @@ astar = search.aStarSearch
 
 uniformCostSearch = search.uniformCostSearch
 ucs = search.uniformCostSearch
+
+iterativeDeepeningAStarSearch = bounded.iterativeDeepeningAStarSearch
+idastar = bounded.iterativeDeepeningAStarSearch
+
+memoryBoundedAStarSearch = bounded.memoryBoundedAStarSearch
+mbastar = bounded.memoryBoundedAStarSearch
+
+bidirectionalBreadthFirstSearch = bidirectional.bidirectionalBreadthFirstSearch
+bibfs = bidirectional.bidirectionalBreadthFirstSearch
+
+bidirectionalUniformCostSearch = bidirectional.bidirectionalUniformCostSearch
+biucs = bidirectional.bidirectionalUniformCostSearch
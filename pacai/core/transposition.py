@@ -0,0 +1,168 @@
+"""
+Transposition tables for the adversarial searches.
+
+Game trees reach the same position through many different move orders
+(a ghost stepping back and forth, two ghosts moving in either order, ...).
+A `TranspositionTable` remembers the value of each position searched
+(keyed by the state's hash, the agent to move, and the remaining depth),
+so the search can reuse it instead of searching the same subtree again.
+
+For alpha-beta, a value is often only a bound (the search was cut off),
+so each entry also records whether its value is exact, a lower bound, or an upper bound.
+"""
+
+# The kinds of values an entry can hold.
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+# The default number of buckets (each bucket holds two entries).
+DEFAULT_SIZE = 2 ** 16
+
+class TranspositionEntry(object):
+    """
+    What a search learned about a single position.
+    """
+
+    __slots__ = ('key', 'depth', 'value', 'bound', 'action', 'generation')
+
+    def __init__(self, key, depth, value, bound, action, generation):
+        self.key = key
+        self.depth = depth
+        self.value = value
+        self.bound = bound
+
+        # The best action found from the position (if any).
+        self.action = action
+
+        # The search (see `TranspositionTable.newSearch`) that stored this entry.
+        self.generation = generation
+
+class TranspositionTable(object):
+    """
+    A fixed number of buckets, each with two entries:
+    a depth-preferred entry that only gives way to an entry for a search at least as deep
+    (or to any entry once it is left over from an earlier search),
+    and an always-replace entry that takes whatever the depth-preferred entry turns down.
+    Deep entries saved the most work and stay put,
+    while the always-replace entry keeps the most recent shallow results.
+    """
+
+    def __init__(self, size = DEFAULT_SIZE):
+        size = int(size)
+        if (size <= 0):
+            raise ValueError('A transposition table needs at least one bucket: %d.' % (size))
+
+        self._size = size
+
+        # Bucket i holds entries 2i (depth-preferred) and 2i + 1 (always-replace).
+        self._entries = [None] * (2 * size)
+
+        self._generation = 0
+
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+        # Entries for one position that were pushed out by another.
+        self.overwrites = 0
+
+    def clear(self):
+        """
+        Forget all the entries and statistics.
+        """
+
+        self._entries = [None] * (2 * self._size)
+        self._generation = 0
+
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def getHitRate(self):
+        """
+        Get the fraction of probes that found an entry (0 if there have been no probes).
+        """
+
+        if (self.probes == 0):
+            return 0.0
+
+        return self.hits / self.probes
+
+    def getSize(self):
+        return self._size
+
+    def newSearch(self):
+        """
+        Note that a new search (e.g. for the next move) is starting.
+        Entries from earlier searches are still used,
+        but no longer hold on to their depth-preferred slot.
+        """
+
+        self._generation += 1
+
+    def probe(self, state, agentIndex, depth):
+        """
+        Get the `TranspositionEntry` for a position, or None if there is not one.
+        """
+
+        self.probes += 1
+
+        key = (hash(state), agentIndex, depth)
+        index = 2 * (hash(key) % self._size)
+
+        for entry in (self._entries[index], self._entries[index + 1]):
+            if (entry is not None and entry.key == key):
+                self.hits += 1
+                return entry
+
+        return None
+
+    def store(self, state, agentIndex, depth, value, bound = EXACT, action = None):
+        """
+        Remember what a search learned about a position.
+        """
+
+        self.stores += 1
+
+        key = (hash(state), agentIndex, depth)
+        index = 2 * (hash(key) % self._size)
+        entry = TranspositionEntry(key, depth, value, bound, action, self._generation)
+
+        preferred = self._entries[index]
+        if (preferred is None or preferred.key == key or depth >= preferred.depth
+                or preferred.generation != self._generation):
+            self._entries[index] = entry
+
+            if (preferred is not None and preferred.key != key):
+                # The old entry still gets a chance in the always-replace slot.
+                self._replace(index + 1, preferred)
+            elif (self._entries[index + 1] is not None and self._entries[index + 1].key == key):
+                # Do not leave an older entry for the same position behind.
+                self._entries[index + 1] = None
+        else:
+            self._replace(index + 1, entry)
+
+    def __len__(self):
+        return sum([1 for entry in self._entries if entry is not None])
+
+    def _replace(self, index, entry):
+        old = self._entries[index]
+        if (old is not None and old.key != entry.key):
+            self.overwrites += 1
+
+        self._entries[index] = entry
+
+def getBound(value, alpha, beta):
+    """
+    Get the kind of value an alpha-beta search returned, given the window it searched with.
+    """
+
+    if (value <= alpha):
+        return UPPER_BOUND
+
+    if (value >= beta):
+        return LOWER_BOUND
+
+    return EXACT
@@ -0,0 +1,127 @@
+"""
+Zobrist hashing for game states.
+
+A Zobrist hash assigns a random key to every feature a state can have
+(a food pellet on a cell, an agent in a specific configuration, a score, ...),
+and hashes a state as the XOR of the keys of its features.
+Since XOR is its own inverse, a successor's hash can be updated by XORing out the features
+that went away and XORing in the ones that appeared, instead of rehashing the whole state.
+"""
+
+import hashlib
+import random
+import weakref
+
+KEY_BITS = 64
+
+# Keys are drawn from a private generator so hashing never disturbs the game's random stream.
+SEED = 140
+
+_tables = weakref.WeakKeyDictionary()
+
+class ZobristTable(object):
+    """
+    The random keys for all the features of the states on a single layout.
+    Board features (food and capsules) are precomputed,
+    agent configurations and scores are made lazily the first time they are seen.
+    Lazy keys are derived from the feature itself (not from the order features are seen in),
+    so every table for the same layout agrees, even across processes.
+    """
+
+    def __init__(self, layout):
+        self._rng = random.Random(SEED)
+        self._height = layout.height
+
+        numCells = layout.width * layout.height
+        self._foodKeys = [self._rng.getrandbits(KEY_BITS) for i in range(numCells)]
+        self._capsuleKeys = [self._rng.getrandbits(KEY_BITS) for i in range(numCells)]
+
+        # Keyed by (isOver, isWin).
+        self._flagKeys = {
+            (False, False): 0,
+            (True, False): self._rng.getrandbits(KEY_BITS),
+            (True, True): self._rng.getrandbits(KEY_BITS),
+            (False, True): self._rng.getrandbits(KEY_BITS),
+        }
+
+        self._agentKeys = {}
+        self._scoreKeys = {}
+
+    def agent(self, agentIndex, snapshot):
+        """
+        Get the key for an agent being in the given configuration,
+        as returned by `pacai.core.agentstate.AgentState.getSnapshot`.
+        """
+
+        key = (agentIndex, snapshot)
+
+        value = self._agentKeys.get(key)
+        if (value is None):
+            value = _deriveKey('agent', agentIndex, snapshot)
+            self._agentKeys[key] = value
+
+        return value
+
+    def capsule(self, x, y):
+        return self._capsuleKeys[x * self._height + y]
+
+    def flags(self, isOver, isWin):
+        return self._flagKeys[(isOver, isWin)]
+
+    def food(self, x, y):
+        return self._foodKeys[x * self._height + y]
+
+    def foodGrid(self, grid):
+        """
+        Get the combined key for all the food in a grid.
+        """
+
+        value = 0
+
+        bits = grid.getBits()
+        while (bits):
+            lowBit = bits & -bits
+            value ^= self._foodKeys[lowBit.bit_length() - 1]
+            bits ^= lowBit
+
+        return value
+
+    def score(self, score):
+        value = self._scoreKeys.get(score)
+        if (value is None):
+            value = _deriveKey('score', score)
+            self._scoreKeys[score] = value
+
+        return value
+
+def getTable(layout):
+    """
+    Get the (shared) Zobrist table for a layout, building it on first use.
+    """
+
+    table = _tables.get(layout)
+    if (table is None):
+        table = ZobristTable(layout)
+        _tables[layout] = table
+
+    return table
+
+def _deriveKey(*feature):
+    # repr() is stable across processes (unlike hash() of strings).
+    digest = hashlib.blake2b(repr(_normalize(feature)).encode(), digest_size = KEY_BITS // 8,
+            key = str(SEED).encode())
+
+    return int.from_bytes(digest.digest(), 'little')
+
+def _normalize(value):
+    """
+    Make values that are equal have the same repr() (e.g. positions of 1 and 1.0).
+    """
+
+    if (isinstance(value, tuple)):
+        return tuple([_normalize(item) for item in value])
+
+    if (isinstance(value, int) and not isinstance(value, bool)):
+        return float(value)
+
+    return value
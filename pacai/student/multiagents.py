@@ -2,6 +2,7 @@ import random
 
 from pacai.agents.base import BaseAgent
 from pacai.agents.search.multiagent import MultiAgentSearchAgent
+from pacai.core import transposition
 from pacai.core.distance import manhattan
 class ReflexAgent(BaseAgent):
     """
@@ -166,21 +167,56 @@ class MinimaxAgent(MultiAgentSearchAgent):
         """
         
         depth = self.getTreeDepth()
-        return self.minimax(gameState, depth, 0)[1]
+        self.startSearch()
+
+        if self.isAnytime():
+            return self.iterativeDeepening(gameState, lambda depth: self.search(gameState, depth))
+
+        return self.search(gameState, depth)[1]
+
+    # search from pacman's turn, split across processes if asked to
+    def search(self, state, depth):
+        if self.isParallel():
+            return self.parallelSearch(state, depth)
+        return self.minimax(state, depth, 0)
+
+    # value of a root child (the first ghost to move), for the parallel search
+    def searchChild(self, state, depth):
+        return self.minimax(state, depth, 1)[0]
         
     # psuedocode found on - https://www.youtube.com/watch?v=l-hh51ncgDI
     # minimax function (positiionn, depth, maximizing player)
     def minimax(self, state, depth, agentIndex):
+        self.countNode()
+
         # if depth == 0 or game over in position, return static eval of pos
         if depth == 0 or state.isWin() or state.isLose():
             return self._evaluationFunction(state), None
-        
+
+        # give up if an anytime search is out of time
+        self.checkDeadline()
+
+        # reuse the value if this position was already searched to this depth
+        table = self.getTranspositionTable()
+        if table is not None:
+            entry = table.probe(state, agentIndex, depth)
+            if entry is not None:
+                return entry.value, entry.action
+
+        result = self._minimaxChildren(state, depth, agentIndex)
+
+        if table is not None:
+            table.store(state, agentIndex, depth, result[0], action = result[1])
+
+        return result
+
+    def _minimaxChildren(self, state, depth, agentIndex):
         # if maximizing player (pacman)
         if agentIndex == 0:
             # max evaluation = -inf
             maxEval = float("-inf")
             # for each child of position, eval = minimax(child, depth - 1, false)
-            for action in state.getLegalActions(agentIndex):
+            for action in self.getOrderedActions(state, agentIndex):
                 # eval = minimax( child, depth -1, false)
                 eval = self.minimax(state.generateSuccessor(agentIndex, action), depth - 1, 1)[0]
                 # comparing curent action (eval) w / highest action (maxeval)
@@ -194,7 +230,7 @@ class MinimaxAgent(MultiAgentSearchAgent):
             minEval = float("inf")
             # for each child of position, eval = minimax(child, depth - 1, true)
             # minieval = min(mineval, eval)
-            for action in state.getLegalActions(agentIndex):
+            for action in self.getOrderedActions(state, agentIndex):
                 eval = self.minimax(state.generateSuccessor(agentIndex, action), depth - 1, 0)[0]
                 # comparing current action w/ lowest
                 if eval < minEval:
@@ -217,6 +253,9 @@ class AlphaBetaAgent(MultiAgentSearchAgent):
 
     def __init__(self, index, **kwargs):
         super().__init__(index, **kwargs)
+
+        # the depth of the current search (so a node's ply is this minus its depth)
+        self._searchDepth = 0
         
     def getAction(self, gameState):
         """
@@ -225,40 +264,91 @@ class AlphaBetaAgent(MultiAgentSearchAgent):
         """
         
         depth = self.getTreeDepth()
-        return self.minimax(gameState, depth, float("-inf"), float("inf"), 0)[1]
+        self.startSearch()
+
+        if self.isAnytime():
+            return self.iterativeDeepening(gameState, lambda depth: self.search(gameState, depth))
+
+        return self.search(gameState, depth)[1]
+
+    def search(self, state, depth):
+        self._searchDepth = depth
+        if self.isParallel():
+            return self.parallelSearch(state, depth)
+        return self.minimax(state, depth, float("-inf"), float("inf"), 0)
+
+    # searched with a full window, so the value is exact (no alpha from the other children)
+    def searchChild(self, state, depth):
+        self._searchDepth = depth + 1
+        return self.minimax(state, depth, float("-inf"), float("inf"), 1)[0]
         
     # minimax function (positiionn, depth, alpha, beta, maximizing player)
     def minimax(self, state, depth, alpha, beta, agentIndex):
+        self.countNode()
+
         if depth == 0 or state.isWin() or state.isLose():
             return self._evaluationFunction(state), 'Stop'
-        
+
+        # give up if an anytime search is out of time
+        self.checkDeadline()
+
+        # a stored value may be exact, or may narrow the window
+        table = self.getTranspositionTable()
+        if table is not None:
+            entry = table.probe(state, agentIndex, depth)
+            if entry is not None:
+                if entry.bound == transposition.EXACT:
+                    return entry.value, entry.action
+                elif entry.bound == transposition.LOWER_BOUND:
+                    alpha = max(alpha, entry.value)
+                else:
+                    beta = min(beta, entry.value)
+
+                if beta <= alpha:
+                    return entry.value, entry.action
+
+        result = self._minimaxChildren(state, depth, alpha, beta, agentIndex)
+
+        if table is not None:
+            table.store(state, agentIndex, depth, result[0],
+                        transposition.getBound(result[0], alpha, beta), result[1])
+
+        return result
+
+    def _minimaxChildren(self, state, depth, alpha, beta, agentIndex):
+        ordering = self.getMoveOrdering()
+        ply = self._searchDepth - depth
+
         if agentIndex == 0:
             maxEval = float("-inf")
             maxAction = 'Stop'
-            for action in state.getLegalActions(agentIndex):
+            for action, successor in self.getOrderedSuccessors(state, agentIndex, ply, depth):
                 # eval = minimax(child, depth-1, alpha, beta, false)
-                eval = self.minimax(state.generateSuccessor(agentIndex, action),
-                                    depth - 1, alpha, beta, 1)[0]
+                eval = self.minimax(successor, depth - 1, alpha, beta, 1)[0]
                 alpha = max(alpha, eval)
                 if eval > maxEval:
                     maxEval = max(maxEval, eval)
                     maxAction = action
                 if beta <= alpha:
+                    ordering.recordCutoff(state, agentIndex, ply, depth, action)
                     break
+            ordering.recordBest(state, agentIndex, maxAction)
             return maxEval, maxAction
         
         else:
             minEval = float("inf")
             minAction = 'Stop'
-            for action in state.getLegalActions(agentIndex):
-                eval = self.minimax(state.generateSuccessor(agentIndex, action),
-                                    depth - 1, alpha, beta, 0)[0]
+            for action, successor in self.getOrderedSuccessors(state, agentIndex, ply, depth,
+                                                               maximize = False):
+                eval = self.minimax(successor, depth - 1, alpha, beta, 0)[0]
                 if eval < minEval:
                     minEval = min(minEval, eval)
                     minAction = action
                 beta = min(beta, eval)
                 if beta <= alpha:
+                    ordering.recordCutoff(state, agentIndex, ply, depth, action)
                     break
+            ordering.recordBest(state, agentIndex, minAction)
             return minEval, minAction
 
 class ExpectimaxAgent(MultiAgentSearchAgent):
@@ -281,15 +371,50 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
     def getAction(self, state):
         # returns expectimax ation from current gamestate using depth and evaluation function
         depth = self.getTreeDepth()
-        return self.expectimax(state, depth, 0)[1]
+        self.startSearch()
+
+        if self.isAnytime():
+            return self.iterativeDeepening(state, lambda depth: self.search(state, depth))
+
+        return self.search(state, depth)[1]
+
+    # search from pacman's turn, split across processes if asked to
+    def search(self, state, depth):
+        if self.isParallel():
+            return self.parallelSearch(state, depth)
+        return self.expectimax(state, depth, 0)
+
+    # value of a root child (the first ghost to move), for the parallel search
+    def searchChild(self, state, depth):
+        return self.expectimax(state, depth, 1)[0]
     
     def expectimax(self, state, depth, agentIndex):
+        self.countNode()
+
         if depth == 0 or state.isWin() or state.isLose():
             return self._evaluationFunction(state), None
-        
+
+        # give up if an anytime search is out of time
+        self.checkDeadline()
+
+        # reuse the value if this position was already searched to this depth
+        table = self.getTranspositionTable()
+        if table is not None:
+            entry = table.probe(state, agentIndex, depth)
+            if entry is not None:
+                return entry.value, entry.action
+
+        result = self._expectimaxChildren(state, depth, agentIndex)
+
+        if table is not None:
+            table.store(state, agentIndex, depth, result[0], action = result[1])
+
+        return result
+
+    def _expectimaxChildren(self, state, depth, agentIndex):
         if agentIndex == 0:
             maxEval = float("-inf")
-            for action in state.getLegalActions(agentIndex):
+            for action in self.getOrderedActions(state, agentIndex):
                 eval = self.expectimax(state.generateSuccessor(agentIndex, action), depth - 1, 1)[0]
                 if eval > maxEval:
                     maxEval = max(maxEval, eval)
@@ -297,7 +422,7 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
             return maxEval, maxAction
         else:
             totalEval = 0
-            actions = state.getLegalActions(agentIndex)
+            actions = self.getOrderedActions(state, agentIndex)
             for action in actions:
                 # agent + 1 -> next agent, ghost - 1 + 1 % 2 = 0  -- pacman turn
                 nextAgent = (agentIndex + 1) % state.getNumAgents()
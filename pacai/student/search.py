@@ -3,9 +3,14 @@ In this file, you will implement generic search algorithms which are called by P
 """
 from pacai.util.stack import Stack
 from pacai.util.queue import Queue
-from pacai.util.priorityQueue import PriorityQueue
+from pacai.util.priorityQueue import BucketPriorityQueue
+from pacai.util.priorityQueue import IndexedPriorityQueue
+from pacai.core.search.node import SearchTree
 # from pacai.core.search.problem import SearchProblem
 
+# The highest priority kept in a bucket queue (there is one bucket for every priority up to it).
+MAX_BUCKET_PRIORITY = 1 << 16
+
 
 def depthFirstSearch(problem):
     """
@@ -24,43 +29,28 @@ def depthFirstSearch(problem):
     """
 
     # *** Your Code Here ***
-    start = problem.startingState()  # start node
+    tree = SearchTree()
+    root = tree.addRoot(problem.startingState())
+
+    if problem.isGoal(tree.getState(root)):
+        return []
+
+    # Frontier entries are nodes in the search tree, paths are only built for the goal.
     frontier = Stack()
-    visited = {start}
-    
-    # make starting node, if s passes goal, then return
-    # frontier - stack
-    # visited - make set {start}
-    
-    # while front isnt empty, pop node recently added to frontier
-    # for v = expanded nodes, do if v passes the goal test, then return v
-    # if v state not visited, then add v to frontier.
-    
-    if problem.isGoal(start):
-        return start
-    
-    frontier.push((start, []))
-    
+    frontier.push(root)
+    visited = {tree.getState(root)}
+
     while not frontier.isEmpty():
-        # node = frontier.pop() # popping node that was recently added to frontier
-        child, actions = frontier.pop()
-        # visited.add(node) # adds to visited list
-        
-        if problem.isGoal(child):
-            return actions
-        
-        for node, action, cost in problem.successorStates(child):
-            if node not in visited:
-                visited.add(node)
-                frontier.push((node, actions + [action]))
-        # for child in successors(node):
-        # for child in problem.successorStates(node):
-            # if child.isGoal():
-            # if problem.isGoal(child):
-                # return child
-            # if child not in visited:
-            #     visited.add(child)
-            #     frontier.push(child)
+        node = frontier.pop()
+
+        if problem.isGoal(tree.getState(node)):
+            return tree.getPath(node)
+
+        for child, action, cost in problem.successorStates(tree.getState(node)):
+            if child not in visited:
+                visited.add(child)
+                frontier.push(tree.addChild(node, child, action, cost))
+
     return None
 
 def breadthFirstSearch(problem):
@@ -68,110 +58,138 @@ def breadthFirstSearch(problem):
     Search the shallowest nodes in the search tree first. [p 81]
     """
 
-    start = problem.startingState()  # start node
-    
-    if problem.isGoal(start):
-        return start
-    
+    tree = SearchTree()
+    root = tree.addRoot(problem.startingState())
+
+    if problem.isGoal(tree.getState(root)):
+        return []
+
     frontier = Queue()
-    explored = {start}
-    frontier.push((start, []))
-    
+    frontier.push(root)
+    explored = {tree.getState(root)}
+
     while not frontier.isEmpty():
-        node, actions = frontier.pop()  # chooses the shallowest node in frontier
-        explored.add(node)
-        
-        for child, action, _ in problem.successorStates(node):
+        node = frontier.pop()  # chooses the shallowest node in frontier
+
+        for child, action, cost in problem.successorStates(tree.getState(node)):
             if child not in explored:
+                childNode = tree.addChild(node, child, action, cost)
+
                 if problem.isGoal(child):
-                    return actions + [action]
-                frontier.push((child, actions + [action]))
+                    return tree.getPath(childNode)
+
+                frontier.push(childNode)
                 explored.add(child)
-    
-    # for child, action, _ in problem.successorStates(node):
-        # child = problem.successorStates(node, action)
-    # for action in problem.getActions(node):
-    #     child = problem.successorStates(node, action)
-    #     if child not in explored:
-    #         if problem.isGoal(child):
-    #             return actions + [action]
-    #         frontier.push((child, actions + [action]))
-    #         explored.add(child)
+
     return None
 
 def uniformCostSearch(problem):
     """
     Search the node of least total cost first.
     """
-    
-    start = problem.startingState()  # start node
-    frontier = PriorityQueue()
+
+    tree = SearchTree()
+    root = tree.addRoot(problem.startingState())
+
+    # The frontier holds states (each at most once, with its best path cost so far),
+    # see `_newFrontier` for how ties are broken.
+    frontier = _newFrontier(problem)
+    frontier.push(tree.getState(root), 0)
+
+    # The best node for each state in the frontier.
+    nodes = {tree.getState(root): root}
     explored = set()
-    frontier_set = set()
-    priorities = {}
-    
-    frontier.push((start, [], 0), 0)
-    frontier_set.add(start)
-    priorities[start] = 0
-    
+
     while not frontier.isEmpty():
-        node, actions, path_cost = frontier.pop()
-        frontier_set.remove(node)
-        
-        if problem.isGoal(node):
-            return actions
-    
-        explored.add(node)
-    
-        for child, action, step_cost in problem.successorStates(node):
-            total_cost = path_cost + step_cost
-            if child not in explored:
-                if child not in frontier_set or total_cost < priorities[child]:
-                    frontier.push((child, actions + [action], total_cost), total_cost)
-                    frontier_set.add(child)
-                    priorities[child] = total_cost
+        state = frontier.pop()
+        node = nodes.pop(state)
+
+        if problem.isGoal(state):
+            return tree.getPath(node)
+
+        explored.add(state)
+
+        for child, action, stepCost in problem.successorStates(state):
+            if child in explored:
+                continue
+
+            totalCost = tree.getCost(node) + stepCost
+            frontier = _fitFrontier(frontier, totalCost)
+
+            if frontier.pushOrDecrease(child, totalCost):
+                nodes[child] = tree.addChild(node, child, action, stepCost)
+
     return None
 
 def aStarSearch(problem, heuristic):
     """
     Search the node that has the lowest combined cost and heuristic first.
     """
-    
-    start = problem.startingState()  # start node
-    frontier = PriorityQueue()
-    explored = {start}
-    frontier_set = {start}
-    priorities = {}
-    
-    frontier.push((start, [], 0), 0)
-    frontier_set.add(start)
-    priorities[start] = 0
-    
+
+    tree = SearchTree()
+    root = tree.addRoot(problem.startingState())
+
+    # The frontier holds states (each at most once, with its best f = g + h so far),
+    # see `_newFrontier` for how ties are broken.
+    frontier = _newFrontier(problem)
+    frontier.push(tree.getState(root), 0)
+
+    # The best node for each state in the frontier.
+    nodes = {tree.getState(root): root}
+    explored = set()
+
     while not frontier.isEmpty():
-        node, actions, path_cost = frontier.pop()
-        # frontier_set.remove(node)
-        if node not in frontier_set:
-            continue
-        frontier_set.remove(node)
-        
-        if problem.isGoal(node):
-            return actions
-        
-        explored.add(node)
-        
-        for child, action, step_cost in problem.successorStates(node):
-            total_cost = path_cost + step_cost
-            if child not in explored:
-                if child not in frontier_set:
-                    frontier.push((child, actions + [action], total_cost),
-                        total_cost + heuristic(child, problem))
-                    frontier_set.add(child)
-                    priorities[child] = total_cost + heuristic(child, problem)
-                elif total_cost + heuristic(child, problem) < priorities[child]:
-                    frontier.push((child, actions + [action], total_cost),
-                        total_cost + heuristic(child, problem))
-                    priorities[child] = total_cost + heuristic(child, problem)
+        state = frontier.pop()
+        node = nodes.pop(state)
+
+        if problem.isGoal(state):
+            return tree.getPath(node)
+
+        explored.add(state)
+
+        for child, action, stepCost in problem.successorStates(state):
+            if child in explored:
+                continue
+
+            priority = tree.getCost(node) + stepCost + heuristic(child, problem)
+            frontier = _fitFrontier(frontier, priority)
+
+            if frontier.pushOrDecrease(child, priority):
+                nodes[child] = tree.addChild(node, child, action, stepCost)
+
     return None
 
     # *** Your Code Here ***
     # raise NotImplementedError()
+
+def _newFrontier(problem):
+    """
+    Get an empty frontier for a best first search.
+    Problems with small integer step costs get a `BucketPriorityQueue`
+    (ties go to the oldest state),
+    everything else gets an `IndexedPriorityQueue` (ties are broken by comparing states).
+    """
+
+    if (problem.hasSmallIntegerCosts()):
+        return BucketPriorityQueue()
+
+    return IndexedPriorityQueue()
+
+def _fitFrontier(frontier, priority):
+    """
+    Get a frontier that can hold the priority:
+    the same one, or (if the priority does not fit in a bucket, e.g. a fractional heuristic)
+    an `IndexedPriorityQueue` with everything from the bucket queue moved over.
+    """
+
+    if (not isinstance(frontier, BucketPriorityQueue)):
+        return frontier
+
+    if (isinstance(priority, int) and 0 <= priority <= MAX_BUCKET_PRIORITY):
+        return frontier
+
+    queue = IndexedPriorityQueue()
+    for item in frontier.getItems():
+        queue.push(item, frontier.getPriority(item))
+
+    return queue
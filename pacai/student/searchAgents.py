@@ -8,6 +8,7 @@ Good luck and happy searching!
 import logging
 
 from pacai.core.actions import Actions
+from pacai.core.search.corridor import CorridorSearchProblem
 from pacai.core.search.position import PositionSearchProblem
 from pacai.core.search.problem import SearchProblem
 from pacai.agents.base import BaseAgent
@@ -102,6 +103,26 @@ class CornersProblem(SearchProblem):
 
         return successors
 
+    def followCorridor(self, state, edge):
+        """
+        Get the state at the end of a `pacai.core.corridor.CorridorEdge` leaving this state,
+        and the cost of getting there.
+        The corners are always at the ends of edges (see `CornersProblem.getCorridorKeyPositions`).
+        """
+
+        currentPosition, reachedCorners = state
+
+        if edge.target in self.corners:
+            reachedCorners = reachedCorners | {edge.target}
+
+        return (edge.target, reachedCorners), edge.getCost()
+
+    def getCorridorKeyPositions(self):
+        return [self.startingPosition] + list(self.corners)
+
+    def getCorridorPosition(self, state):
+        return state[0]
+
     def actionsCost(self, actions):
         """
         Returns the cost of a particular sequence of actions.
@@ -121,6 +142,14 @@ class CornersProblem(SearchProblem):
 
         return len(actions)
 
+class CorridorCornersProblem(CorridorSearchProblem):
+    """
+    `CornersProblem` over corridors (see `pacai.core.search.corridor.CorridorSearchProblem`).
+    """
+
+    def __init__(self, startingGameState):
+        super().__init__(CornersProblem(startingGameState))
+
 def cornersHeuristic(state, problem):
     corners = problem.corners
     # walls = problem.walls
@@ -174,8 +203,9 @@ def foodHeuristic(state, problem):
     Subsequent calls to this heuristic can access problem.heuristicInfo['wallCount'].
     """
 
-    currentPosition, foodGrid = state
-    food = foodGrid.asList()
+    # Decode through the problem, so this also works on compact states.
+    currentPosition = problem.getPacmanPosition(state)
+    food = problem.getFoodPositions(state)
     
     if not food:
         return 0
@@ -2,6 +2,7 @@
 Priority queue containers.
 """
 
+import collections
 import heapq
 
 class PriorityQueue(object):
@@ -13,6 +14,7 @@ class PriorityQueue(object):
 
     Note that this PriorityQueue does not allow you to change the priority of an item.
     However, you may insert the same item multiple times with different priorities.
+    See `IndexedPriorityQueue` for a queue that does.
     """
 
     def __init__(self):
@@ -56,3 +58,243 @@ class PriorityQueueWithFunction(PriorityQueue):
 
     def __len__(self):
         return len(self.heap)
+
+class IndexedPriorityQueue(object):
+    """
+    A priority queue (binary min heap) that knows where each item is,
+    so an item's priority can be lowered in place with `IndexedPriorityQueue.decreaseKey`
+    instead of pushing the item again.
+
+    Each item may only be in the queue once, and items must be hashable.
+    Like `PriorityQueue`, ties between equal priorities are broken by comparing the items.
+    """
+
+    def __init__(self):
+        # (priority, item) pairs.
+        self.heap = []
+
+        # Item to its index in the heap.
+        self._indexes = {}
+
+    def contains(self, item):
+        return item in self._indexes
+
+    def decreaseKey(self, item, priority):
+        """
+        Lower the priority of an item already in the queue.
+        """
+
+        index = self._indexes[item]
+
+        if (priority > self.heap[index][0]):
+            raise ValueError('Cannot increase the priority of an item with decreaseKey().')
+
+        self.heap[index] = (priority, item)
+        self._siftUp(index)
+
+    def getPriority(self, item):
+        return self.heap[self._indexes[item]][0]
+
+    def isEmpty(self):
+        return len(self.heap) == 0
+
+    def pop(self):
+        """
+        Remove and return the item with the lowest priority.
+        """
+
+        priority, item = self.heap[0]
+        del self._indexes[item]
+
+        last = self.heap.pop()
+        if (len(self.heap) > 0):
+            self.heap[0] = last
+            self._indexes[last[1]] = 0
+            self._siftDown(0)
+
+        return item
+
+    def push(self, item, priority):
+        if (item in self._indexes):
+            raise ValueError('Item is already in the queue: ' + str(item))
+
+        self.heap.append((priority, item))
+        self._indexes[item] = len(self.heap) - 1
+        self._siftUp(len(self.heap) - 1)
+
+    def pushOrDecrease(self, item, priority):
+        """
+        Push an item, or lower its priority if it is already in the queue.
+        Returns True if the queue changed
+        (an item already in the queue with a lower or equal priority is left alone).
+        """
+
+        index = self._indexes.get(item)
+        if (index is None):
+            self.push(item, priority)
+            return True
+
+        if (priority < self.heap[index][0]):
+            self.decreaseKey(item, priority)
+            return True
+
+        return False
+
+    def _siftDown(self, index):
+        heap = self.heap
+        indexes = self._indexes
+
+        entry = heap[index]
+        size = len(heap)
+
+        while (True):
+            child = 2 * index + 1
+            if (child >= size):
+                break
+
+            if (child + 1 < size and heap[child + 1] < heap[child]):
+                child += 1
+
+            if (not (heap[child] < entry)):
+                break
+
+            heap[index] = heap[child]
+            indexes[heap[index][1]] = index
+            index = child
+
+        heap[index] = entry
+        indexes[entry[1]] = index
+
+    def _siftUp(self, index):
+        heap = self.heap
+        indexes = self._indexes
+
+        entry = heap[index]
+
+        while (index > 0):
+            parent = (index - 1) // 2
+            if (not (entry < heap[parent])):
+                break
+
+            heap[index] = heap[parent]
+            indexes[heap[index][1]] = index
+            index = parent
+
+        heap[index] = entry
+        indexes[entry[1]] = index
+
+    def __contains__(self, item):
+        return item in self._indexes
+
+    def __len__(self):
+        return len(self.heap)
+
+class BucketPriorityQueue(object):
+    """
+    A priority queue for small non-negative integer priorities,
+    like the path costs of unit cost grid searches.
+    Items are kept in one bucket (a FIFO) per priority, so push and decreaseKey are O(1)
+    and pop only has to scan past empty buckets.
+    Pops are fastest when priorities never go below the last popped priority
+    (as is the case for uniform cost search).
+
+    Like `IndexedPriorityQueue`, each (hashable) item may only be in the queue once.
+    Unlike the other priority queues, ties are broken by insertion order.
+    """
+
+    def __init__(self):
+        self._buckets = []
+
+        # Item to its current priority.
+        # Entries in the buckets that do not match this are stale (and skipped).
+        self._priorities = {}
+
+        # No non-empty bucket is below this.
+        self._minPriority = 0
+
+    def contains(self, item):
+        return item in self._priorities
+
+    def decreaseKey(self, item, priority):
+        """
+        Lower the priority of an item already in the queue.
+        """
+
+        if (priority > self._priorities[item]):
+            raise ValueError('Cannot increase the priority of an item with decreaseKey().')
+
+        # The old entry is left in place, it will be skipped since its priority is stale.
+        self._add(item, priority)
+
+    def getItems(self):
+        """
+        Get the items in the queue (in no particular order).
+        """
+
+        return list(self._priorities)
+
+    def getPriority(self, item):
+        return self._priorities[item]
+
+    def isEmpty(self):
+        return len(self._priorities) == 0
+
+    def pop(self):
+        """
+        Remove and return the item with the lowest priority.
+        """
+
+        if (len(self._priorities) == 0):
+            raise IndexError('pop from an empty priority queue')
+
+        while (True):
+            bucket = self._buckets[self._minPriority]
+
+            while (len(bucket) > 0):
+                item = bucket.popleft()
+                if (self._priorities.get(item) == self._minPriority):
+                    del self._priorities[item]
+                    return item
+
+            self._minPriority += 1
+
+    def push(self, item, priority):
+        if (item in self._priorities):
+            raise ValueError('Item is already in the queue: ' + str(item))
+
+        self._add(item, priority)
+
+    def pushOrDecrease(self, item, priority):
+        """
+        Push an item, or lower its priority if it is already in the queue.
+        Returns True if the queue changed.
+        """
+
+        oldPriority = self._priorities.get(item)
+        if (oldPriority is not None and oldPriority <= priority):
+            return False
+
+        self._add(item, priority)
+        return True
+
+    def _add(self, item, priority):
+        if (priority < 0 or priority != int(priority)):
+            raise ValueError('Bucket queue priorities must be non-negative integers: '
+                    + str(priority))
+
+        priority = int(priority)
+
+        while (len(self._buckets) <= priority):
+            self._buckets.append(collections.deque())
+
+        self._buckets[priority].append(item)
+        self._priorities[item] = priority
+
+        if (len(self._priorities) == 1 or priority < self._minPriority):
+            self._minPriority = priority
+
+    def __contains__(self, item):
+        return item in self._priorities
+
+    def __len__(self):
+        return len(self._priorities)
@@ -55,6 +55,18 @@ def nearestPoint(pos):
 
     return (grid_row, grid_col)
 
+def parseBool(value):
+    """
+    Interpret a boolean option that may have come in as a string (e.g. from agent args).
+    The strings '1', 'true', and 'yes' (in any case) are true, all other strings are false.
+    Anything else is judged by its truth value.
+    """
+
+    if (isinstance(value, str)):
+        return (value.lower() in ('1', 'true', 'yes'))
+
+    return bool(value)
+
 def sign(x):
     """
     Returns 1 or -1 depending on the sign of x
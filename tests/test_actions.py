@@ -0,0 +1,45 @@
+import unittest
+
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
+from pacai.core.layout import getLayout
+
+"""
+Test the move actions and the legal action tables.
+"""
+class ActionsTest(unittest.TestCase):
+    def test_legal_action_table(self):
+        for name in ('mediumClassic', 'tinyMaze', 'tinyCapture'):
+            walls = getLayout(name).walls
+            table = Actions.getLegalActionTable(walls)
+
+            # Shared by everything using the same walls.
+            self.assertIs(table, Actions.getLegalActionTable(walls))
+
+            for (x, y) in walls.asList(False):
+                # The actions that do not run into a wall, checked on the walls directly.
+                expected = []
+                for direction in sorted(Actions._directions):
+                    dx, dy = Actions.directionToVector(direction)
+                    if (not walls[x + int(dx)][y + int(dy)]):
+                        expected.append(direction)
+
+                possible = Actions.getPossibleActions((x, y), Directions.STOP, walls)
+                self.assertEqual(expected, possible, (name, x, y))
+                self.assertEqual(tuple(expected), table.getPossibleActions(x, y))
+
+                neighbors = [Actions.getSuccessor((x, y), action) for action in expected]
+                self.assertEqual(neighbors, Actions.getLegalNeighbors((x, y), walls))
+                self.assertEqual(tuple(neighbors), table.getLegalNeighbors(x, y))
+
+                moves = [(action, Actions.getSuccessor((x, y), action))
+                        for action in Directions.CARDINAL if (action in expected)]
+                self.assertEqual(tuple(moves), table.getMoves(x, y))
+
+            # Walls and positions off the board are not in the table.
+            wall = walls.asList(True)[0]
+            self.assertIsNone(table.getMoves(*wall))
+            self.assertIsNone(table.getPossibleActions(-1, 0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 
 from pacai.bin import capture
+from pacai.bin import eightpuzzle
 from pacai.bin import gridworld
 from pacai.bin import pacman
 
@@ -41,6 +42,19 @@ class BinTest(unittest.TestCase):
             if status.code != 0:
                 self.fail("Error occured when running --help.")
 
+    def test_eightpuzzle_batch(self):
+        # Solve a batch of random puzzles with A* and the pattern databases.
+        stats = eightpuzzle.main(['--batch', '20', '--search', 'astar', '--seed', '10'])
+        self.assertEqual(20, stats['puzzles'])
+
+        # Raise exception for a heuristic on a search that does not take one.
+        try:
+            eightpuzzle.main(['--batch', '1', '--search', 'bfs', '--heuristic', 'pdb'])
+            self.fail("Test did not raise expected exception.")
+        except ValueError:
+            # Expected exception.
+            pass
+
     def test_gridworld(self):
         # Run game of gridworld with default agents.
         gridworld.main(['--null-graphics'])
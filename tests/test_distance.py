@@ -0,0 +1,258 @@
+import os
+import tempfile
+import unittest
+
+from pacai.bin.pacman import PacmanGameState
+from pacai.core import distance
+from pacai.core import distanceCalculator
+from pacai.core.layout import getLayout
+from pacai.core.search.position import PositionSearchProblem
+from pacai.student import search
+
+"""
+Test maze distance computation.
+"""
+class DistanceTest(unittest.TestCase):
+    def setUp(self):
+        distanceCalculator.clearCache()
+
+    def test_matrix_matches_search(self):
+        layout = getLayout('tinyMaze')
+        state = PacmanGameState(layout)
+        distances = distanceCalculator.computeDistances(layout)
+
+        positions = layout.walls.asList(False)
+        self.assertEqual(len(positions), distances.getNumCells())
+
+        for source in positions:
+            self.assertEqual(0, distances.getDistance(source, source))
+
+            for target in positions:
+                if (source == target):
+                    continue
+
+                problem = PositionSearchProblem(state, start = source, goal = target)
+                expected = len(search.breadthFirstSearch(problem))
+
+                self.assertEqual(expected, distances.getDistance(source, target))
+
+        # Walls are not in the matrix.
+        self.assertIsNone(distances.getDistance((0, 0), positions[0]))
+
+    def test_distancer(self):
+        distancer = distanceCalculator.Distancer(getLayout('tinyMaze'))
+
+        # Before the distances are computed, fall back to manhattan distance.
+        self.assertEqual(4, distancer.getDistance((5, 3), (1, 3)))
+
+        distancer.getMazeDistances()
+        self.assertTrue(distancer.isReadyForMazeDistance())
+        self.assertEqual(6, distancer.getDistance((5, 3), (1, 3)))
+        self.assertEqual(6.5, distancer.getDistance((5, 3.5), (1, 3)))
+
+    def test_distances_shared(self):
+        first = distanceCalculator.Distancer(getLayout('tinyCapture'))
+        first.getMazeDistances()
+
+        # A different layout object with the same walls.
+        second = distanceCalculator.Distancer(getLayout('tinyCapture'))
+        second.getMazeDistances()
+
+        self.assertIs(first._distances, second._distances)
+
+    def test_disk_cache(self):
+        layout = getLayout('testCapture')
+        oldCacheDir = distanceCalculator.getCacheDir()
+
+        with tempfile.TemporaryDirectory() as cacheDir:
+            try:
+                distanceCalculator.setCacheDir(cacheDir)
+
+                computed = distanceCalculator.getDistances(layout)
+                self.assertEqual(1, len(os.listdir(cacheDir)))
+
+                # Forget the in-memory copy, so the next lookup has to come from disk.
+                distanceCalculator.clearCache()
+                loaded = distanceCalculator.getDistances(layout)
+            finally:
+                distanceCalculator.setCacheDir(oldCacheDir)
+
+            self.assertIsNot(computed, loaded)
+            self.assertEqual(computed.toBytes(), loaded.toBytes())
+
+            positions = layout.walls.asList(False)
+            for source in positions:
+                for target in positions:
+                    self.assertEqual(computed.getDistance(source, target),
+                            loaded.getDistance(source, target))
+
+            del loaded
+            distanceCalculator.clearCache()
+
+    def test_background(self):
+        layout = getLayout('mediumCapture')
+        expected = distanceCalculator.computeDistances(layout)
+
+        distancer = distanceCalculator.Distancer(layout)
+        distancer.getMazeDistances(background = True)
+
+        # Answers are always either exact or a manhattan lower bound.
+        positions = layout.walls.asList(False)
+        source, target = positions[0], positions[-1]
+        distance = distancer.getDistance(source, target)
+        self.assertLessEqual(distanceCalculator.manhattan(source, target), distance)
+        self.assertLessEqual(distance, expected.getDistance(source, target))
+
+        self.assertTrue(distancer.waitForMazeDistances(30))
+        self.assertTrue(distancer.isReadyForMazeDistance())
+        self.assertEqual(1.0, distancer.getMazeDistanceProgress())
+        self.assertEqual(expected.toBytes(), distancer._distances.toBytes())
+
+    def test_partial_matrix(self):
+        layout = getLayout('tinyMaze')
+        distances = distanceCalculator._createDistanceMatrix(layout.walls)
+        self.assertFalse(distances.isComplete())
+        self.assertEqual(0.0, distances.getProgress())
+
+        positions = distances.getPositions()
+        self.assertIsNone(distances.getDistance(positions[0], positions[1]))
+
+        distanceCalculator._fillDistances(distances, layout.walls)
+        self.assertTrue(distances.isComplete())
+        self.assertEqual(distanceCalculator.computeDistances(layout).toBytes(), distances.toBytes())
+
+    def test_failed_matrix(self):
+        layout = getLayout('tinyMaze')
+        key = distanceCalculator.getWallsFingerprint(layout.walls)
+        distanceCalculator.clearCache()
+
+        # Break the matrix so filling it in fails part way through.
+        def createBrokenMatrix(walls):
+            matrix = oldCreate(walls)
+            matrix._positions = list(matrix._positions[:-1]) + [None]
+            return matrix
+
+        oldCreate = distanceCalculator._createDistanceMatrix
+        try:
+            distanceCalculator._createDistanceMatrix = createBrokenMatrix
+
+            distancer = distanceCalculator.Distancer(layout)
+            with self.assertLogs(level = 'ERROR') as logs:
+                distancer.getMazeDistances()
+        finally:
+            distanceCalculator._createDistanceMatrix = oldCreate
+
+        self.assertIn('Failed to compute maze distances.', logs.output[0])
+
+        # The failed matrix is not shared, and the distancer stays on manhattan distance.
+        self.assertTrue(distancer._distances.isFailed())
+        self.assertNotIn(key, distanceCalculator._distanceCache)
+        self.assertFalse(distancer.isReadyForMazeDistance())
+        self.assertFalse(distancer.waitForMazeDistances(1))
+        self.assertEqual(4, distancer.getDistance((5, 3), (1, 3)))
+
+        # Asking again computes the distances from scratch.
+        distancer.getMazeDistances()
+        self.assertTrue(distancer.isReadyForMazeDistance())
+        self.assertEqual(6, distancer.getDistance((5, 3), (1, 3)))
+
+    def test_distances_from(self):
+        layout = getLayout('mediumCapture')
+        positions = layout.walls.asList(False)
+
+        ready = distanceCalculator.Distancer(layout)
+        ready.getMazeDistances()
+
+        # Not ready, so these have to search.
+        searching = distanceCalculator.Distancer(layout)
+
+        # Halfway between two cells.
+        x, y = [(x, y) for (x, y) in positions if (x, y + 1) in positions][0]
+        between = (float(x), y + 0.5)
+
+        targets = positions[::7] + [between]
+        for pos in [positions[0], positions[-1], between]:
+            expected = [ready.getDistance(pos, target) for target in targets]
+
+            self.assertEqual(expected, ready.getDistancesFrom(pos, targets))
+            self.assertEqual(expected, searching.getDistancesFrom(pos, targets))
+
+            minDistance = min(expected)
+            nearest = targets[expected.index(minDistance)]
+
+            self.assertEqual((nearest, minDistance), ready.nearest(pos, targets))
+            self.assertEqual(minDistance, searching.nearest(pos, targets)[1])
+
+        self.assertEqual([], ready.getDistancesFrom(positions[0], []))
+        self.assertIsNone(ready.nearest(positions[0], []))
+
+    def test_maze(self):
+        layout = getLayout('tinyMaze')
+        state = PacmanGameState(layout)
+        positions = layout.walls.asList(False)
+
+        for source in positions:
+            self.assertEqual(0, distance.maze(source, source, state))
+
+            for target in positions:
+                if (source == target):
+                    continue
+
+                problem = PositionSearchProblem(state, start = source, goal = target)
+                expected = len(search.breadthFirstSearch(problem))
+
+                self.assertEqual(expected, distance.maze(source, target, state))
+
+        self.assertRaises(ValueError, distance.maze, (0, 0), positions[0], state)
+
+    def test_maze_cache_bound(self):
+        layout = getLayout('tinyMaze')
+        state = PacmanGameState(layout)
+        positions = layout.walls.asList(False)
+
+        # Far more sources than rows, so rows are evicted (and rebuilt) along the way.
+        pairs = [(source, target) for source in positions for target in positions[::3]]
+
+        cache = distance.MazeDistanceCache(layout.walls, maxRows = 2)
+        for source, target in pairs:
+            self.assertEqual(distance.maze(source, target, state),
+                    cache.getDistance(source, target))
+
+        self.assertEqual(2, len(cache._rows))
+
+        # Rows that were evicted are rebuilt with the same answers.
+        for source, target in pairs:
+            self.assertEqual(distance.maze(source, target, state),
+                    cache.getDistance(source, target))
+
+        self.assertEqual(2, len(cache._rows))
+
+        # Shared by everything using the same walls.
+        shared = distance.getMazeDistanceCache(layout.walls)
+        self.assertIs(shared, distance.getMazeDistanceCache(layout.walls))
+
+    def test_cache_bound(self):
+        layouts = ['tinyCapture', 'testCapture', 'tinyMaze', 'smallMaze']
+
+        for name in layouts:
+            distanceCalculator.getDistances(getLayout(name))
+
+        self.assertEqual(len(layouts), len(distanceCalculator._distanceCache))
+
+        oldMax = distanceCalculator.MAX_CACHED_LAYOUTS
+        try:
+            distanceCalculator.MAX_CACHED_LAYOUTS = 2
+            distanceCalculator.getDistances(getLayout('tinySearch'))
+        finally:
+            distanceCalculator.MAX_CACHED_LAYOUTS = oldMax
+
+        self.assertEqual(2, len(distanceCalculator._distanceCache))
+
+        # The most recently used layouts are kept.
+        fingerprint = distanceCalculator.getWallsFingerprint
+        keys = list(distanceCalculator._distanceCache.keys())
+        self.assertEqual(fingerprint(getLayout('smallMaze').walls), keys[0])
+        self.assertEqual(fingerprint(getLayout('tinySearch').walls), keys[1])
+
+if __name__ == '__main__':
+    unittest.main()
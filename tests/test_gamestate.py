@@ -0,0 +1,179 @@
+import copy
+import pickle
+import random
+import unittest
+
+from pacai.bin.capture import CaptureGameState
+from pacai.bin.pacman import PacmanGameState
+from pacai.core import zobrist
+from pacai.core.directions import Directions
+from pacai.core.layout import getLayout
+
+"""
+Test game state bookkeeping.
+"""
+class GameStateTest(unittest.TestCase):
+    def _walk(self, state, numMoves, seed):
+        """
+        Make random moves and yield every state visited.
+        """
+
+        rng = random.Random(seed)
+
+        agentIndex = 0
+        for i in range(numMoves):
+            if (state.isOver()):
+                return
+
+            action = rng.choice(state.getLegalActions(agentIndex))
+            state = state.generateSuccessor(agentIndex, action)
+            yield state
+
+            agentIndex = (agentIndex + 1) % state.getNumAgents()
+
+    def _assertHashMatchesFullRehash(self, state):
+        incremental = hash(state)
+
+        fresh = copy.copy(state)
+        fresh._hash = None
+
+        self.assertEqual(fresh, state)
+        self.assertEqual(incremental, hash(fresh))
+
+    def test_pacman_incremental_hash(self):
+        # Some of these walks eat a capsule (and so scare the ghosts).
+        for layoutName in ['smallClassic', 'capsuleClassic']:
+            layout = getLayout(layoutName)
+
+            for seed in range(10):
+                state = PacmanGameState(layout)
+                hash(state)
+
+                for successor in self._walk(state, 1000, seed):
+                    self._assertHashMatchesFullRehash(successor)
+
+    def test_capture_incremental_hash(self):
+        layout = getLayout('tinyCapture')
+
+        for seed in range(5):
+            state = CaptureGameState(layout, 1200)
+            hash(state)
+
+            for successor in self._walk(state, 300, seed):
+                self._assertHashMatchesFullRehash(successor)
+
+    def test_equal_states_hash_equal(self):
+        layout = getLayout('smallClassic')
+        state = PacmanGameState(layout)
+
+        # Reach the same configuration through two different paths.
+        actions = state.getLegalActions(0)
+        self.assertTrue(len(actions) >= 1)
+
+        first = state.generateSuccessor(0, actions[0])
+        second = state.generateSuccessor(0, actions[0])
+        hash(first)
+
+        self.assertEqual(first, second)
+        self.assertEqual(hash(first), hash(second))
+
+    def test_pickled_state_hash(self):
+        state = PacmanGameState(getLayout('smallClassic'))
+        hash(state)
+
+        for state in self._walk(state, 20, 0):
+            pass
+
+        # A loaded state gets a new layout (and so new Zobrist keys),
+        # so its hash has to be recomputed and kept up to date with those keys.
+        loaded = pickle.loads(pickle.dumps(state))
+        self.assertEqual(state.getScore(), loaded.getScore())
+
+        hash(loaded)
+        for successor in self._walk(loaded, 200, 1):
+            self._assertHashMatchesFullRehash(successor)
+
+        # Tables for copies of a layout agree, whatever order they see features in.
+        first = zobrist.getTable(state._layout)
+        second = zobrist.getTable(loaded._layout)
+        self.assertIsNot(first, second)
+
+        snapshots = [state.getAgentState(agentIndex).getSnapshot()
+                for agentIndex in range(state.getNumAgents())]
+        keys = [second.agent(agentIndex, snapshots[agentIndex])
+                for agentIndex in reversed(range(len(snapshots)))]
+        self.assertEqual([first.agent(agentIndex, snapshots[agentIndex])
+                for agentIndex in reversed(range(len(snapshots)))], keys)
+        self.assertEqual(first.score(12345), second.score(12345.0))
+
+        # Copies still keep their hash.
+        copied = copy.copy(state)
+        self.assertIsNotNone(copied._hash)
+        self.assertEqual(hash(state), hash(copied))
+
+    def _assertSameState(self, expected, actual):
+        self.assertEqual(expected, actual)
+        self.assertEqual(hash(expected), hash(actual))
+        self.assertEqual(expected.getFood(), actual.getFood())
+        self.assertEqual(expected.getCapsules(), actual.getCapsules())
+        self.assertEqual(expected.getLastAgentMoved(), actual.getLastAgentMoved())
+        self.assertEqual(expected.getLastFoodEaten(), actual.getLastFoodEaten())
+        self.assertEqual(expected.getLastCapsuleEaten(), actual.getLastCapsuleEaten())
+
+        for agentIndex in range(expected.getNumAgents()):
+            self.assertEqual(expected.getAgentState(agentIndex).getSnapshot(),
+                    actual.getAgentState(agentIndex).getSnapshot())
+
+    def _checkApplyUndo(self, makeState, numMoves, seed):
+        reference = makeState()
+        state = makeState()
+        hash(state)
+
+        rng = random.Random(seed)
+        history = [reference]
+        tokens = []
+
+        agentIndex = 0
+        for i in range(numMoves):
+            if (reference.isOver()):
+                break
+
+            action = rng.choice(reference.getLegalActions(agentIndex))
+
+            reference = reference.generateSuccessor(agentIndex, action)
+            tokens.append(state.applyMove(agentIndex, action))
+            history.append(reference)
+
+            self._assertSameState(reference, state)
+
+            agentIndex = (agentIndex + 1) % state.getNumAgents()
+
+        # Unwind all the way back to the start.
+        while (len(tokens) > 0):
+            state.undoMove(tokens.pop())
+            history.pop()
+            self._assertSameState(history[-1], state)
+
+        return state
+
+    def test_pacman_apply_undo(self):
+        for layoutName in ['smallClassic', 'capsuleClassic']:
+            layout = getLayout(layoutName)
+            for seed in range(10):
+                self._checkApplyUndo(lambda: PacmanGameState(layout), 1000, seed)
+
+    def test_capture_apply_undo(self):
+        layout = getLayout('tinyCapture')
+        for seed in range(5):
+            state = self._checkApplyUndo(lambda: CaptureGameState(layout, 1200), 300, seed)
+            self.assertEqual(1200, state.getTimeleft())
+
+    def test_apply_terminal(self):
+        state = PacmanGameState(getLayout('smallClassic'))
+        state.endGame(False)
+
+        with self.assertRaises(RuntimeError):
+            state.applyMove(0, Directions.STOP)
+
+if __name__ == '__main__':
+    unittest.main()
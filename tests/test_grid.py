@@ -0,0 +1,92 @@
+import gc
+import unittest
+
+from pacai.core.grid import Grid
+from pacai.core.grid import GridCache
+
+"""
+Test the packed boolean grid.
+"""
+class GridTest(unittest.TestCase):
+    def test_read_write(self):
+        grid = Grid(4, 3)
+        self.assertFalse(grid[1][2])
+
+        grid[1][2] = True
+        grid[3][0] = True
+        self.assertTrue(grid[1][2])
+        self.assertTrue(grid[3][0])
+        self.assertTrue(grid[-1][0])
+        self.assertFalse(grid[0][0])
+
+        grid[1][2] = False
+        self.assertFalse(grid[1][2])
+
+        with self.assertRaises(IndexError):
+            grid[4][0]
+
+        with self.assertRaises(IndexError):
+            grid[0][3]
+
+    def test_count_and_list(self):
+        grid = Grid(5, 4)
+        positions = [(0, 0), (1, 3), (4, 2)]
+        for x, y in positions:
+            grid[x][y] = True
+
+        self.assertEqual(3, grid.count())
+        self.assertEqual(17, grid.count(False))
+        self.assertEqual(positions, grid.asList())
+        self.assertEqual(17, len(grid.asList(False)))
+
+        full = Grid(5, 4, initialValue = True)
+        self.assertEqual(20, full.count())
+        self.assertEqual([], full.asList(False))
+
+    def test_copy(self):
+        grid = Grid(3, 3)
+        grid[1][1] = True
+
+        other = grid.copy()
+        self.assertEqual(grid, other)
+        self.assertEqual(hash(grid), hash(other))
+
+        other[1][1] = False
+        self.assertTrue(grid[1][1])
+        self.assertFalse(other[1][1])
+        self.assertNotEqual(grid, other)
+        self.assertEqual(0, other.count())
+        self.assertEqual(1, grid.count())
+
+    def test_grid_cache(self):
+        builds = []
+        def build(grid):
+            builds.append(grid)
+            return grid.count()
+
+        cache = GridCache(build)
+
+        grid = Grid(3, 2, True)
+        self.assertEqual(6, cache.get(grid))
+        self.assertEqual(6, cache.get(grid))
+        self.assertEqual(1, len(builds))
+
+        # Keyed by identity, not by value.
+        self.assertEqual(6, cache.get(grid.copy()))
+        self.assertEqual(2, len(builds))
+
+        # Entries go away with their grids.
+        builds.clear()
+        del grid
+        gc.collect()
+        self.assertEqual(0, len(cache))
+
+    def test_str(self):
+        grid = Grid(3, 2)
+        grid[0][0] = True
+        grid[2][1] = True
+
+        self.assertEqual('FFT\nTFF', str(grid))
+
+if __name__ == '__main__':
+    unittest.main()
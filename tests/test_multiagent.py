@@ -0,0 +1,346 @@
+import os
+import random
+import unittest
+
+from pacai.agents.search import multiagent
+from pacai.agents.search.mcts import MCTSAgent
+from pacai.bin import pacman
+from pacai.bin.pacman import PacmanGameState
+from pacai.core import moveOrdering
+from pacai.core import transposition
+from pacai.core.layout import getLayout
+from pacai.student.multiagents import AlphaBetaAgent
+from pacai.student.multiagents import ExpectimaxAgent
+from pacai.student.multiagents import MinimaxAgent
+
+class FakeClock(object):
+    """
+    Stands in for the `time` module, with time that only moves when it is told to.
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def advance(self, seconds):
+        self.now += seconds
+
+    def perf_counter(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+"""
+Test the adversarial searches and the structures they are built on.
+"""
+class MultiAgentTest(unittest.TestCase):
+    def test_transposition_table(self):
+        # A single bucket, so every position competes for the same two entries.
+        table = transposition.TranspositionTable(1)
+
+        self.assertIsNone(table.probe('A', 0, 2))
+
+        table.store('A', 0, 2, 10)
+        self.assertEqual(10, table.probe('A', 0, 2).value)
+        self.assertIsNone(table.probe('A', 0, 1))
+        self.assertIsNone(table.probe('A', 1, 2))
+
+        # A shallower entry does not push out the deeper one.
+        table.store('B', 0, 1, 20, transposition.LOWER_BOUND, 'North')
+        self.assertEqual(10, table.probe('A', 0, 2).value)
+        entry = table.probe('B', 0, 1)
+        self.assertEqual((20, transposition.LOWER_BOUND, 'North'),
+                (entry.value, entry.bound, entry.action))
+
+        # But the always-replace entry takes the newest.
+        table.store('C', 0, 1, 30)
+        self.assertIsNone(table.probe('B', 0, 1))
+        self.assertEqual(30, table.probe('C', 0, 1).value)
+
+        # Once a new search starts, the deep entry can be replaced too.
+        table.newSearch()
+        table.store('D', 0, 1, 40)
+        self.assertEqual(40, table.probe('D', 0, 1).value)
+        self.assertEqual(10, table.probe('A', 0, 2).value)
+        self.assertIsNone(table.probe('C', 0, 1))
+
+        self.assertEqual(2, len(table))
+        self.assertEqual(2, table.overwrites)
+        self.assertEqual(11, table.probes)
+        self.assertEqual(6, table.hits)
+
+        self.assertEqual(transposition.UPPER_BOUND, transposition.getBound(1, 1, 5))
+        self.assertEqual(transposition.LOWER_BOUND, transposition.getBound(5, 1, 5))
+        self.assertEqual(transposition.EXACT, transposition.getBound(3, 1, 5))
+
+        with self.assertRaises(ValueError):
+            transposition.TranspositionTable(0)
+
+    def test_transposition_table_agents(self):
+        # Searching with a table finds the same actions as searching without one.
+        for agentClass in (MinimaxAgent, AlphaBetaAgent, ExpectimaxAgent):
+            state = PacmanGameState(getLayout('smallClassic'))
+            plain = agentClass(0, depth = 4, tableSize = 0)
+            cached = agentClass(0, depth = 4)
+
+            self.assertIsNone(plain.getTranspositionTable())
+
+            for i in range(5):
+                action = plain.getAction(state)
+                self.assertEqual(action, cached.getAction(state), agentClass.__name__)
+
+                state = state.generateSuccessor(0, action)
+                for agentIndex in range(1, state.getNumAgents()):
+                    if (state.isWin() or state.isLose()):
+                        break
+
+                    state = state.generateSuccessor(agentIndex,
+                            state.getLegalActions(agentIndex)[0])
+
+            self.assertGreater(cached.getTranspositionTable().hits, 0, agentClass.__name__)
+
+    def test_anytime_search(self):
+        for agentClass in (MinimaxAgent, AlphaBetaAgent, ExpectimaxAgent):
+            state = PacmanGameState(getLayout('mediumClassic'))
+            agent = agentClass(0, moveTime = 0.2)
+            self.assertTrue(agent.isAnytime())
+
+            action = agent.getAction(state)
+            self.assertIn(action, state.getLegalActions(0))
+
+            # Completing a depth in anytime mode finds what a fixed depth search finds.
+            fixed = agentClass(0, depth = 1, tableSize = 0)
+            timed = agentClass(0, moveTime = 10, maxDepth = 1)
+            self.assertEqual(fixed.getAction(state), timed.getAction(state))
+            self.assertEqual(1, timed.completedDepth)
+
+    def test_anytime_deadline(self):
+        agent = MinimaxAgent(0, moveTime = 1, maxDepth = 4)
+        state = PacmanGameState(getLayout('mediumClassic'))
+
+        clock = FakeClock()
+        depths = []
+
+        # Each depth takes the given time (on the fake clock), then checks the deadline.
+        def search(depth):
+            depths.append(depth)
+            clock.advance(seconds[depth - 1])
+            agent.checkDeadline()
+
+            return (0, 'action %d' % (depth))
+
+        oldTime = multiagent.time
+        try:
+            multiagent.time = clock
+
+            # The third depth runs out of time, so the second depth's action is taken.
+            seconds = [0.1, 0.3, 0.9, 2.7]
+            self.assertEqual('action 2', agent.iterativeDeepening(state, search))
+            self.assertEqual(2, agent.completedDepth)
+            self.assertEqual([1, 2, 3], depths)
+
+            # The third depth is not started, since the time left is less than the second took.
+            depths.clear()
+            seconds = [0.1, 0.5, 0.1, 0.1]
+            self.assertEqual('action 2', agent.iterativeDeepening(state, search))
+            self.assertEqual(2, agent.completedDepth)
+            self.assertEqual([1, 2], depths)
+
+            # Everything fits (up to the most depth allowed).
+            depths.clear()
+            seconds = [0.1, 0.1, 0.1, 0.1]
+            self.assertEqual('action 4', agent.iterativeDeepening(state, search))
+            self.assertEqual([1, 2, 3, 4], depths)
+        finally:
+            multiagent.time = oldTime
+
+    def test_anytime_budget(self):
+        agent = MinimaxAgent(0, moveTime = 5)
+        self.assertEqual(5, agent.getMoveBudget())
+
+        # The game's limit (less a margin) caps the budget.
+        agent.setMoveTimeLimit(1)
+        self.assertAlmostEqual(0.9, agent.getMoveBudget())
+
+        agent.setMoveTimeLimit(0.01)
+        self.assertEqual(0, agent.getMoveBudget())
+
+        # With no completed search, the first legal action is taken.
+        def search(depth):
+            raise multiagent.SearchTimeout()
+
+        state = PacmanGameState(getLayout('mediumClassic'))
+        self.assertEqual(state.getLegalActions(0)[0], agent.iterativeDeepening(state, search))
+        self.assertEqual(0, agent.completedDepth)
+
+        # The game tells agents the rules' limit.
+        games = pacman.main(['-p', 'AlphaBetaAgent', '-l', 'smallClassic', '--null-graphics',
+                '--seed', '1', '--timeout', '1', '--agent-args', 'moveTime=0.05'])
+        self.assertEqual(1, games[0].agents[0].moveTimeLimit)
+
+    def test_move_ordering(self):
+        self.assertEqual(moveOrdering.COMPONENTS, moveOrdering.parseComponents('all'))
+        self.assertEqual((), moveOrdering.parseComponents('none'))
+        self.assertEqual(('pv', 'killer'), moveOrdering.parseComponents('PV+killer'))
+
+        with self.assertRaises(ValueError):
+            moveOrdering.MoveOrdering(moveOrdering.parseComponents('pv+bogus'))
+
+        with self.assertRaises(ValueError):
+            moveOrdering.MoveOrdering((moveOrdering.STATIC,))
+
+        state = PacmanGameState(getLayout('openClassic'))
+        actions = state.getLegalActions(0)
+        ordering = moveOrdering.MoveOrdering((moveOrdering.PV, moveOrdering.KILLER))
+
+        def order():
+            return [action for action, successor in ordering.order(state, 0, 1, 2)]
+
+        self.assertEqual(actions, order())
+
+        # The best move from the position goes ahead of the killers.
+        ordering.recordCutoff(state, 0, 1, 2, actions[-1])
+        ordering.recordBest(state, 0, actions[1])
+        self.assertEqual([actions[1], actions[-1]], order()[:2])
+
+        # Killers are only kept for the search they were found in.
+        ordering.newSearch()
+        self.assertEqual(actions[1], order()[0])
+        self.assertEqual(actions[0], order()[1])
+
+        # Ordering moves changes how much is searched, but not what is found.
+        plain = AlphaBetaAgent(0, tableSize = 0)
+        ordered = AlphaBetaAgent(0, ordering = 'all', tableSize = 0)
+
+        for agent in (plain, ordered):
+            agent.startSearch()
+
+        self.assertEqual(plain.search(state, 8), ordered.search(state, 8))
+        self.assertLess(ordered.nodeCount, plain.nodeCount)
+
+    def test_parallel_search(self):
+        # Splitting the root across processes finds the same values and actions.
+        for agentClass in (MinimaxAgent, AlphaBetaAgent, ExpectimaxAgent):
+            state = PacmanGameState(getLayout('smallClassic'))
+            sequential = agentClass(0, depth = 4)
+            parallel = agentClass(0, depth = 4, processes = 2)
+
+            self.assertTrue(parallel.isParallel())
+
+            try:
+                for i in range(3):
+                    for agent in (sequential, parallel):
+                        agent.startSearch()
+
+                    result = sequential.search(state, 4)
+                    self.assertEqual(result, parallel.search(state, 4), agentClass.__name__)
+                    self.assertGreater(parallel.nodeCount, 0)
+
+                    state = state.generateSuccessor(0, result[1])
+                    for agentIndex in range(1, state.getNumAgents()):
+                        if (state.isOver()):
+                            break
+
+                        state = state.generateSuccessor(agentIndex,
+                                state.getLegalActions(agentIndex)[0])
+
+                # Anytime mode works across the processes too.
+                timed = agentClass(0, moveTime = 10, maxDepth = 4, processes = 2)
+                self.assertEqual(sequential.getAction(state), timed.getAction(state))
+                self.assertEqual(4, timed.completedDepth)
+                timed.closePool()
+            finally:
+                parallel.closePool()
+
+        # What alpha-beta's move ordering learns (in each process) does not change the choice.
+        # (Before the root ignored the ordering, these games picked different moves at move 13.)
+        for ordering in ('none', 'all'):
+            rng = random.Random(1)
+            state = PacmanGameState(getLayout('smallClassic'))
+            sequential = AlphaBetaAgent(0, depth = 4, ordering = ordering)
+            parallel = AlphaBetaAgent(0, depth = 4, ordering = ordering, processes = 2)
+
+            try:
+                for i in range(15):
+                    action = sequential.getAction(state)
+                    self.assertEqual(action, parallel.getAction(state), ordering)
+
+                    state = state.generateSuccessor(0, action)
+                    for agentIndex in range(1, state.getNumAgents()):
+                        if (state.isOver()):
+                            break
+
+                        state = state.generateSuccessor(agentIndex,
+                                rng.choice(state.getLegalActions(agentIndex)))
+
+                    if (state.isOver()):
+                        break
+            finally:
+                parallel.closePool()
+
+        # A worker dying fails the search instead of leaving it waiting forever.
+        agent = MinimaxAgent(0, processes = 2)
+        with self.assertRaises(RuntimeError):
+            agent.mapWorkers(os._exit, [(1,)])
+
+        self.assertIsNone(agent._pool)
+
+        with self.assertRaises(ValueError):
+            MinimaxAgent(0, processes = -1)
+
+    def test_mcts(self):
+        state = PacmanGameState(getLayout('smallClassic'))
+
+        # With a seed and no time limit, searches are repeatable.
+        agent = MCTSAgent(0, iterations = 100, moveTime = 0, seed = 1)
+        other = MCTSAgent(0, iterations = 100, moveTime = 0, seed = 1)
+
+        action = agent.getAction(state)
+        self.assertIn(action, state.getLegalActions(0))
+        self.assertEqual(action, other.getAction(state))
+        self.assertEqual(100, agent.iterationCount)
+        self.assertEqual(100, agent.rolloutCount)
+        self.assertEqual(0, agent.reusedVisits)
+
+        # The tree under the position the game reaches is kept.
+        state = state.generateSuccessor(0, action)
+        for agentIndex in range(1, state.getNumAgents()):
+            state = state.generateSuccessor(agentIndex, state.getLegalActions(agentIndex)[0])
+
+        # The value range only covers the tree being searched (not earlier moves).
+        agent._minValue = -1000000
+        agent._maxValue = 1000000
+
+        agent.getAction(state)
+        self.assertGreater(agent.reusedVisits, 0)
+
+        edges = agent._root.edges.values()
+        self.assertEqual(min(edge.minValue for edge in edges), agent._minValue)
+        self.assertEqual(max(edge.maxValue for edge in edges), agent._maxValue)
+        self.assertLess(agent._maxValue - agent._minValue, 1000000)
+
+        # Rollouts can run in a pool of processes.
+        for rollout in ('random', 'directional'):
+            parallel = MCTSAgent(0, iterations = 10, moveTime = 0, rollout = rollout,
+                    processes = 2)
+
+            try:
+                self.assertIn(parallel.getAction(state), state.getLegalActions(0))
+                self.assertEqual(20, parallel.rolloutCount)
+            finally:
+                parallel.closePool()
+
+        with self.assertRaises(ValueError):
+            MCTSAgent(0, rollout = 'bogus')
+
+        with self.assertRaises(ValueError):
+            MCTSAgent(0, moveTime = 0)
+
+        # It can be picked on the command line.
+        games = pacman.main(['-p', 'MCTSAgent', '-l', 'testClassic', '--null-graphics',
+                '--seed', '1', '--agent-args', 'iterations=10,moveTime=0'])
+        self.assertIsInstance(games[0].agents[0], MCTSAgent)
+        self.assertGreater(games[0].agents[0].rolloutCount, 0)
+
+if __name__ == '__main__':
+    unittest.main()
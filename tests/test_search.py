@@ -0,0 +1,503 @@
+import json
+import logging
+import os
+import random
+import tempfile
+import tracemalloc
+import unittest
+
+from pacai.bin import eightpuzzle
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.actions import Actions
+from pacai.core.layout import getLayout
+from pacai.core.search import bidirectional
+from pacai.core.search import bounded
+from pacai.core.search import corridor
+from pacai.core.search import heuristic
+from pacai.core.search import portfolio
+from pacai.core.search.food import CompactFoodSearchProblem
+from pacai.core.search.food import FoodSearchProblem
+from pacai.core.search.instrument import SearchInstrumentation
+from pacai.core.search.node import SearchNode
+from pacai.core.search.node import SearchTree
+from pacai.core.search.position import PositionSearchProblem
+from pacai.core.search.problem import SearchProblem
+from pacai.student import search
+from pacai.student import searchAgents
+
+class CycleSearchProblem(SearchProblem):
+    """
+    States 0 to size - 1 in a ring (each linked to the next two), with no goal.
+    """
+
+    def __init__(self, size):
+        super().__init__()
+        self.size = size
+
+    def actionsCost(self, actions):
+        return len(actions)
+
+    def isGoal(self, state):
+        return False
+
+    def startingState(self):
+        return 0
+
+    def successorStates(self, state):
+        self._numExpanded += 1
+        return [((state + step) % self.size, str(step), 1) for step in (1, 2)]
+
+def killWorker(problem):
+    """
+    A portfolio search that takes its worker process down with it (without a word).
+    """
+
+    os._exit(1)
+
+"""
+Test the graph searches and the structures they are built on.
+"""
+class SearchTest(unittest.TestCase):
+    def test_search_tree(self):
+        tree = SearchTree()
+
+        root = tree.addRoot('A')
+        b = tree.addChild(root, 'B', 'North', 2)
+        c = tree.addChild(b, 'C', 'East', 3)
+        d = tree.addChild(root, 'D', 'West')
+
+        self.assertEqual(4, len(tree))
+        self.assertEqual([], tree.getPath(root))
+        self.assertEqual(['North', 'East'], tree.getPath(c))
+        self.assertEqual(['West'], tree.getPath(d))
+
+        self.assertEqual('C', tree.getState(c))
+        self.assertEqual(b, tree.getParent(c))
+        self.assertEqual('East', tree.getAction(c))
+        self.assertEqual(5, tree.getCost(c))
+        self.assertEqual(1, tree.getCost(d))
+
+    def test_bidirectional_searches(self):
+        layout = getLayout('mediumMaze')
+        state = PacmanGameState(layout)
+        positions = layout.walls.asList(False)
+
+        # Some cells are more expensive to enter, so the cheapest path is not always the shortest.
+        costFn = lambda position: 1 + position[0] % 3
+
+        for start, goal in [(positions[0], positions[-1]), (positions[5], positions[200]),
+                (positions[3], positions[3])]:
+            problem = PositionSearchProblem(state, start = start, goal = goal)
+            expected = 0
+            if (start != goal):
+                expected = len(search.breadthFirstSearch(problem))
+
+            problem = PositionSearchProblem(state, start = start, goal = goal)
+            actions = bidirectional.bidirectionalBreadthFirstSearch(problem)
+            self.assertEqual(expected, problem.actionsCost(actions))
+            self.assertIn(goal, problem.getVisitHistory())
+
+            problem = PositionSearchProblem(state, costFn = costFn, start = start, goal = goal)
+            expected = problem.actionsCost(search.uniformCostSearch(problem))
+
+            problem = PositionSearchProblem(state, costFn = costFn, start = start, goal = goal)
+            actions = bidirectional.bidirectionalUniformCostSearch(problem)
+            self.assertEqual(expected, problem.actionsCost(actions))
+
+        # Only problems with a single goal can be searched backwards.
+        problem = FoodSearchProblem(state)
+        self.assertRaises(ValueError, bidirectional.bidirectionalBreadthFirstSearch, problem)
+
+    def test_corridor_graph(self):
+        layout = getLayout('mediumMaze')
+        graph = layout.getCorridorGraph()
+        self.assertIs(graph, layout.getCorridorGraph())
+
+        numSteps = 0
+        for vertex in graph.getVertices():
+            for edge in graph.getEdges(vertex):
+                self.assertEqual(vertex, edge.source)
+                self.assertTrue(graph.isVertex(edge.target))
+                self.assertEqual(edge.target, edge.cells[-1])
+
+                # The actions walk through the cells.
+                position = vertex
+                for action, cell in zip(edge.actions, edge.cells):
+                    position = Actions.getSuccessor(position, action)
+                    self.assertEqual(cell, position)
+
+                    if (cell != edge.target):
+                        self.assertFalse(graph.isVertex(cell))
+
+                numSteps += edge.getCost()
+
+        # Every corridor is walked once in each direction, so every move between cells is covered.
+        positions = layout.walls.asList(False)
+        table = layout.getLegalActionTable()
+
+        self.assertLess(len(graph.getVertices()), len(positions))
+        self.assertEqual(sum(len(table.getMoves(*position)) for position in positions), numSteps)
+
+    def test_corridor_searches(self):
+        state = PacmanGameState(getLayout('mediumCorners'))
+
+        problems = [
+            (PositionSearchProblem, corridor.CorridorPositionSearchProblem),
+            (CompactFoodSearchProblem, corridor.CorridorFoodSearchProblem),
+            (searchAgents.CornersProblem, searchAgents.CorridorCornersProblem),
+        ]
+
+        for baseClass, corridorClass in problems:
+            problem = baseClass(state)
+            expected = problem.actionsCost(search.uniformCostSearch(problem))
+
+            problem = corridorClass(state)
+            actions = problem.expandActions(search.uniformCostSearch(problem))
+            self.assertEqual(expected, problem.actionsCost(actions))
+            self.assertEqual(expected, len(actions))
+
+        # Only problems with the corridor hooks can be searched over corridors.
+        self.assertRaises(ValueError, corridor.CorridorSearchProblem, CycleSearchProblem(3))
+
+    def test_search_node(self):
+        root = SearchNode('A')
+        child = SearchNode('B', SearchNode('C', root, 'North', 2), 'East', 3)
+
+        self.assertEqual([], root.getPath())
+        self.assertEqual(['North', 'East'], child.getPath())
+        self.assertEqual(5, child.cost)
+
+    def test_bounded_searches(self):
+        state = PacmanGameState(getLayout('tinySearch'))
+        foodHeuristic = lambda state, problem: problem.getFoodCount(state)
+
+        problem = CompactFoodSearchProblem(state)
+        optimalCost = problem.actionsCost(search.aStarSearch(problem, foodHeuristic))
+
+        problem = CompactFoodSearchProblem(state)
+        actions = bounded.iterativeDeepeningAStarSearch(problem, foodHeuristic)
+        self.assertEqual(optimalCost, problem.actionsCost(actions))
+
+        problem = CompactFoodSearchProblem(state)
+        actions = bounded.memoryBoundedAStarSearch(problem, foodHeuristic)
+        self.assertEqual(optimalCost, problem.actionsCost(actions))
+
+        # With a tiny budget, the path may be worse but it still has to eat all the food.
+        problem = CompactFoodSearchProblem(state)
+        actions = bounded.memoryBoundedAStarSearch(problem, foodHeuristic, maxNodes = 100)
+        self.assertLessEqual(optimalCost, problem.actionsCost(actions))
+        self.assertTrue(problem.isGoal(self._followActions(problem, actions)))
+
+        # Forgetting the explored set must not make an unsolvable problem run forever.
+        problem = CycleSearchProblem(50)
+        nullHeuristic = lambda state, problem: 0
+        self.assertIsNone(search.aStarSearch(problem, nullHeuristic))
+
+        problem = CycleSearchProblem(50)
+        self.assertIsNone(bounded.memoryBoundedAStarSearch(problem, nullHeuristic,
+                maxNodes = 16, maxPrunes = 10))
+
+    def _followActions(self, problem, actions):
+        state = problem.startingState()
+        for action in actions:
+            successors = problem.successorStates(state)
+            state = [successor for (successor, option, cost) in successors if option == action][0]
+
+        return state
+
+    def test_searches(self):
+        state = PacmanGameState(getLayout('mediumMaze'))
+
+        searches = [
+            ('dfs', search.depthFirstSearch, False),
+            ('bfs', search.breadthFirstSearch, True),
+            ('ucs', search.uniformCostSearch, True),
+            ('astar', lambda problem: search.aStarSearch(problem, heuristic.manhattan), True),
+            # A fractional heuristic moves the frontier out of buckets and into a heap.
+            ('astar-euclidean',
+                    lambda problem: search.aStarSearch(problem, heuristic.euclidean), True),
+        ]
+
+        for name, function, optimal in searches:
+            problem = PositionSearchProblem(state)
+            actions = function(problem)
+
+            self.assertIsNotNone(actions, name)
+            self.assertNotEqual(999999, problem.actionsCost(actions), name)
+            if (optimal):
+                self.assertEqual(68, len(actions), name)
+
+        # Unit costs let the best first searches keep their frontier in buckets.
+        self.assertTrue(PositionSearchProblem(state).hasSmallIntegerCosts())
+        self.assertFalse(PositionSearchProblem(state, costFn = lambda position: 1)
+                .hasSmallIntegerCosts())
+        self.assertFalse(FoodSearchProblem(state).hasSmallIntegerCosts())
+
+    def test_instrumentation(self):
+        state = PacmanGameState(getLayout('mediumMaze'))
+        instrumentation = SearchInstrumentation()
+
+        plain = PositionSearchProblem(state)
+        expected = search.aStarSearch(plain, heuristic.manhattan)
+
+        problem = PositionSearchProblem(state)
+        timedHeuristic = instrumentation.wrapHeuristic(heuristic.manhattan)
+        actions = instrumentation.run(lambda x: search.aStarSearch(x, timedHeuristic),
+                problem, 'astar')
+        record = instrumentation.record
+
+        self.assertEqual(expected, actions)
+        self.assertEqual('astar', record['search'])
+        self.assertEqual(68, record['pathCost'])
+        self.assertEqual(plain.getExpandedCount(), record['expanded'])
+        self.assertEqual(problem.getExpandedCount(), record['expanded'])
+        self.assertGreater(record['generated'], record['duplicates'])
+        self.assertGreater(record['duplicates'], 0)
+        self.assertGreater(record['peakFrontier'], 0)
+        self.assertGreater(record['heuristicCalls'], 0)
+        self.assertGreater(record['peakMemoryBytes'], 0)
+
+        with tempfile.TemporaryDirectory() as tempDir:
+            path = os.path.join(tempDir, 'records.jsonl')
+            instrumentation.writeRecord(path)
+            instrumentation.writeRecord(path)
+
+            with open(path, 'r') as file:
+                lines = file.readlines()
+
+        self.assertEqual(2, len(lines))
+        self.assertEqual(record, json.loads(lines[0]))
+
+        # Invertible problems stay invertible, so bidirectional searches can be instrumented.
+        instrumentation = SearchInstrumentation(trackMemory = False)
+        for searchFunction in (bidirectional.bidirectionalBreadthFirstSearch,
+                bidirectional.bidirectionalUniformCostSearch):
+            problem = PositionSearchProblem(state)
+            actions = instrumentation.run(searchFunction, problem)
+            record = instrumentation.record
+
+            self.assertEqual(68, problem.actionsCost(actions))
+            self.assertEqual(searchFunction.__name__, record['search'])
+            self.assertEqual(68, record['pathCost'])
+            self.assertGreater(record['expanded'], 0)
+            self.assertGreater(record['generated'], 0)
+            self.assertIsNone(record['peakMemoryBytes'])
+
+        # Tracing that was already on is left alone (even where the peak cannot be reset).
+        resetPeak = getattr(tracemalloc, 'reset_peak', None)
+        instrumentation = SearchInstrumentation()
+
+        tracemalloc.start(5)
+        try:
+            traced = [object()]
+
+            for canResetPeak in (True, False):
+                if (not canResetPeak and resetPeak is not None):
+                    del tracemalloc.reset_peak
+
+                with self.assertLogs(level = 'INFO') as logs:
+                    # assertLogs needs at least one record.
+                    logging.info('Searching.')
+                    instrumentation.run(search.breadthFirstSearch, PositionSearchProblem(state))
+
+                warnings = [line for line in logs.output if ('peak memory' in line)]
+                self.assertEqual(int(not canResetPeak), len(warnings))
+                self.assertGreaterEqual(instrumentation.record['peakMemoryBytes'], 0)
+
+                self.assertTrue(tracemalloc.is_tracing())
+                self.assertEqual(5, tracemalloc.get_traceback_limit())
+                self.assertIsNotNone(tracemalloc.get_object_traceback(traced[0]))
+        finally:
+            if (resetPeak is not None):
+                tracemalloc.reset_peak = resetPeak
+
+            tracemalloc.stop()
+
+    def test_portfolio(self):
+        state = PacmanGameState(getLayout('mediumMaze'))
+        oldPath = portfolio.getWinnersPath()
+
+        configurations = portfolio.parseConfigurations(
+                'dfs:suboptimal;nosuchsearch;astar:manhattan')
+        self.assertEqual('pacai.core.search.search.dfs:suboptimal',
+                configurations[0].getKey())
+        self.assertFalse(configurations[0].optimal)
+        self.assertEqual('pacai.core.search.heuristic.manhattan', configurations[2].heuristic)
+
+        with self.assertRaises(ValueError):
+            portfolio.parseConfigurations('astar:manhattan:null')
+
+        with tempfile.TemporaryDirectory() as tempDir:
+            try:
+                path = os.path.join(tempDir, 'winners.json')
+                portfolio.setWinnersPath(path)
+
+                # Only the optimal configuration that works is accepted.
+                result = portfolio.runPortfolio(state, PositionSearchProblem, configurations)
+                self.assertEqual(configurations[2], result.configuration)
+                self.assertEqual(68, result.cost)
+                self.assertEqual(68, len(result.actions))
+
+                # The winner is remembered (on disk too) and goes first next time.
+                portfolio.setWinnersPath(path)
+                key = portfolio.getPortfolioKey(state, PositionSearchProblem)
+                self.assertEqual(configurations[2].getKey(), portfolio.getWinner(key))
+                self.assertEqual(configurations[2],
+                        portfolio.orderConfigurations(configurations, key)[0])
+
+                # Take any plan.
+                result = portfolio.runPortfolio(state, PositionSearchProblem,
+                        configurations[:1], mode = portfolio.MODE_FIRST)
+                self.assertEqual(configurations[0], result.configuration)
+
+                # A configuration whose process dies (without a result) counts as failed.
+                dead = portfolio.parseConfigurations(__name__ + '.killWorker')
+                with self.assertLogs(level = 'WARNING') as logs:
+                    result = portfolio.runPortfolio(state, PositionSearchProblem,
+                            dead + configurations[:1])
+
+                self.assertEqual(configurations[0], result.configuration)
+                self.assertEqual(2, result.finished)
+                self.assertEqual(1, len(logs.output))
+                self.assertIn('died', logs.output[0])
+
+                with self.assertLogs(level = 'WARNING') as logs:
+                    result = portfolio.runPortfolio(state, PositionSearchProblem, dead)
+
+                self.assertIsNone(result.actions)
+                self.assertEqual(1, result.finished)
+                self.assertIn('died', logs.output[0])
+            finally:
+                portfolio.setWinnersPath(oldPath)
+
+    def test_compact_food_search(self):
+        state = PacmanGameState(getLayout('tinySearch'))
+
+        problem = FoodSearchProblem(state)
+        compact = CompactFoodSearchProblem(state)
+
+        start = problem.startingState()
+        compactStart = compact.startingState()
+
+        self.assertEqual(start[0], compact.getPacmanPosition(compactStart))
+        self.assertEqual(start[1], compact.getFoodGrid(compactStart))
+        self.assertEqual(start[1].asList(), compact.getFoodPositions(compactStart))
+        self.assertEqual(problem.getFoodCount(start), compact.getFoodCount(compactStart))
+        self.assertEqual(heuristic.numFood(start, problem),
+                heuristic.numFood(compactStart, compact))
+
+        # The successors line up with the grid based ones.
+        successors = problem.successorStates(start)
+        compactSuccessors = compact.successorStates(compactStart)
+        self.assertEqual([action for (successor, action, cost) in successors],
+                [action for (successor, action, cost) in compactSuccessors])
+
+        for (successor, action, cost), (compactSuccessor, compactAction, compactCost) in zip(
+                successors, compactSuccessors):
+            self.assertEqual(successor[0], compact.getPacmanPosition(compactSuccessor))
+            self.assertEqual(successor[1], compact.getFoodGrid(compactSuccessor))
+
+        actions = search.uniformCostSearch(problem)
+        compactActions = search.uniformCostSearch(compact)
+        self.assertEqual(problem.actionsCost(actions), compact.actionsCost(compactActions))
+        self.assertEqual(problem.getExpandedCount(), compact.getExpandedCount())
+
+    def test_eight_puzzle_rank(self):
+        for rank in (0, 1, 1234, 362879):
+            self.assertEqual(rank, eightpuzzle.rankPermutation(eightpuzzle.unrankPermutation(rank)))
+
+        puzzle = eightpuzzle.loadEightPuzzle(2)
+        self.assertEqual(puzzle.getNumbers(),
+                eightpuzzle.unrankPermutation(puzzle.getRank()))
+
+        moved = puzzle.result(puzzle.legalMoves()[0])
+        self.assertNotEqual(puzzle.getRank(), moved.getRank())
+        self.assertEqual(puzzle, moved.result({'up': 'down', 'down': 'up',
+                'left': 'right', 'right': 'left'}[puzzle.legalMoves()[0]]))
+
+        with self.assertRaises(ValueError):
+            eightpuzzle.unrankPermutation(362880)
+
+    def test_eight_puzzle_searches(self):
+        random.seed(1)
+        puzzles = [eightpuzzle.createRandomEightPuzzle(50) for i in range(10)]
+
+        for puzzle in puzzles:
+            compact = eightpuzzle.CompactEightPuzzleSearchProblem(puzzle)
+            numbers = compact.getNumbers(compact.startingState())
+
+            # The pattern databases are at least as informed as manhattan distance.
+            self.assertGreaterEqual(eightpuzzle.patternDatabaseHeuristic(puzzle.getRank(), compact),
+                    eightpuzzle.manhattanHeuristic(puzzle.getRank(), compact))
+            self.assertEqual(puzzle.getNumbers(), numbers)
+
+            expected = search.breadthFirstSearch(eightpuzzle.EightPuzzleSearchProblem(puzzle))
+            path = search.aStarSearch(compact, eightpuzzle.patternDatabaseHeuristic)
+            self.assertEqual(len(expected), len(path))
+
+            for action in path:
+                puzzle = puzzle.result(action)
+            self.assertTrue(puzzle.isGoal())
+
+        stats = eightpuzzle.solveBatch(puzzles, search.aStarSearch,
+                eightpuzzle.manhattanHeuristic)
+        self.assertEqual(10, stats['puzzles'])
+
+    def test_pattern_database_files(self):
+        oldDir = eightpuzzle.getPatternDatabaseDir()
+
+        with tempfile.TemporaryDirectory() as tempDir:
+            try:
+                eightpuzzle.setPatternDatabaseDir(tempDir)
+                eightpuzzle.clearPatternDatabases()
+
+                built = eightpuzzle.getPatternDatabases([(1, 2, 3)])[0]
+                path = os.path.join(tempDir, 'eightpuzzle-1-2-3.pdb')
+                self.assertTrue(os.path.isfile(path))
+
+                loaded = eightpuzzle.loadPatternDatabase((1, 2, 3), path)
+                self.assertEqual(built.toBytes(), loaded.toBytes())
+
+                # A file for other tiles is not used.
+                self.assertIsNone(eightpuzzle.loadPatternDatabase((1, 2, 4), path))
+            finally:
+                eightpuzzle.setPatternDatabaseDir(oldDir)
+                eightpuzzle.clearPatternDatabases()
+
+    def test_heuristic_cache(self):
+        calls = []
+
+        def countingHeuristic(state, problem):
+            calls.append(state)
+            return state * 2
+
+        cache = heuristic.HeuristicCache(countingHeuristic, maxSize = 2)
+        problem = object()
+
+        self.assertEqual(2, cache(1, problem))
+        self.assertEqual(2, cache(1, problem))
+        self.assertEqual(4, cache(2, problem))
+        self.assertEqual((1, 2), (cache.hits, cache.misses))
+
+        # Evicts 1 (the least recently used).
+        cache(2, problem)
+        cache(3, problem)
+        cache(1, problem)
+        self.assertEqual([1, 2, 3, 1], calls)
+
+        # A new problem starts over.
+        cache(3, object())
+        self.assertEqual((0, 1), (cache.hits, cache.misses))
+
+    def test_start_is_goal(self):
+        layout = getLayout('tinyMaze')
+        state = PacmanGameState(layout)
+        start = layout.agentPositions[0][1]
+
+        for function in [search.depthFirstSearch, search.breadthFirstSearch,
+                search.uniformCostSearch]:
+            problem = PositionSearchProblem(state, goal = start)
+            self.assertEqual([], function(problem))
+
+if __name__ == '__main__':
+    unittest.main()
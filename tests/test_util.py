@@ -13,5 +13,12 @@ class UtilTest(unittest.TestCase):
         self.assertEquals(util.buildHash(1, 1), 23311)
         self.assertEquals(util.buildHash(1, 2), 23312)
 
+    def test_parse_bool(self):
+        for value in ('1', 'true', 'True', 'YES', True, 1):
+            self.assertTrue(util.parseBool(value), value)
+
+        for value in ('0', 'false', 'no', '', None, False, 0):
+            self.assertFalse(util.parseBool(value), value)
+
 if __name__ == '__main__':
     unittest.main()
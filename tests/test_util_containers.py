@@ -52,5 +52,59 @@ class UtilContainersTest(unittest.TestCase):
         for val, pri in reversed(val_list):
             self.assertEqual(val, testPriorityQueue.pop())
 
+    def test_indexed_priority_queue(self):
+        self._checkAddressableQueue(priorityQueue.IndexedPriorityQueue())
+
+        # Ties are broken by the items.
+        testQueue = priorityQueue.IndexedPriorityQueue()
+        for val in ['c', 'a', 'b']:
+            testQueue.push(val, 1)
+        self.assertEqual(['a', 'b', 'c'], [testQueue.pop() for i in range(3)])
+
+    def test_bucket_priority_queue(self):
+        self._checkAddressableQueue(priorityQueue.BucketPriorityQueue())
+
+        # Ties are broken by insertion order.
+        testQueue = priorityQueue.BucketPriorityQueue()
+        for val in ['c', 'a', 'b']:
+            testQueue.push(val, 1)
+        self.assertEqual(['c', 'a', 'b'], [testQueue.pop() for i in range(3)])
+
+        self.assertRaises(ValueError, testQueue.push, 'd', -1)
+        self.assertRaises(ValueError, testQueue.push, 'd', 0.5)
+
+    def _checkAddressableQueue(self, testQueue):
+        self.assertTrue(testQueue.isEmpty())
+
+        priorities = [7, 3, 9, 0, 4, 8, 1, 6, 2, 5]
+        for val in range(len(priorities)):
+            testQueue.push(val, priorities[val])
+
+        self.assertEqual(len(priorities), len(testQueue))
+        self.assertTrue(testQueue.contains(2))
+        self.assertIn(2, testQueue)
+        self.assertRaises(ValueError, testQueue.push, 2, 1)
+
+        # Move 2 from last to first, and leave 0 alone.
+        testQueue.decreaseKey(2, 0)
+        self.assertEqual(0, testQueue.getPriority(2))
+        self.assertRaises(ValueError, testQueue.decreaseKey, 0, 8)
+        self.assertFalse(testQueue.pushOrDecrease(0, 9))
+        self.assertTrue(testQueue.pushOrDecrease(0, 5))
+        self.assertTrue(testQueue.pushOrDecrease(10, 4))
+
+        self.assertEqual(len(priorities) + 1, len(testQueue))
+
+        expected = dict(enumerate(priorities))
+        expected.update({0: 5, 2: 0, 10: 4})
+
+        popped = []
+        while (not testQueue.isEmpty()):
+            popped.append(testQueue.pop())
+
+        self.assertEqual(sorted(expected), sorted(popped))
+        self.assertEqual(sorted(expected.values()), [expected[val] for val in popped])
+        self.assertFalse(testQueue.contains(2))
+
 if __name__ == '__main__':
     unittest.main()